@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de los generadores de documentos.
+
+Mide cada sección ``agregar_*`` (con los ganchos del perfilador de
+``agregar_secciones``) y el guardado, variando el tamaño de las entradas
+(filas de microservicios, longitud del listado de comandos y número de
+documentos por lote). Los resultados se escriben en JSON
+para poder compararlos con una ejecución base:
+
+    python benchmarks/bench_generadores.py -o base.json
+    python benchmarks/bench_generadores.py -o actual.json --comparar base.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import docx  # noqa: E402
+
+import generar_documento  # noqa: E402
+import generate_word  # noqa: E402
+import instrumentacion  # noqa: E402
+import inventario  # noqa: E402
+import lote  # noqa: E402
+import paralelo  # noqa: E402
+import plan  # noqa: E402
+import validador  # noqa: E402
+
+# Tamaños de cada dimensión (modo completo y modo rápido)
+TAMANOS = {
+    'microservicios': [10, 100, 1000, 5000],
+    'comandos': [25, 250, 2500],
+    'lote': [1, 10, 50],
+    'inventario': [1000, 10000, 50000],
+}
+TAMANOS_RAPIDOS = {
+    'microservicios': [10, 500],
+    'comandos': [25, 250],
+    'lote': [1, 8],
+    'inventario': [1000, 5000],
+}
+
+
+def datos_sinteticos(microservicios=None, comandos=None):
+    """Devuelve un registro con listados del tamaño indicado"""
+
+    datos = {'sistema': 'Sistema de referencia', 'fecha': '2024-01-01'}
+    if microservicios is not None:
+        datos['microservicios'] = [
+            (str(i), f"servicio-{i:05d}", str(5000 + i), "Función de ejemplo", "BD, Redis")
+            for i in range(1, microservicios + 1)
+        ]
+    if comandos is not None:
+        base = generate_word.DATOS_POR_DEFECTO['comandos']
+        datos['comandos'] = [base[i % len(base)] for i in range(comandos)]
+    return datos
+
+
+def _rss_max_kb(quien=resource.RUSAGE_SELF):
+    """Memoria residente máxima en KiB (Linux reporta ru_maxrss en KiB)"""
+
+    return resource.getrusage(quien).ru_maxrss
+
+
+def medir_transferencia(datos, repeticiones):
+    """Mide crear_documento_transferencia y el desglose por sección y guardado"""
+
+    warnings.simplefilter('ignore')
+
+    # Calentamiento: la primera ejecución construye la plantilla base
+    generate_word.construir_documento(datos).save(io.BytesIO())
+
+    # Total sin instrumentar, por el mismo recorrido que crear_documento_transferencia
+    inicio_total = time.perf_counter()
+    for _ in range(repeticiones):
+        generate_word.construir_documento(datos).save(io.BytesIO())
+    total = time.perf_counter() - inicio_total
+
+    # Desglose con los ganchos del perfilador de agregar_secciones; tracemalloc
+    # ralentiza la generación, así que no cuenta en el total
+    perfil = instrumentacion.activar_perfilador()
+    for _ in range(repeticiones):
+        doc = generate_word.construir_documento(datos)
+        with perfil.guardado():
+            doc.save(io.BytesIO())
+    tiempos = {total_seccion['seccion']: total_seccion['segundos'] for total_seccion in perfil.resumen()}
+
+    return {
+        'segundos_por_documento': total / repeticiones,
+        'documentos_por_segundo': repeticiones / total,
+        'secciones': {
+            seccion.__name__: tiempos.get(seccion.__name__, 0.0) / repeticiones
+            for seccion in generate_word.SECCIONES
+        },
+        'guardado': tiempos.get('guardado', 0.0) / repeticiones,
+        'rss_max_kb': _rss_max_kb(),
+    }
+
+
+def medir_plan(datos, repeticiones):
+    """Mide la generación a partir del plan compilado de la especificación"""
+
+    warnings.simplefilter('ignore')
+
+    inicio = time.perf_counter()
+    plan_render = plan.obtener_plan()
+    compilacion = time.perf_counter() - inicio
+    plan.construir_documento_plan(datos, plan_render).save(io.BytesIO())
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        plan.construir_documento_plan(datos, plan_render).save(io.BytesIO())
+    total = time.perf_counter() - inicio
+    return {
+        'segundos_por_documento': total / repeticiones,
+        'documentos_por_segundo': repeticiones / total,
+        'compilacion': compilacion,
+        'rss_max_kb': _rss_max_kb(),
+    }
+
+
+def medir_paralelo(datos, repeticiones, procesos):
+    """Mide la generación con las secciones renderizadas en varios procesos"""
+
+    warnings.simplefilter('ignore')
+    # La primera generación también crea el pool, que se reutiliza en las siguientes
+    generate_word.construir_documento(datos, procesos=procesos).save(io.BytesIO())
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        generate_word.construir_documento(datos, procesos=procesos).save(io.BytesIO())
+    total = time.perf_counter() - inicio
+    # Este proceso es un trabajador del pool de _en_proceso_aislado
+    paralelo.cerrar_ejecutores()
+    return {
+        'segundos_por_documento': total / repeticiones,
+        'documentos_por_segundo': repeticiones / total,
+        'rss_max_kb': max(_rss_max_kb(), _rss_max_kb(resource.RUSAGE_CHILDREN)),
+    }
+
+
+def escribir_volcado_podman(ruta, contenedores, replicas=2):
+    """Escribe un volcado sintético de ``podman ps --format json`` sin construirlo en memoria"""
+
+    servicios = max(1, contenedores // replicas)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        archivo.write('[\n')
+        for i in range(contenedores):
+            contenedor = {
+                'Id': f"{i:064x}",
+                'Image': f"registry.local/servicio-{i % servicios:05d}:1.0",
+                'Names': [f"servicio-{i % servicios:05d}"],
+                'Ports': [{'host_ip': '', 'container_port': 8080,
+                           'host_port': 5000 + i % servicios, 'range': 1, 'protocol': 'tcp'}],
+                'Labels': {'funcion': "Función de ejemplo", 'dependencias': "BD, Redis"},
+                'State': 'running',
+            }
+            archivo.write(('    ' if i == 0 else ',\n    ') + json.dumps(contenedor))
+        archivo.write('\n]\n')
+
+
+def medir_inventario(contenedores):
+    """Mide la ingesta de un volcado de podman y la generación con el inventario resultante"""
+
+    warnings.simplefilter('ignore')
+    generate_word.construir_documento().save(io.BytesIO())
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'podman_ps.json')
+        escribir_volcado_podman(ruta, contenedores)
+        rss_inicio = _rss_max_kb()
+
+        inicio = time.perf_counter()
+        filas = inventario.cargar_inventario(ruta)
+        ingesta = time.perf_counter() - inicio
+        rss_ingesta = _rss_max_kb()
+
+        inicio = time.perf_counter()
+        generate_word.construir_documento({'microservicios': filas}).save(io.BytesIO())
+        generacion = time.perf_counter() - inicio
+
+    return {
+        'segundos_por_documento': ingesta + generacion,
+        'documentos_por_segundo': 1 / (ingesta + generacion),
+        'ingesta': ingesta,
+        'generacion': generacion,
+        'servicios': len(filas),
+        'rss_ingesta_kb': rss_ingesta - rss_inicio,
+        'rss_max_kb': _rss_max_kb(),
+    }
+
+
+def medir_ejemplo(repeticiones):
+    """Mide crear_documento_ejemplo (que guarda en el directorio actual)"""
+
+    anterior = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.chdir(directorio)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                inicio = time.perf_counter()
+                for _ in range(repeticiones):
+                    generar_documento.crear_documento_ejemplo()
+                total = time.perf_counter() - inicio
+        finally:
+            os.chdir(anterior)
+
+    return {
+        'segundos_por_documento': total / repeticiones,
+        'documentos_por_segundo': repeticiones / total,
+        'rss_max_kb': _rss_max_kb(),
+    }
+
+
+def medir_lote(documentos, trabajadores):
+    """Mide la generación por lotes de varios documentos"""
+
+    registros = [dict(datos_sinteticos(), sistema=f"Sistema {i}") for i in range(documentos)]
+    with tempfile.TemporaryDirectory() as directorio:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            inicio = time.perf_counter()
+            resumen = lote.generar_lote(registros, directorio, trabajadores)
+            total = time.perf_counter() - inicio
+
+    return {
+        'segundos_por_documento': total / documentos,
+        'documentos_por_segundo': documentos / total,
+        'errores': resumen['errores'],
+        'rss_max_kb': max(_rss_max_kb(), _rss_max_kb(resource.RUSAGE_CHILDREN)),
+    }
+
+
+def medir_validacion(documentos, trabajadores):
+    """Mide la validación estructural de un lote de documentos ya generados"""
+
+    registros = [dict(datos_sinteticos(), sistema=f"Sistema {i}") for i in range(documentos)]
+    with tempfile.TemporaryDirectory() as directorio:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            lote.generar_lote(registros, directorio, trabajadores)
+        rutas = validador.rutas_documentos([directorio])
+        inicio = time.perf_counter()
+        informe = validador.validar_documentos(rutas, trabajadores)
+        total = time.perf_counter() - inicio
+
+    return {
+        'segundos_por_documento': total / documentos,
+        'documentos_por_segundo': documentos / total,
+        'errores': informe['errores'],
+        'rss_max_kb': max(_rss_max_kb(), _rss_max_kb(resource.RUSAGE_CHILDREN)),
+    }
+
+
+def _en_proceso_aislado(funcion, *argumentos):
+    """Ejecuta una medición en un proceso nuevo para aislar su RSS máximo"""
+
+    with ProcessPoolExecutor(max_workers=1) as ejecutor:
+        return ejecutor.submit(funcion, *argumentos).result()
+
+
+def ejecutar(tamanos, repeticiones, trabajadores):
+    """Ejecuta todos los escenarios y devuelve la lista de resultados"""
+
+    escenarios = []
+
+    def registrar(nombre, parametros, resultado):
+        escenarios.append(dict(nombre=nombre, parametros=parametros, **resultado))
+        print(f"  {nombre:<40} {resultado['segundos_por_documento'] * 1000:10.2f} ms/doc "
+              f"{resultado['documentos_por_segundo']:8.2f} docs/s "
+              f"{resultado['rss_max_kb'] / 1024:8.1f} MiB", file=sys.stderr)
+
+    registrar('ejemplo', {}, _en_proceso_aislado(medir_ejemplo, repeticiones))
+    registrar('transferencia', {}, _en_proceso_aislado(
+        medir_transferencia, datos_sinteticos(), repeticiones))
+    registrar('transferencia_plan', {}, _en_proceso_aislado(
+        medir_plan, datos_sinteticos(), repeticiones))
+
+    for filas in tamanos['microservicios']:
+        registrar(f'microservicios_{filas}', {'microservicios': filas}, _en_proceso_aislado(
+            medir_transferencia, datos_sinteticos(microservicios=filas), repeticiones))
+
+    for lineas in tamanos['comandos']:
+        registrar(f'comandos_{lineas}', {'comandos': lineas}, _en_proceso_aislado(
+            medir_transferencia, datos_sinteticos(comandos=lineas), repeticiones))
+
+    # Documento con las entradas más grandes, secciones en un proceso y en paralelo
+    grande = datos_sinteticos(microservicios=max(tamanos['microservicios']),
+                              comandos=max(tamanos['comandos']))
+    for procesos in sorted({1, trabajadores}):
+        registrar(f'paralelo_{procesos}', {'procesos': procesos}, _en_proceso_aislado(
+            medir_paralelo, grande, repeticiones, procesos))
+
+    for contenedores in tamanos['inventario']:
+        registrar(f'inventario_{contenedores}', {'contenedores': contenedores},
+                  _en_proceso_aislado(medir_inventario, contenedores))
+
+    for documentos in tamanos['lote']:
+        registrar(f'lote_{documentos}', {'documentos': documentos, 'trabajadores': trabajadores},
+                  _en_proceso_aislado(medir_lote, documentos, trabajadores))
+        registrar(f'validacion_{documentos}', {'documentos': documentos, 'trabajadores': trabajadores},
+                  _en_proceso_aislado(medir_validacion, documentos, trabajadores))
+
+    return escenarios
+
+
+def comparar(base, actual, umbral):
+    """Compara dos ejecuciones y devuelve los escenarios que empeoraron"""
+
+    anteriores = {escenario['nombre']: escenario for escenario in base['escenarios']}
+    regresiones = []
+    print(f"\n{'escenario':<40} {'base ms':>10} {'actual ms':>10} {'cambio':>8}")
+    for escenario in actual['escenarios']:
+        anterior = anteriores.get(escenario['nombre'])
+        if anterior is None:
+            continue
+        antes = anterior['segundos_por_documento']
+        ahora = escenario['segundos_por_documento']
+        cambio = (ahora - antes) / antes if antes else 0.0
+        marca = ' ⚠️' if cambio > umbral else ''
+        print(f"{escenario['nombre']:<40} {antes * 1000:10.2f} {ahora * 1000:10.2f} "
+              f"{cambio:+8.1%}{marca}")
+        if cambio > umbral:
+            regresiones.append(escenario['nombre'])
+    return regresiones
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Benchmarks de los generadores de documentos")
+    parser.add_argument('-o', '--salida', default='bench_resultados.json',
+                        help="Archivo JSON de resultados")
+    parser.add_argument('-n', '--repeticiones', type=int, default=5,
+                        help="Documentos por escenario de un solo proceso")
+    parser.add_argument('-j', '--trabajadores', type=int, default=os.cpu_count(),
+                        help="Procesos para los escenarios de lote")
+    parser.add_argument('--rapido', action='store_true', help="Usa tamaños reducidos")
+    parser.add_argument('--comparar', help="JSON de una ejecución base con la que comparar")
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help="Empeoramiento relativo considerado regresión (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    tamanos = TAMANOS_RAPIDOS if args.rapido else TAMANOS
+    print("⏱️  Ejecutando benchmarks...", file=sys.stderr)
+    resultados = {
+        'entorno': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'python_docx': docx.__version__,
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'repeticiones': args.repeticiones,
+        },
+        'escenarios': ejecutar(tamanos, args.repeticiones, args.trabajadores),
+    }
+
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultados, archivo, ensure_ascii=False, indent=2)
+    print(f"📁 Resultados: {os.path.abspath(args.salida)}", file=sys.stderr)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(base, resultados, args.umbral)
+        if regresiones:
+            print(f"\n❌ Regresiones: {', '.join(regresiones)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,161 @@
+"""
+Bloques de código compactos.
+
+Un bloque de varias líneas se escribe como un único párrafo con el estilo
+``Codigo`` y saltos de línea (``w:br``) entre líneas, en lugar de un párrafo
+por línea con la fuente repetida en cada ejecución: menos elementos XML,
+archivos más pequeños y runbooks largos que se generan y abren antes.
+
+Opcionalmente, las líneas de shell o PowerShell se resaltan por tokens
+(comentarios, cadenas, variables, opciones y comandos); cada línea se
+tokeniza una sola vez por proceso.
+"""
+
+import functools
+import re
+
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.text.paragraph import Paragraph
+
+from contenido import DocumentoIR
+from estilos import resolver_estilo
+from tablas import _texto_xml
+
+ESTILO_CODIGO = 'Codigo'
+
+# Color de cada tipo de token resaltado
+COLORES = {
+    'comentario': '6A9955',
+    'cadena': 'A31515',
+    'variable': '001080',
+    'opcion': '795E26',
+    'comando': '0000FF',
+    'operador': '808080',
+}
+
+_TOKENS = {
+    'bash': re.compile(
+        r'(?P<comentario>(?<!\S)#.*$)'
+        r'|(?P<cadena>"(?:\\.|[^"\\])*"|\'[^\']*\')'
+        r'|(?P<variable>\$\{[^}]*\}|\$[\w?@#*!$-])'
+        r'|(?P<opcion>(?<!\S)--?[A-Za-z][\w-]*)'
+        r'|(?P<operador>\|\||&&|[|;&<>])'
+        r'|(?P<palabra>[^\s"\'|;&<>$]+)'
+    ),
+    'powershell': re.compile(
+        r'(?P<comentario>(?<!\S)#.*$)'
+        r'|(?P<cadena>"(?:`.|[^"`])*"|\'[^\']*\')'
+        r'|(?P<variable>\$\{[^}]*\}|\$(?:env:)?\w+)'
+        r'|(?P<opcion>(?<!\S)-[A-Za-z][\w-]*)'
+        r'|(?P<operador>\||;)'
+        r'|(?P<palabra>[^\s"\'|;$]+)'
+    ),
+}
+
+LENGUAJES = {
+    'bash': 'bash', 'sh': 'bash', 'shell': 'bash',
+    'powershell': 'powershell', 'pwsh': 'powershell', 'ps1': 'powershell',
+}
+
+# Tras estos operadores empieza un comando nuevo
+_INICIO_COMANDO = {'|', '||', '&&', ';', '&'}
+
+
+def normalizar_lenguaje(lenguaje):
+    """Devuelve el nombre canónico de un lenguaje resaltable (o None)"""
+
+    if not lenguaje:
+        return None
+    try:
+        return LENGUAJES[lenguaje.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Lenguaje de resaltado desconocido: {lenguaje} ({', '.join(sorted(LENGUAJES))})"
+        ) from None
+
+
+@functools.lru_cache(maxsize=4096)
+def tokenizar(linea, lenguaje):
+    """Divide una línea en tokens ``(tipo, texto)``; ``tipo`` es None para el texto sin resaltar"""
+
+    tokens = []
+    posicion = 0
+    esperando_comando = True
+    for token in _TOKENS[lenguaje].finditer(linea):
+        if token.start() > posicion:
+            tokens.append((None, linea[posicion:token.start()]))
+        tipo = token.lastgroup
+        texto = token.group()
+        if tipo == 'palabra':
+            tipo = 'comando' if esperando_comando else None
+            esperando_comando = False
+        elif tipo == 'operador':
+            esperando_comando = texto in _INICIO_COMANDO
+        elif tipo != 'comentario':
+            esperando_comando = False
+        tokens.append((tipo, texto))
+        posicion = token.end()
+    if posicion < len(linea):
+        tokens.append((None, linea[posicion:]))
+
+    # Los fragmentos consecutivos del mismo tipo se unen en una ejecución
+    unidos = []
+    for tipo, texto in tokens:
+        if unidos and unidos[-1][0] == tipo:
+            unidos[-1] = (tipo, unidos[-1][1] + texto)
+        else:
+            unidos.append((tipo, texto))
+    return tuple(unidos)
+
+
+@functools.lru_cache(maxsize=4096)
+def _linea_resaltada(linea, lenguaje, propiedades):
+    """Devuelve las ejecuciones XML de una línea resaltada"""
+
+    ejecuciones = []
+    for tipo, texto in tokenizar(linea, lenguaje):
+        rpr = propiedades
+        if tipo is not None:
+            rpr += f'<w:color w:val="{COLORES[tipo]}"/>'
+        rpr = f'<w:rPr>{rpr}</w:rPr>' if rpr else ''
+        ejecuciones.append(f'<w:r>{rpr}{_texto_xml(texto)}</w:r>')
+    return ''.join(ejecuciones)
+
+
+def codigo_xml(lineas, estilo_id=None, lenguaje=None, propiedades=''):
+    """Genera el XML de un bloque de código como un único párrafo.
+
+    ``lineas`` es un texto con saltos de línea o un iterable de líneas;
+    ``propiedades`` son propiedades de ejecución adicionales (``w:rPr``).
+    """
+
+    if isinstance(lineas, str):
+        lineas = lineas.split('\n')
+    lineas = [str(linea) for linea in lineas]
+    lenguaje = normalizar_lenguaje(lenguaje)
+
+    if lenguaje is None:
+        contenido = _texto_xml('\n'.join(lineas))
+        rpr = f'<w:rPr>{propiedades}</w:rPr>' if propiedades else ''
+        ejecuciones = f'<w:r>{rpr}{contenido}</w:r>' if contenido else ''
+    else:
+        ejecuciones = '<w:r><w:br/></w:r>'.join(
+            _linea_resaltada(linea, lenguaje, propiedades) for linea in lineas
+        )
+
+    ppr = f'<w:pPr><w:pStyle w:val="{estilo_id}"/></w:pPr>' if estilo_id else ''
+    return f'<w:p {nsdecls("w")}>{ppr}{ejecuciones}</w:p>'
+
+
+def agregar_codigo(doc, lineas, estilo=ESTILO_CODIGO, lenguaje=None):
+    """Agrega al final del documento un bloque de código en un solo párrafo"""
+
+    if isinstance(doc, DocumentoIR):
+        return doc.agregar_codigo(lineas, estilo=estilo, lenguaje=lenguaje)
+
+    estilo_id = resolver_estilo(doc, estilo, WD_STYLE_TYPE.PARAGRAPH) if estilo else None
+    p = parse_xml(codigo_xml(lineas, estilo_id, lenguaje))
+    doc.element.body._insert_p(p)
+    return Paragraph(p, doc._body)
@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Comparación estructural entre dos revisiones de un documento.
+
+Los bloques del cuerpo (párrafos y tablas) y las filas de las tablas se
+localizan directamente en los bytes de ``word/document.xml``, sin construir
+el árbol, y se identifican por el hash de su XML (sin los atributos que Word
+reescribe al guardar, como los ``w:rsid``). Los títulos dividen el cuerpo en
+secciones con un hash cada una: solo las secciones cuyo hash difiere se
+comparan bloque a bloque, solo las tablas que difieren fila a fila y solo
+los bloques y filas distintos se leen con lxml para mostrar su texto. Si el
+XML de ambos documentos tiene el mismo CRC en el zip, ni siquiera se
+descomprime.
+
+    python src/comparacion.py Transferencia_v1.docx Transferencia_v2.docx
+    python src/comparacion.py v1.docx v2.docx --json cambios.json
+"""
+
+import argparse
+import difflib
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+
+from lxml import etree
+
+from lector import PARTE_DOCUMENTO, leer_fila, niveles_titulo, texto_parrafo
+
+# Inicio de un bloque del cuerpo y de una fila de tabla
+_BLOQUE = re.compile(rb'<w:(p|tbl|sdt|sectPr)(?=[\s>/])')
+_FILA = re.compile(rb'<w:tr(?=[\s>/])')
+_CIERRE_FILA = re.compile(rb'</w:tr>')
+_TABLA = re.compile(rb'<w:tbl(?=[\s>/])')
+_APERTURA = re.compile(rb'<w:document\b[^>]*>')
+_CUERPO = re.compile(rb'<w:body\b[^>]*>')
+
+_ESTILO = re.compile(rb'<w:pStyle w:val="([^"]*)"')
+_TEXTO = re.compile(rb'<w:t(?:\s[^>]*)?>([^<]*)</w:t>')
+_DIBUJO = re.compile(rb'<wp:docPr\b[^>]*\bname="([^"]*)"')
+
+# Lo que Word cambia al guardar sin que cambie el contenido (atributos y
+# elementos); cada expresión empieza por un literal para buscarse rápido
+_RUIDO = (
+    ((b' w:rsid', b' w14:'), re.compile(rb' w(?::rsid\w*|14:(?:paraId|textId))="[^"]*"')),
+    ((b'<w:proofErr',), re.compile(rb'<w:proofErr\b[^>]*/>')),
+    ((b'<w:lastRenderedPageBreak',), re.compile(rb'<w:lastRenderedPageBreak/>')),
+)
+
+_etiquetas = {}
+
+
+def _etiquetas_de(nombre):
+    """Expresiones de apertura y de apertura o cierre de un elemento"""
+
+    if nombre not in _etiquetas:
+        _etiquetas[nombre] = (
+            re.compile(rb'<w:' + nombre + rb'(?=[\s>/])'),
+            re.compile(rb'<w:' + nombre + rb'(?=[\s>/])[^>]*?(/?)>|</w:' + nombre + rb'>'),
+        )
+    return _etiquetas[nombre]
+
+
+def _fin_elemento(xml, nombre, inicio):
+    """Posición tras el cierre del elemento ``nombre`` que empieza en ``inicio``"""
+
+    apertura, etiquetas = _etiquetas_de(nombre)
+    final_apertura = xml.index(b'>', inicio)
+    if xml[final_apertura - 1] == 0x2F:  # <w:p/>
+        return final_apertura + 1
+    # Caso habitual: el primer cierre es el suyo porque no hay otro igual anidado
+    cierre = xml.find(b'</w:' + nombre + b'>', final_apertura)
+    if cierre >= 0 and apertura.search(xml, final_apertura, cierre) is None:
+        return cierre + len(nombre) + 5
+
+    profundidad = 0
+    for etiqueta in etiquetas.finditer(xml, inicio):
+        if etiqueta.group().startswith(b'</'):
+            profundidad -= 1
+        elif not etiqueta.group(1):
+            profundidad += 1
+        if profundidad == 0:
+            return etiqueta.end()
+    raise ValueError(f"Elemento w:{nombre.decode()} sin cerrar en la posición {inicio}")
+
+
+class Bloque:
+    """Párrafo o tabla del cuerpo localizado por su rango de bytes"""
+
+    __slots__ = ('tipo', 'inicio', 'fin', 'hash')
+
+    def __init__(self, tipo, inicio, fin, hash):
+        self.tipo = tipo
+        self.inicio = inicio
+        self.fin = fin
+        self.hash = hash
+
+
+class Seccion:
+    """Bloques desde un título hasta el siguiente"""
+
+    def __init__(self, titulo, nivel):
+        self.titulo = titulo
+        self.nivel = nivel
+        self.bloques = []
+        self.hash = None
+
+
+class Revision:
+    """Estructura de una revisión: secciones, bloques y filas con sus hashes"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with zipfile.ZipFile(ruta) as zf:
+            info = zf.getinfo(PARTE_DOCUMENTO)
+        # CRC y tamaño del XML según el directorio del zip, sin descomprimirlo
+        self.crc = (info.CRC, info.file_size)
+        self._xml = None
+        self._niveles = None
+        self._secciones = None
+
+    @property
+    def xml(self):
+        """XML del documento (se descomprime la primera vez que se necesita)"""
+
+        if self._xml is None:
+            with zipfile.ZipFile(self.ruta) as zf:
+                xml = zf.read(PARTE_DOCUMENTO)
+                self._niveles = niveles_titulo(zf)
+            # El ruido se quita de una vez, antes de localizar los bloques
+            for marcas, ruido in _RUIDO:
+                if any(marca in xml for marca in marcas):
+                    xml = ruido.sub(b'', xml)
+            self._xml = xml
+        return self._xml
+
+    @property
+    def secciones(self):
+        if self._secciones is None:
+            self._secciones = self._dividir()
+        return self._secciones
+
+    def _nivel(self, inicio, fin):
+        """Nivel de título del párrafo en ``[inicio, fin)`` o None"""
+
+        estilo = _ESTILO.search(self.xml, inicio, fin)
+        return self._niveles.get(estilo.group(1).decode()) if estilo else None
+
+    def _texto(self, inicio, fin):
+        return html.unescape(b''.join(_TEXTO.findall(self.xml, inicio, fin)).decode('utf-8'))
+
+    def _dividir(self):
+        """Divide el cuerpo en secciones por sus títulos"""
+
+        xml = self.xml
+        posicion = _CUERPO.search(xml).end()
+        seccion = Seccion(None, None)
+        secciones = [seccion]
+        while True:
+            inicio_bloque = _BLOQUE.search(xml, posicion)
+            if inicio_bloque is None:
+                break
+            nombre = inicio_bloque.group(1)
+            inicio = inicio_bloque.start()
+            fin = _fin_elemento(xml, nombre, inicio)
+            posicion = fin
+            if nombre == b'sectPr':
+                continue
+
+            nivel = self._nivel(inicio, fin) if nombre == b'p' else None
+            if nivel:
+                seccion = Seccion(self._texto(inicio, fin).strip(), nivel)
+                secciones.append(seccion)
+            seccion.bloques.append(Bloque(nombre.decode(), inicio, fin, hashlib.sha1(xml[inicio:fin]).digest()))
+
+        for seccion in secciones:
+            seccion.hash = hashlib.sha1(b''.join(bloque.hash for bloque in seccion.bloques)).hexdigest()
+        # Los títulos repetidos se distinguen por su número de aparición
+        claves = {}
+        indexadas = {}
+        for seccion in secciones:
+            ocurrencia = claves[seccion.titulo] = claves.get(seccion.titulo, 0) + 1
+            indexadas[(seccion.titulo, ocurrencia)] = seccion
+        return indexadas
+
+    def anidadas(self, tabla):
+        """Indica si una tabla contiene otras tablas"""
+
+        return _TABLA.search(self.xml, tabla.inicio + 1, tabla.fin) is not None
+
+    def filas(self, tabla, desde=None, hasta=None):
+        """Devuelve ``[(hash, inicio, fin)]`` de las filas de una tabla entre ``desde`` y ``hasta``"""
+
+        xml = self.xml
+        desde = tabla.inicio if desde is None else desde
+        hasta = tabla.fin if hasta is None else hasta
+        if not self.anidadas(tabla):
+            # Sin tablas anidadas, cada apertura de fila se empareja con el siguiente cierre
+            limites = zip([fila.start() for fila in _FILA.finditer(xml, desde, hasta)],
+                          [cierre.end() for cierre in _CIERRE_FILA.finditer(xml, desde, hasta)])
+        else:
+            limites = []
+            fila = _FILA.search(xml, desde, hasta)
+            while fila is not None:
+                final = _fin_elemento(xml, b'tr', fila.start())
+                limites.append((fila.start(), final))
+                fila = _FILA.search(xml, final, hasta)
+        return [(hashlib.sha1(xml[inicio:fin]).digest(), inicio, fin) for inicio, fin in limites]
+
+    def elemento(self, inicio, fin):
+        """Lee con lxml el XML de ``[inicio, fin)`` (con los espacios de nombres del documento)"""
+
+        apertura = _APERTURA.search(self.xml)
+        raiz = etree.fromstring(apertura.group() + self.xml[inicio:fin] + b'</w:document>')
+        return raiz[0]
+
+    def texto_bloque(self, bloque):
+        if bloque.tipo == 'p':
+            texto = texto_parrafo(self.elemento(bloque.inicio, bloque.fin))
+            dibujo = None if texto else _DIBUJO.search(self.xml, bloque.inicio, bloque.fin)
+            # Un párrafo con solo una imagen se muestra por su nombre
+            return f"[imagen: {html.unescape(dibujo.group(1).decode('utf-8'))}]" if dibujo else texto
+        if bloque.tipo == 'tbl':
+            return [self.celdas(fila) for fila in self.filas(bloque)]
+        return self._texto(bloque.inicio, bloque.fin)
+
+    def celdas(self, fila):
+        return list(leer_fila(self.elemento(fila[1], fila[2]))[0])
+
+
+def _comparar_secuencias(antes, despues):
+    """Devuelve ``(accion, i, j)`` de los elementos que difieren entre dos listas de hashes"""
+
+    cambios = []
+    comparador = difflib.SequenceMatcher(None, antes, despues, autojunk=False)
+    for operacion, i1, i2, j1, j2 in comparador.get_opcodes():
+        if operacion == 'equal':
+            continue
+        pares = min(i2 - i1, j2 - j1) if operacion == 'replace' else 0
+        cambios.extend(('modificado', i1 + k, j1 + k) for k in range(pares))
+        cambios.extend(('eliminado', i, None) for i in range(i1 + pares, i2))
+        cambios.extend(('agregado', None, j) for j in range(j1 + pares, j2))
+    return cambios
+
+
+def _extremos_comunes(a, b, paso=1 << 16):
+    """Longitudes del prefijo y del sufijo comunes de dos bytes.
+
+    Se avanza por bloques de ``paso`` bytes (comparaciones con memcmp) y solo
+    dentro del primer bloque distinto se busca el byte exacto.
+    """
+
+    n = min(len(a), len(b))
+    prefijo = 0
+    while prefijo + paso <= n and a[prefijo:prefijo + paso] == b[prefijo:prefijo + paso]:
+        prefijo += paso
+    bajo, alto = prefijo, min(prefijo + paso, n)
+    while bajo < alto:
+        medio = (bajo + alto + 1) // 2
+        if a[prefijo:medio] == b[prefijo:medio]:
+            bajo = medio
+        else:
+            alto = medio - 1
+    prefijo = bajo
+
+    # El sufijo no puede solaparse con el prefijo
+    limite = n - prefijo
+    sufijo = 0
+    while (sufijo + paso <= limite
+           and a[len(a) - sufijo - paso:len(a) - sufijo] == b[len(b) - sufijo - paso:len(b) - sufijo]):
+        sufijo += paso
+    bajo, alto = sufijo, min(sufijo + paso, limite)
+    while bajo < alto:
+        medio = (bajo + alto + 1) // 2
+        if a[len(a) - medio:len(a) - sufijo] == b[len(b) - medio:len(b) - sufijo]:
+            bajo = medio
+        else:
+            alto = medio - 1
+    return prefijo, bajo
+
+
+def _inicio_fila(xml, inicio_tabla, posicion):
+    """Inicio de la fila que contiene ``posicion`` (o de la tabla, antes de la primera)"""
+
+    inicio = xml.rfind(b'<w:tr', inicio_tabla, posicion + 1)
+    # <w:trPr> también empieza por <w:tr
+    while inicio >= 0 and xml[inicio + 5] not in b' >/':
+        inicio = xml.rfind(b'<w:tr', inicio_tabla, inicio)
+    return inicio if inicio >= 0 else inicio_tabla
+
+
+def _fin_fila(xml, posicion, fin_tabla):
+    """Final de la fila que contiene ``posicion`` (o de la tabla, tras la última)"""
+
+    cierre = xml.find(b'</w:tr>', max(posicion - 6, 0), fin_tabla)
+    return cierre + 7 if cierre >= 0 else fin_tabla
+
+
+def _ventana_filas(antes, despues, tabla_a, tabla_b):
+    """Rangos ``(desde, hasta)`` de ambas tablas fuera de los cuales las filas son iguales"""
+
+    if antes.anidadas(tabla_a) or despues.anidadas(tabla_b):
+        return (None, None), (None, None)
+    prefijo, sufijo = _extremos_comunes(
+        antes.xml[tabla_a.inicio:tabla_a.fin], despues.xml[tabla_b.inicio:tabla_b.fin]
+    )
+    return (
+        (_inicio_fila(antes.xml, tabla_a.inicio, tabla_a.inicio + prefijo),
+         _fin_fila(antes.xml, tabla_a.fin - sufijo, tabla_a.fin)),
+        (_inicio_fila(despues.xml, tabla_b.inicio, tabla_b.inicio + prefijo),
+         _fin_fila(despues.xml, tabla_b.fin - sufijo, tabla_b.fin)),
+    )
+
+
+def _comparar_tablas(antes, despues, tabla_a, tabla_b, numero):
+    cambios = []
+    # Solo se recorren las filas entre el prefijo y el sufijo que ambas tablas comparten
+    ventana_a, ventana_b = _ventana_filas(antes, despues, tabla_a, tabla_b)
+    filas_a = antes.filas(tabla_a, *ventana_a)
+    filas_b = despues.filas(tabla_b, *ventana_b)
+    for accion, i, j in _comparar_secuencias([fila[0] for fila in filas_a], [fila[0] for fila in filas_b]):
+        cambio = {'tipo': 'fila', 'tabla': numero, 'accion': accion}
+        if i is not None:
+            cambio['antes'] = antes.celdas(filas_a[i])
+        if j is not None:
+            cambio['despues'] = despues.celdas(filas_b[j])
+        cambios.append(cambio)
+    return cambios
+
+
+def _comparar_seccion(antes, despues, seccion_a, seccion_b):
+    """Cambios de párrafos y filas entre dos versiones de una sección"""
+
+    cambios = []
+    # Las tablas se emparejan por orden y se comparan fila a fila
+    tablas_a = [bloque for bloque in seccion_a.bloques if bloque.tipo == 'tbl']
+    tablas_b = [bloque for bloque in seccion_b.bloques if bloque.tipo == 'tbl']
+    for numero, (tabla_a, tabla_b) in enumerate(zip(tablas_a, tablas_b), 1):
+        if tabla_a.hash != tabla_b.hash:
+            cambios.extend(_comparar_tablas(antes, despues, tabla_a, tabla_b, numero))
+    for numero, tabla in enumerate(tablas_a[len(tablas_b):], len(tablas_b) + 1):
+        cambios.append({'tipo': 'tabla', 'tabla': numero, 'accion': 'eliminado',
+                        'antes': antes.texto_bloque(tabla)})
+    for numero, tabla in enumerate(tablas_b[len(tablas_a):], len(tablas_a) + 1):
+        cambios.append({'tipo': 'tabla', 'tabla': numero, 'accion': 'agregado',
+                        'despues': despues.texto_bloque(tabla)})
+
+    parrafos_a = [bloque for bloque in seccion_a.bloques if bloque.tipo != 'tbl']
+    parrafos_b = [bloque for bloque in seccion_b.bloques if bloque.tipo != 'tbl']
+    for accion, i, j in _comparar_secuencias([bloque.hash for bloque in parrafos_a],
+                                             [bloque.hash for bloque in parrafos_b]):
+        cambio = {'tipo': 'parrafo', 'accion': accion}
+        if i is not None:
+            cambio['antes'] = antes.texto_bloque(parrafos_a[i])
+        if j is not None:
+            cambio['despues'] = despues.texto_bloque(parrafos_b[j])
+        # Un párrafo cuyo texto no cambió solo cambió de formato
+        if accion != 'modificado' or cambio['antes'] != cambio['despues']:
+            cambios.append(cambio)
+        else:
+            cambios.append(dict(cambio, accion='formato'))
+    return cambios
+
+
+def _nombre(clave):
+    titulo, ocurrencia = clave
+    nombre = titulo if titulo is not None else '(inicio del documento)'
+    return nombre if ocurrencia == 1 else f"{nombre} ({ocurrencia})"
+
+
+def comparar_documentos(ruta_antes, ruta_despues):
+    """Compara dos revisiones de un documento y devuelve las secciones que cambiaron"""
+
+    inicio = time.perf_counter()
+    antes = Revision(ruta_antes)
+    despues = Revision(ruta_despues)
+
+    resultado = {
+        'antes': ruta_antes,
+        'despues': ruta_despues,
+        'identicos': False,
+        'agregadas': [],
+        'eliminadas': [],
+        'modificadas': [],
+    }
+    if antes.crc == despues.crc:
+        resultado['identicos'] = True
+    else:
+        secciones_a = antes.secciones
+        secciones_b = despues.secciones
+        resultado['agregadas'] = [_nombre(clave) for clave in secciones_b if clave not in secciones_a]
+        resultado['eliminadas'] = [_nombre(clave) for clave in secciones_a if clave not in secciones_b]
+        for clave, seccion_b in secciones_b.items():
+            seccion_a = secciones_a.get(clave)
+            if seccion_a is None or seccion_a.hash == seccion_b.hash:
+                continue
+            resultado['modificadas'].append({
+                'seccion': _nombre(clave),
+                'cambios': _comparar_seccion(antes, despues, seccion_a, seccion_b),
+            })
+        resultado['identicos'] = not (resultado['agregadas'] or resultado['eliminadas']
+                                      or resultado['modificadas'])
+
+    resultado['segundos'] = round(time.perf_counter() - inicio, 4)
+    return resultado
+
+
+_SIMBOLOS = {'agregado': '+', 'eliminado': '-', 'modificado': '~', 'formato': '~'}
+
+
+def _texto_cambio(valor):
+    if isinstance(valor, list) and valor and isinstance(valor[0], list):
+        return f"tabla de {len(valor)} filas"
+    if isinstance(valor, list):
+        return ' | '.join(valor)
+    return valor.replace('\n', ' ⏎ ')
+
+
+def imprimir_resultado(resultado, salida=sys.stdout):
+    """Muestra el resultado de ``comparar_documentos`` de forma legible"""
+
+    for titulo in resultado['agregadas']:
+        print(f"➕ Sección agregada: {titulo}", file=salida)
+    for titulo in resultado['eliminadas']:
+        print(f"➖ Sección eliminada: {titulo}", file=salida)
+    for seccion in resultado['modificadas']:
+        print(f"✏️  {seccion['seccion']} ({len(seccion['cambios'])} cambios)", file=salida)
+        for cambio in seccion['cambios']:
+            simbolo = _SIMBOLOS[cambio['accion']]
+            tipo = cambio['tipo'] if 'tabla' not in cambio else f"{cambio['tipo']} (tabla {cambio['tabla']})"
+            if cambio['accion'] == 'formato':
+                print(f"   {simbolo} {tipo}, solo formato: {_texto_cambio(cambio['despues'])}", file=salida)
+                continue
+            if 'antes' in cambio:
+                print(f"   {simbolo if 'despues' not in cambio else '-'} {tipo}: "
+                      f"{_texto_cambio(cambio['antes'])}", file=salida)
+            if 'despues' in cambio:
+                print(f"   {simbolo if 'antes' not in cambio else '+'} {tipo}: "
+                      f"{_texto_cambio(cambio['despues'])}", file=salida)
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Compara la estructura de dos revisiones de un documento")
+    parser.add_argument('antes', help="Revisión anterior (.docx)")
+    parser.add_argument('despues', help="Revisión nueva (.docx)")
+    parser.add_argument('--json', default=None, metavar='RUTA',
+                        help="Escribe el resultado en JSON ('-' = salida estándar)")
+    args = parser.parse_args(argv)
+
+    resultado = comparar_documentos(args.antes, args.despues)
+    if args.json == '-':
+        json.dump(resultado, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+    else:
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as archivo:
+                json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+        imprimir_resultado(resultado)
+        if resultado['identicos']:
+            print(f"✅ Sin cambios estructurales ({resultado['segundos'] * 1000:.1f} ms)")
+        else:
+            print(f"🔀 {len(resultado['agregadas'])} secciones agregadas, "
+                  f"{len(resultado['eliminadas'])} eliminadas y {len(resultado['modificadas'])} "
+                  f"modificadas ({resultado['segundos'] * 1000:.1f} ms)")
+        if args.json:
+            print(f"📁 Resultado: {os.path.abspath(args.json)}")
+    # Como diff: 0 sin cambios, 1 con cambios
+    return 0 if resultado['identicos'] else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
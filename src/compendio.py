@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Compendio: une varios documentos generados en un único .docx.
+
+Cada documento de entrada se abre, su cuerpo se traslada al compendio y se
+libera antes de abrir el siguiente; el compendio se escribe en streaming, de
+modo que el trabajo y la memoria crecen linealmente con el tamaño total.
+
+Los estilos y las definiciones de numeración se deduplican mediante mapas
+indexados por id y por hash de su XML (los documentos generados desde la
+misma plantilla no añaden ninguno); las relaciones, imágenes, marcadores y
+dibujos se renumeran con contadores propios, sin recorrer lo ya acumulado.
+
+    python src/compendio.py documentos/*.docx -o compendio.docx
+"""
+
+import argparse
+import copy
+import hashlib
+import os
+import re
+import time
+
+from lxml import etree
+
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, nsmap, qn
+from docx.parts.image import ImagePart
+
+from plantilla import nuevo_documento
+from streaming import EscritorStreaming
+
+_W_VAL = qn('w:val')
+_W_ID = qn('w:id')
+_W_NAME = qn('w:name')
+_W_ANCHOR = qn('w:anchor')
+_W_STYLE_ID = qn('w:styleId')
+_W_ABSTRACT_NUM_ID = qn('w:abstractNumId')
+_W_NUM_ID = qn('w:numId')
+
+# Elementos cuyo w:val es un id de estilo
+_REFERENCIAS_ESTILO = {qn('w:pStyle'), qn('w:rStyle'), qn('w:tblStyle')}
+_REFERENCIAS_ESTILO_EN_ESTILOS = (qn('w:basedOn'), qn('w:next'), qn('w:link'))
+_MARCADORES = {qn('w:bookmarkStart'), qn('w:bookmarkEnd')}
+_INSTRUCCION = qn('w:instrText')
+_DOC_PR = qn('wp:docPr')
+_ATRIBUTOS_RELACION = '{%s}' % nsmap['r']
+
+_CAMPO_REFERENCIA = re.compile(r'\b(PAGEREF|REF|HYPERLINK\s+\\l)\s+"?([^\s"\\]+)"?')
+
+
+def _hash_xml(elemento, atributos=(), elementos=()):
+    """Hash del XML de un elemento sin los atributos ni los hijos indicados"""
+
+    copia = etree.fromstring(etree.tostring(elemento))
+    for atributo in atributos:
+        copia.attrib.pop(atributo, None)
+    for etiqueta in elementos:
+        for hijo in copia.findall(etiqueta):
+            copia.remove(hijo)
+    return hashlib.sha256(etree.tostring(copia, method='c14n')).hexdigest()
+
+
+def _hash_parte(elemento):
+    """Hash rápido de una parte XML completa (estilos o numeración)"""
+
+    return hashlib.sha256(etree.tostring(elemento)).hexdigest()
+
+
+def _salto_pagina():
+    return parse_xml(f'<w:p {nsdecls("w")}><w:r><w:br w:type="page"/></w:r></w:p>')
+
+
+class Compendio:
+    """Acumula el contenido de varios documentos en uno solo"""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.documentos = 0
+        self._cuerpo = doc.element.body
+        self._estilos = doc.styles.element
+        self._numeracion = doc.part.numbering_part.element
+
+        # Estilos del compendio: id -> hash; (id, hash) de otros documentos -> id asignado
+        self._hash_estilos = {
+            estilo.get(_W_STYLE_ID): _hash_xml(estilo) for estilo in self._estilos.iterchildren(qn('w:style'))
+        }
+        self._nombres_estilo = {
+            estilo.name_val for estilo in self._estilos.iterchildren(qn('w:style')) if estilo.name_val
+        }
+        self._estilos_importados = {}
+        # Partes de estilos ya vistas (hash de la parte completa) -> mapa de ids
+        self._mapas_estilos = {}
+
+        # Numeración: hash de la definición abstracta -> abstractNumId del compendio
+        self._abstractos = {}
+        for abstracto in self._numeracion.iterchildren(qn('w:abstractNum')):
+            self._abstractos[self._hash_abstracto(abstracto)] = abstracto.get(_W_ABSTRACT_NUM_ID)
+        self._siguiente_abstracto = 1 + max(map(int, self._abstractos.values()), default=-1)
+        self._siguiente_num = 1 + max((int(num.numId) for num in self._numeracion.num_lst), default=0)
+
+        # Relaciones: (tipo, destino externo) -> rId; sha1 de imagen -> parte; parte -> rId
+        relaciones = doc.part.rels
+        self._siguiente_rid = 1 + max(
+            (int(rid[3:]) for rid in relaciones if rid[3:].isdigit()), default=0
+        )
+        self._externas = {
+            (rel.reltype, rel.target_ref): rid for rid, rel in relaciones.items() if rel.is_external
+        }
+        self._imagenes = {}
+        self._rid_partes = {}
+        self._siguiente_imagen = 1
+
+        self._siguiente_marcador = 0
+        self._marcadores_usados = set()
+        self._siguiente_dibujo = 1
+
+    @staticmethod
+    def _hash_abstracto(abstracto):
+        # El id y el nsid (aleatorio) no forman parte del contenido
+        return _hash_xml(abstracto, atributos=(_W_ABSTRACT_NUM_ID,), elementos=(qn('w:nsid'),))
+
+    def _nuevo_rid(self):
+        rid = f"rId{self._siguiente_rid}"
+        self._siguiente_rid += 1
+        return rid
+
+    def _mapa_estilos(self, entrada, instancias, numeros):
+        """Importa los estilos que difieren y devuelve {id de la entrada: id en el compendio}"""
+
+        # Los documentos de la misma plantilla comparten la parte de estilos completa
+        huella_parte = _hash_parte(entrada.styles.element)
+        if huella_parte in self._mapas_estilos:
+            return self._mapas_estilos[huella_parte]
+
+        mapa = {}
+        nuevos = []
+        for estilo in entrada.styles.element.iterchildren(qn('w:style')):
+            id_estilo = estilo.get(_W_STYLE_ID)
+            huella = _hash_xml(estilo)
+            if self._hash_estilos.get(id_estilo) == huella:
+                mapa[id_estilo] = id_estilo
+                continue
+            clave = (id_estilo, huella)
+            if clave not in self._estilos_importados:
+                # Mismo id con otra definición: se importa con un id y nombre únicos
+                sufijo = 2
+                while f"{id_estilo}{sufijo}" in self._hash_estilos:
+                    sufijo += 1
+                nuevo_id = f"{id_estilo}{sufijo}"
+                copia = etree.fromstring(etree.tostring(estilo))
+                copia.set(_W_STYLE_ID, nuevo_id)
+                nombre = copia.find(qn('w:name'))
+                if nombre is not None and nombre.get(_W_VAL) in self._nombres_estilo:
+                    nombre.set(_W_VAL, f"{nombre.get(_W_VAL)} {sufijo}")
+                self._estilos_importados[clave] = nuevo_id
+                self._hash_estilos[nuevo_id] = None
+                if nombre is not None:
+                    self._nombres_estilo.add(nombre.get(_W_VAL))
+                nuevos.append(copia)
+            mapa[id_estilo] = self._estilos_importados[clave]
+
+        # Las referencias de los estilos importados (a otros estilos y a
+        # la numeración) apuntan a los ids del compendio
+        for copia in nuevos:
+            for etiqueta in _REFERENCIAS_ESTILO_EN_ESTILOS:
+                referencia = copia.find(etiqueta)
+                if referencia is not None and referencia.get(_W_VAL) in mapa:
+                    referencia.set(_W_VAL, mapa[referencia.get(_W_VAL)])
+            for referencia in copia.iter(_W_NUM_ID):
+                referencia.set(_W_VAL, self._numero(referencia.get(_W_VAL), instancias, numeros))
+            self._estilos.append(copia)
+        self._mapas_estilos[huella_parte] = mapa
+        return mapa
+
+    def _preparar_numeracion(self, entrada):
+        """Importa las definiciones abstractas que falten y devuelve las instancias de la entrada"""
+
+        try:
+            numeracion = entrada.part.part_related_by(RT.NUMBERING).element
+        except KeyError:
+            return {}
+
+        abstractos = {}
+        primer_num = next(self._numeracion.iterchildren(qn('w:num')), None)
+        for abstracto in numeracion.iterchildren(qn('w:abstractNum')):
+            huella = self._hash_abstracto(abstracto)
+            if huella not in self._abstractos:
+                copia = etree.fromstring(etree.tostring(abstracto))
+                copia.set(_W_ABSTRACT_NUM_ID, str(self._siguiente_abstracto))
+                self._abstractos[huella] = str(self._siguiente_abstracto)
+                self._siguiente_abstracto += 1
+                # Las definiciones abstractas preceden a las instancias w:num
+                if primer_num is not None:
+                    primer_num.addprevious(copia)
+                else:
+                    self._numeracion.append(copia)
+            abstractos[abstracto.get(_W_ABSTRACT_NUM_ID)] = self._abstractos[huella]
+
+        return {str(num.numId): (num, abstractos) for num in numeracion.num_lst}
+
+    def _numero(self, valor, instancias, numeros):
+        """Devuelve el numId del compendio para un numId de la entrada, creándolo en el primer uso.
+
+        Cada documento recibe sus propias instancias: sus listas numeradas
+        empiezan de nuevo en lugar de continuar las del documento anterior.
+        """
+
+        if valor not in numeros:
+            origen = instancias.get(valor)
+            if origen is None:
+                # numId 0 (sin numeración) o referencia inexistente
+                numeros[valor] = valor
+            else:
+                num, abstractos = origen
+                copia = etree.fromstring(etree.tostring(num))
+                copia.set(_W_NUM_ID, str(self._siguiente_num))
+                abstracto = copia.find(qn('w:abstractNumId'))
+                abstracto.set(_W_VAL, abstractos.get(abstracto.get(_W_VAL), abstracto.get(_W_VAL)))
+                self._numeracion.append(copia)
+                numeros[valor] = str(self._siguiente_num)
+                self._siguiente_num += 1
+        return numeros[valor]
+
+    def _relacion(self, entrada, rid):
+        """Devuelve el rId del compendio equivalente a una relación de la entrada"""
+
+        rel = entrada.part.rels[rid]
+        relaciones = self.doc.part.rels
+        if rel.is_external:
+            clave = (rel.reltype, rel.target_ref)
+            if clave not in self._externas:
+                self._externas[clave] = self._nuevo_rid()
+                relaciones.add_relationship(rel.reltype, rel.target_ref, self._externas[clave], True)
+            return self._externas[clave]
+
+        if rel.reltype != RT.IMAGE:
+            raise ValueError(f"Relación no admitida en el compendio: {rel.reltype}")
+
+        # Las imágenes idénticas se comparten
+        origen = rel.target_part
+        huella = hashlib.sha1(origen.blob).hexdigest()
+        parte = self._imagenes.get(huella)
+        if parte is None:
+            partname = PackURI(f"/word/media/compendio{self._siguiente_imagen}.{origen.partname.ext}")
+            self._siguiente_imagen += 1
+            parte = ImagePart(partname, origen.content_type, origen.blob)
+            self._imagenes[huella] = parte
+        if parte not in self._rid_partes:
+            self._rid_partes[parte] = self._nuevo_rid()
+            relaciones.add_relationship(RT.IMAGE, parte, self._rid_partes[parte])
+        return self._rid_partes[parte]
+
+    def _renumerar(self, elemento, entrada, estilos, instancias, numeros, relaciones, marcadores,
+                   nombres):
+        """Ajusta en una sola pasada las referencias de un elemento trasladado"""
+
+        for nodo in elemento.iter():
+            etiqueta = nodo.tag
+            if etiqueta in _REFERENCIAS_ESTILO:
+                valor = nodo.get(_W_VAL)
+                if estilos.get(valor, valor) != valor:
+                    nodo.set(_W_VAL, estilos[valor])
+            elif etiqueta == _W_NUM_ID:
+                nodo.set(_W_VAL, self._numero(nodo.get(_W_VAL), instancias, numeros))
+            elif etiqueta in _MARCADORES:
+                anterior = nodo.get(_W_ID)
+                if anterior not in marcadores:
+                    marcadores[anterior] = str(self._siguiente_marcador)
+                    self._siguiente_marcador += 1
+                nodo.set(_W_ID, marcadores[anterior])
+                nombre = nodo.get(_W_NAME)
+                if nombre is not None:
+                    nodo.set(_W_NAME, nombres.get(nombre, nombre))
+            elif etiqueta == _DOC_PR:
+                nodo.set('id', str(self._siguiente_dibujo))
+                self._siguiente_dibujo += 1
+            elif etiqueta == _INSTRUCCION and nombres and nodo.text:
+                nodo.text = _CAMPO_REFERENCIA.sub(
+                    lambda m: f"{m.group(1)} {nombres.get(m.group(2), m.group(2))}", nodo.text
+                )
+
+            if _W_ANCHOR in nodo.attrib and nodo.get(_W_ANCHOR) in nombres:
+                nodo.set(_W_ANCHOR, nombres[nodo.get(_W_ANCHOR)])
+            for atributo, valor in nodo.attrib.items():
+                if atributo.startswith(_ATRIBUTOS_RELACION):
+                    if valor not in relaciones:
+                        relaciones[valor] = self._relacion(entrada, valor)
+                    nodo.set(atributo, relaciones[valor])
+
+    def _nombres_marcador(self, cuerpo):
+        """Renombra los marcadores de la entrada que ya existen en el compendio"""
+
+        nombres = {}
+        for marcador in cuerpo.iter(qn('w:bookmarkStart')):
+            nombre = marcador.get(_W_NAME)
+            if nombre in self._marcadores_usados:
+                nuevo = f"{nombre}_{self.documentos + 1}"
+                nombres[nombre] = nuevo
+                nombre = nuevo
+            self._marcadores_usados.add(nombre)
+        return nombres
+
+    def agregar(self, entrada, salto_pagina=True):
+        """Traslada el cuerpo de ``entrada`` (un Document) al final del compendio"""
+
+        instancias = self._preparar_numeracion(entrada)
+        numeros = {}
+        estilos = self._mapa_estilos(entrada, instancias, numeros)
+        cuerpo = entrada.element.body
+        nombres = self._nombres_marcador(cuerpo)
+
+        sect_pr = self._cuerpo.sectPr
+        if salto_pagina and self.documentos:
+            sect_pr.addprevious(_salto_pagina())
+
+        relaciones = {}
+        marcadores = {}
+        for elemento in list(cuerpo):
+            if elemento.tag == qn('w:sectPr'):
+                continue
+            self._renumerar(
+                elemento, entrada, estilos, instancias, numeros, relaciones, marcadores, nombres
+            )
+            # Se traslada una copia, raíz de su propio árbol: mover el elemento
+            # entre documentos reconcilia los espacios de nombres nodo a nodo
+            sect_pr.addprevious(copy.deepcopy(elemento))
+        self.documentos += 1
+
+
+def crear_compendio(rutas, destino, titulo="Compendio de Transferencia Tecnológica",
+                    salto_pagina=True, compresion=None):
+    """Une los documentos de ``rutas`` en ``destino`` y devuelve un resumen"""
+
+    inicio = time.perf_counter()
+    doc = nuevo_documento()
+    doc.core_properties.title = titulo
+    doc.core_properties.author = "Departamento de Desarrollo"
+
+    compendio = Compendio(doc)
+    with EscritorStreaming(doc, destino, compresion) as escritor:
+        for ruta in rutas:
+            entrada = Document(ruta)
+            compendio.agregar(entrada, salto_pagina)
+            del entrada
+            # El contenido trasladado se escribe y se libera
+            escritor.volcar()
+
+    return {
+        'documentos': compendio.documentos,
+        'estilos_importados': len(compendio._estilos_importados),
+        'imagenes': len(compendio._imagenes),
+        'segundos': round(time.perf_counter() - inicio, 4),
+    }
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Une varios documentos .docx en un compendio")
+    parser.add_argument('documentos', nargs='+', help="Documentos a unir, en orden")
+    parser.add_argument('-o', '--salida', default='Compendio_Transferencia_Tecnologica.docx',
+                        help="Archivo .docx de salida")
+    parser.add_argument('--sin-saltos', action='store_true',
+                        help="No inserta un salto de página entre documentos")
+    parser.add_argument('--compresion', type=int, choices=range(10), metavar='0-9',
+                        help="Nivel de compresión del zip (0 = sin comprimir, 9 = máximo)")
+    args = parser.parse_args(argv)
+
+    print(f"🚀 Uniendo {len(args.documentos)} documentos...")
+    resumen = crear_compendio(
+        args.documentos, args.salida, salto_pagina=not args.sin_saltos, compresion=args.compresion
+    )
+    print(f"✅ Compendio generado: {args.salida} ({resumen['documentos']} documentos, "
+          f"{resumen['segundos']} s)")
+    print(f"📁 Ruta: {os.path.abspath(args.salida)}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
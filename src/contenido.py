@@ -0,0 +1,215 @@
+"""
+Representación intermedia (IR) ligera del contenido de un documento.
+
+``DocumentoIR`` imita la pequeña parte de la API de python-docx que usan las
+funciones ``agregar_*`` (títulos, párrafos, ejecuciones, saltos de página,
+hueco del índice y, a través de ``agregar_tabla``, ``agregar_codigo`` y
+``agregar_diagrama``, tablas, bloques de código y diagramas) y registra los
+bloques en listas de Python, sin árbol XML ni paquete zip. La misma IR se
+puede volcar después a un documento .docx real o a Markdown/HTML
+(``vista_previa.py``).
+"""
+
+
+class FuenteIR:
+    """Fuente de una ejecución (solo lo que usan las secciones)"""
+
+    def __init__(self):
+        self.name = None
+        self.size = None
+
+
+class EjecucionIR:
+    """Fragmento de texto con formato"""
+
+    def __init__(self, text=''):
+        self.text = text
+        self.bold = None
+        self.font = FuenteIR()
+
+
+class FormatoParrafoIR:
+    """Formato de párrafo (sangría izquierda)"""
+
+    def __init__(self):
+        self.left_indent = None
+
+
+class ParrafoIR:
+    """Párrafo o título registrado"""
+
+    tipo = 'parrafo'
+
+    def __init__(self, texto='', estilo=None, nivel=None):
+        self.estilo = estilo
+        self.nivel = nivel
+        self.alignment = None
+        self.paragraph_format = FormatoParrafoIR()
+        self.runs = []
+        if texto:
+            self.add_run(texto)
+
+    @property
+    def es_titulo(self):
+        return self.nivel is not None
+
+    @property
+    def text(self):
+        return ''.join(run.text for run in self.runs)
+
+    def add_run(self, text=''):
+        run = EjecucionIR(text)
+        self.runs.append(run)
+        return run
+
+
+class TablaIR:
+    """Tabla registrada por ``agregar_tabla``"""
+
+    tipo = 'tabla'
+
+    def __init__(self, filas, encabezados=None, estilo=None, anchos=None,
+                 negrita_encabezado=True, negrita_primera_columna=False):
+        self.filas = [list(fila) for fila in filas]
+        self.encabezados = list(encabezados) if encabezados is not None else None
+        self.estilo = estilo
+        self.anchos = anchos
+        self.negrita_encabezado = negrita_encabezado
+        self.negrita_primera_columna = negrita_primera_columna
+
+
+class CodigoIR:
+    """Bloque de código registrado por ``agregar_codigo``"""
+
+    tipo = 'codigo'
+
+    def __init__(self, lineas, estilo=None, lenguaje=None):
+        if isinstance(lineas, str):
+            lineas = lineas.split('\n')
+        self.lineas = [str(linea) for linea in lineas]
+        self.estilo = estilo
+        self.lenguaje = lenguaje
+
+
+class DiagramaIR:
+    """Diagrama registrado por ``agregar_diagrama``"""
+
+    tipo = 'diagrama'
+
+    def __init__(self, ruta, ancho=None):
+        self.ruta = ruta
+        self.ancho = ancho
+
+
+class IndiceIR:
+    """Hueco del índice: sus entradas son los títulos registrados después de él"""
+
+    tipo = 'indice'
+
+    def __init__(self, titulos):
+        self._titulos = titulos
+        self._inicio = len(titulos)
+
+    def entradas(self, niveles):
+        """Títulos de nivel 1 a ``niveles`` posteriores al hueco"""
+
+        return [titulo for titulo in self._titulos[self._inicio:] if 1 <= titulo.nivel <= niveles]
+
+
+class SaltoPaginaIR:
+    """Salto de página"""
+
+    tipo = 'salto_pagina'
+
+
+class DocumentoIR:
+    """Documento que registra los bloques en lugar de construir XML"""
+
+    def __init__(self):
+        self.bloques = []
+        self.secciones = []
+        self.titulos = []
+
+    def iniciar_seccion(self, nombre):
+        """Marca el inicio de una sección (para la navegación de la vista previa)"""
+
+        self.secciones.append((nombre, len(self.bloques)))
+
+    def add_heading(self, text='', level=1):
+        parrafo = ParrafoIR(text, 'Title' if level == 0 else f'Heading {level}', nivel=level)
+        self.bloques.append(parrafo)
+        self.titulos.append(parrafo)
+        return parrafo
+
+    def add_paragraph(self, text='', style=None):
+        parrafo = ParrafoIR(text, style)
+        self.bloques.append(parrafo)
+        return parrafo
+
+    def reservar_indice(self):
+        indice = IndiceIR(self.titulos)
+        self.bloques.append(indice)
+        return indice
+
+    def add_page_break(self):
+        self.bloques.append(SaltoPaginaIR())
+
+    def agregar_tabla(self, filas, **opciones):
+        tabla = TablaIR(filas, **opciones)
+        self.bloques.append(tabla)
+        return tabla
+
+    def agregar_codigo(self, lineas, **opciones):
+        codigo = CodigoIR(lineas, **opciones)
+        self.bloques.append(codigo)
+        return codigo
+
+    def agregar_diagrama(self, ruta, **opciones):
+        diagrama = DiagramaIR(ruta, **opciones)
+        self.bloques.append(diagrama)
+        return diagrama
+
+
+def reproducir_en_docx(ir, doc):
+    """Vuelca los bloques de la IR sobre un documento de python-docx"""
+
+    from codigo import agregar_codigo
+    from diagramas import agregar_diagrama
+    from estilos import agregar_parrafo, agregar_titulo
+    from indice import emitir_indice, reservar_indice
+    from tablas import agregar_tabla
+
+    for bloque in ir.bloques:
+        if bloque.tipo == 'salto_pagina':
+            doc.add_page_break()
+        elif bloque.tipo == 'indice':
+            reservar_indice(doc)
+        elif bloque.tipo == 'codigo':
+            agregar_codigo(doc, bloque.lineas, estilo=bloque.estilo, lenguaje=bloque.lenguaje)
+        elif bloque.tipo == 'diagrama':
+            agregar_diagrama(doc, bloque.ruta, ancho=bloque.ancho)
+        elif bloque.tipo == 'tabla':
+            agregar_tabla(
+                doc, bloque.filas, encabezados=bloque.encabezados, estilo=bloque.estilo,
+                anchos=bloque.anchos, negrita_encabezado=bloque.negrita_encabezado,
+                negrita_primera_columna=bloque.negrita_primera_columna,
+            )
+        else:
+            if bloque.es_titulo:
+                parrafo = agregar_titulo(doc, '', bloque.nivel)
+            else:
+                parrafo = agregar_parrafo(doc, estilo=bloque.estilo)
+            if bloque.alignment is not None:
+                parrafo.alignment = bloque.alignment
+            if bloque.paragraph_format.left_indent is not None:
+                parrafo.paragraph_format.left_indent = bloque.paragraph_format.left_indent
+            for ejecucion in bloque.runs:
+                run = parrafo.add_run(ejecucion.text)
+                if ejecucion.bold is not None:
+                    run.bold = ejecucion.bold
+                if ejecucion.font.name is not None:
+                    run.font.name = ejecucion.font.name
+                if ejecucion.font.size is not None:
+                    run.font.size = ejecucion.font.size
+    emitir_indice(doc)
+    return doc
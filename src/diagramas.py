@@ -0,0 +1,301 @@
+"""
+Diagramas (PNG, JPEG o SVG) incrustados en el documento.
+
+Cada imagen se identifica por el hash de su contenido: dentro de un paquete
+se guarda una sola vez aunque aparezca en varias secciones, y la versión
+reducida al ancho de página se prepara una sola vez por proceso (y, con
+``GENERAR_WORD_CACHE``, una sola vez en disco). Un lote que incrusta los
+mismos diagramas en cientos de documentos no vuelve a decodificar ni a
+recomprimir las imágenes, y los .docx no arrastran el original a tamaño
+completo.
+
+La reducción necesita Pillow y la conversión de SVG a PNG (la vista
+alternativa que Word exige junto al SVG) cairosvg; ambos son opcionales:
+sin Pillow se incrusta el original y, sin cairosvg, se usa el PNG con el
+mismo nombre que el SVG.
+"""
+
+import hashlib
+import html
+import io
+import math
+import os
+import weakref
+from collections import OrderedDict
+
+from docx.image.image import Image
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.parts.image import ImagePart
+from docx.shared import Emu
+from docx.text.paragraph import Paragraph
+
+from contenido import DocumentoIR
+from plantilla import VARIABLE_CACHE
+
+try:
+    from PIL import Image as ImagenPillow
+except ImportError:  # Pillow es opcional: solo se necesita para reducir las imágenes
+    ImagenPillow = None
+
+try:
+    import cairosvg
+except ImportError:  # cairosvg es opcional: sin él, el SVG necesita un PNG al lado
+    cairosvg = None
+
+# Resolución con la que se conservan las imágenes al ancho con el que se muestran
+PPP_OBJETIVO = 150
+
+# Extensión de Office para la vista SVG de una imagen
+_URI_SVG = '{96DAC541-7B7A-43D3-8B79-37D633B846F1}'
+_ESPACIO_SVG = 'http://schemas.microsoft.com/office/drawing/2016/SVG/main'
+
+# Huella por (ruta, fecha de modificación, tamaño) e imagen preparada por
+# (huella, ancho): se leen y preparan una sola vez por proceso. Son cachés LRU
+# acotadas para que un servidor de larga duración no crezca sin límite
+MAXIMO_HUELLAS = 1024
+MAXIMO_PREPARADAS = 128
+_huellas = OrderedDict()
+_preparadas = OrderedDict()
+
+# Último id de forma asignado en cada documento
+_ultimos_ids = weakref.WeakKeyDictionary()
+
+
+def _consultar(cache, clave):
+    valor = cache.get(clave)
+    if valor is not None:
+        cache.move_to_end(clave)
+    return valor
+
+
+def _recordar(cache, capacidad, clave, valor):
+    cache[clave] = valor
+    cache.move_to_end(clave)
+    while len(cache) > capacidad:
+        cache.popitem(last=False)
+    return valor
+
+
+def _es_svg(ruta):
+    return ruta.lower().endswith('.svg')
+
+
+def _png_alternativo(ruta):
+    """PNG junto al SVG (``diagrama.svg`` → ``diagrama.png``) o None"""
+
+    alternativo = os.path.splitext(ruta)[0] + '.png'
+    return alternativo if os.path.exists(alternativo) else None
+
+
+def huella_diagrama(ruta):
+    """Devuelve el hash del contenido de un diagrama (leyendo el archivo solo si cambió)"""
+
+    estado = os.stat(ruta)
+    clave = (os.path.abspath(ruta), estado.st_mtime_ns, estado.st_size)
+    huella = _consultar(_huellas, clave)
+    if huella is None:
+        h = hashlib.sha256()
+        with open(ruta, 'rb') as archivo:
+            h.update(archivo.read())
+        # El PNG alternativo de un SVG forma parte del diagrama
+        alternativo = _png_alternativo(ruta) if _es_svg(ruta) and cairosvg is None else None
+        if alternativo:
+            with open(alternativo, 'rb') as archivo:
+                h.update(archivo.read())
+        huella = _recordar(_huellas, MAXIMO_HUELLAS, clave, h.hexdigest())
+    return huella
+
+
+def rutas_diagramas(datos):
+    """Devuelve las rutas de los diagramas configurados en los datos de un sistema"""
+
+    rutas = []
+    if datos.get('diagrama_arquitectura'):
+        rutas.append(datos['diagrama_arquitectura'])
+    rutas.extend((datos.get('diagramas_servicios') or {}).values())
+    return rutas
+
+
+def huellas_diagramas(datos):
+    """Devuelve ``{ruta: hash}`` de los diagramas de un sistema (None si no hay)"""
+
+    rutas = rutas_diagramas(datos)
+    if not rutas:
+        return None
+    return {ruta: huella_diagrama(ruta) for ruta in rutas}
+
+
+def _reducir(contenido, ancho_px):
+    """Reduce una imagen a ``ancho_px`` píxeles de ancho (PNG, o JPEG si ya lo era)"""
+
+    with ImagenPillow.open(io.BytesIO(contenido)) as imagen:
+        formato = 'JPEG' if imagen.format == 'JPEG' else 'PNG'
+        if imagen.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            # Las paletas no admiten el remuestreo de calidad
+            imagen = imagen.convert('RGBA')
+        alto_px = max(1, round(imagen.height * ancho_px / imagen.width))
+        reducida = imagen.resize((ancho_px, alto_px), ImagenPillow.LANCZOS)
+        # Se conserva la resolución con la que se muestra para que Word no la reescale
+        salida = io.BytesIO()
+        if formato == 'JPEG':
+            reducida.save(salida, 'JPEG', quality=90, dpi=(PPP_OBJETIVO, PPP_OBJETIVO))
+        else:
+            reducida.save(salida, 'PNG', optimize=True, dpi=(PPP_OBJETIVO, PPP_OBJETIVO))
+    return salida.getvalue()
+
+
+def _rasterizar_svg(ruta, svg, ancho_px):
+    """Devuelve el PNG que acompaña a un SVG"""
+
+    if cairosvg is not None:
+        return cairosvg.svg2png(bytestring=svg, output_width=ancho_px, dpi=PPP_OBJETIVO)
+    alternativo = _png_alternativo(ruta)
+    if alternativo is None:
+        raise RuntimeError(
+            f"Los diagramas SVG necesitan cairosvg (pip install cairosvg) o un PNG junto al SVG: {ruta}"
+        )
+    with open(alternativo, 'rb') as archivo:
+        return archivo.read()
+
+
+def _ruta_cache(directorio, huella, ancho_px):
+    # El formato se reconoce por el contenido, no por la extensión
+    return os.path.join(directorio, f"{huella[:16]}_{ancho_px}.imagen")
+
+
+def _leer_cache(directorio, huella, ancho_px):
+    """Busca en disco la versión reducida de una imagen"""
+
+    ruta = _ruta_cache(directorio, huella, ancho_px)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, 'rb') as archivo:
+        return archivo.read()
+
+
+def _guardar_cache(directorio, huella, ancho_px, contenido):
+    os.makedirs(directorio, exist_ok=True)
+    ruta = _ruta_cache(directorio, huella, ancho_px)
+    # Escritura atómica para procesos concurrentes
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, ruta)
+
+
+def preparar_diagrama(ruta, ancho_maximo, ancho=None, directorio_cache=None):
+    """Devuelve ``(imagen, svg, cx, cy)`` de un diagrama listo para incrustar.
+
+    ``imagen`` es la imagen de mapa de bits (reducida a ``PPP_OBJETIVO`` al
+    ancho con el que se muestra), ``svg`` el contenido SVG o None y
+    ``cx``/``cy`` el tamaño mostrado en EMU: ``ancho`` o, si no se indica, el
+    ancho natural sin superar ``ancho_maximo``.
+    """
+
+    huella = huella_diagrama(ruta)
+    clave = (huella, ancho, ancho_maximo)
+    preparada = _consultar(_preparadas, clave)
+    if preparada is not None:
+        return preparada
+
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+    svg = None
+    if _es_svg(ruta):
+        svg = contenido
+        ancho = ancho or ancho_maximo
+        contenido = _rasterizar_svg(ruta, svg, math.ceil(Emu(ancho).inches * PPP_OBJETIVO))
+
+    imagen = Image.from_blob(contenido)
+    cx, cy = imagen.scaled_dimensions(ancho or min(imagen.width, ancho_maximo), None)
+
+    ancho_px = math.ceil(Emu(cx).inches * PPP_OBJETIVO)
+    if ImagenPillow is not None and imagen.px_width > ancho_px:
+        directorio_cache = directorio_cache or os.environ.get(VARIABLE_CACHE)
+        directorio = os.path.join(directorio_cache, 'diagramas') if directorio_cache else None
+        reducida = _leer_cache(directorio, huella, ancho_px) if directorio else None
+        if reducida is None:
+            reducida = _reducir(contenido, ancho_px)
+            if len(reducida) >= len(contenido):
+                # Los dibujos de líneas pueden ocupar más tras el remuestreo: se queda el original
+                reducida = contenido
+            if directorio:
+                _guardar_cache(directorio, huella, ancho_px, reducida)
+        imagen = Image.from_blob(reducida)
+
+    return _recordar(_preparadas, MAXIMO_PREPARADAS, clave, (imagen, svg, cx, cy))
+
+
+def _relacionar_imagen(doc, imagen):
+    """Devuelve el rId de la imagen en el documento, agregándola al paquete una sola vez"""
+
+    partes = doc.part.package.image_parts
+    parte = partes._get_by_sha1(imagen.sha1) or partes._add_image_part(imagen)
+    return doc.part.relate_to(parte, RT.IMAGE)
+
+
+def _relacionar_svg(doc, svg):
+    """Devuelve el rId de la vista SVG, agregándola al paquete una sola vez"""
+
+    partes = doc.part.package.image_parts
+    parte = partes._get_by_sha1(hashlib.sha1(svg).hexdigest())
+    if parte is None:
+        parte = ImagePart(partes._next_image_partname('svg'), 'image/svg+xml', svg)
+        partes.append(parte)
+    return doc.part.relate_to(parte, RT.IMAGE)
+
+
+def _siguiente_id(doc):
+    """Id de forma único en el documento, también entre fragmentos aún no insertados"""
+
+    parte = doc.part
+    siguiente = max(parte.next_id, _ultimos_ids.get(parte, 0) + 1)
+    _ultimos_ids[parte] = siguiente
+    return siguiente
+
+
+def diagrama_xml(doc, ruta, ancho=None, directorio_cache=None):
+    """Genera el XML de un párrafo centrado con el diagrama.
+
+    Las partes de imagen se agregan (o reutilizan) en el paquete de ``doc``,
+    así que el XML solo es válido dentro de ese documento.
+    """
+
+    imagen, svg, cx, cy = preparar_diagrama(ruta, doc._block_width, ancho, directorio_cache)
+    rid = _relacionar_imagen(doc, imagen)
+    extension = ''
+    if svg is not None:
+        extension = (
+            f'<a:extLst><a:ext uri="{_URI_SVG}">'
+            f'<asvg:svgBlip xmlns:asvg="{_ESPACIO_SVG}" r:embed="{_relacionar_svg(doc, svg)}"/>'
+            '</a:ext></a:extLst>'
+        )
+    identificador = _siguiente_id(doc)
+    nombre = html.escape(os.path.basename(ruta))
+
+    return (
+        f'<w:p {nsdecls("w", "wp", "a", "pic", "r")}><w:pPr><w:jc w:val="center"/></w:pPr>'
+        '<w:r><w:drawing><wp:inline distT="0" distB="0" distL="0" distR="0">'
+        f'<wp:extent cx="{cx}" cy="{cy}"/><wp:docPr id="{identificador}" name="{nombre}"/>'
+        '<wp:cNvGraphicFramePr><a:graphicFrameLocks noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+        '<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+        f'<pic:pic><pic:nvPicPr><pic:cNvPr id="0" name="{nombre}"/><pic:cNvPicPr/></pic:nvPicPr>'
+        f'<pic:blipFill><a:blip r:embed="{rid}">{extension}</a:blip>'
+        '<a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+        f'<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+        '<a:prstGeom prst="rect"/></pic:spPr></pic:pic>'
+        '</a:graphicData></a:graphic></wp:inline></w:drawing></w:r></w:p>'
+    )
+
+
+def agregar_diagrama(doc, ruta, ancho=None):
+    """Agrega al final del documento un diagrama centrado"""
+
+    if isinstance(doc, DocumentoIR):
+        return doc.agregar_diagrama(ruta, ancho=ancho)
+
+    p = parse_xml(diagrama_xml(doc, ruta, ancho))
+    doc.element.body._insert_p(p)
+    return Paragraph(p, doc._body)
@@ -0,0 +1,94 @@
+"""
+Especificación declarativa del contenido del documento.
+
+``especificacion_transferencia.json`` es la única copia del contenido de las
+secciones (títulos, textos, tablas fijas, bloques de código): las funciones
+``agregar_*`` de ``generate_word.py`` lo interpretan con la API de python-docx
+y ``plan.py`` lo compila a un plan de renderizado. Los textos pueden
+referenciar campos de los datos del sistema (``{sistema}``, ``{fecha}``...).
+"""
+
+import functools
+import json
+import os
+import string
+
+try:
+    import yaml
+except ImportError:  # PyYAML es opcional: solo se necesita para especificaciones .yaml
+    yaml = None
+
+ESPECIFICACION_POR_DEFECTO = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'especificacion_transferencia.json'
+)
+
+
+def cargar_especificacion(ruta=None):
+    """Lee una especificación JSON o YAML"""
+
+    ruta = ruta or ESPECIFICACION_POR_DEFECTO
+    with open(ruta, encoding='utf-8') as archivo:
+        if ruta.lower().endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise RuntimeError("Las especificaciones YAML requieren PyYAML (pip install pyyaml)")
+            return yaml.safe_load(archivo)
+        return json.load(archivo)
+
+
+@functools.lru_cache(maxsize=None)
+def _secciones_por_defecto():
+    return {seccion['nombre']: seccion for seccion in cargar_especificacion()['secciones']}
+
+
+def seccion_por_defecto(nombre):
+    """Devuelve una sección de la especificación incluida (la de generate_word)"""
+
+    return _secciones_por_defecto()[nombre]
+
+
+def campos_texto(texto):
+    """Devuelve los campos ``{campo}`` referenciados en un texto"""
+
+    return {campo for _, campo, _, _ in string.Formatter().parse(texto) if campo is not None}
+
+
+def _textos_bloque(bloque):
+    """Devuelve los textos de un bloque que pueden contener campos"""
+
+    textos = []
+    if 'texto' in bloque:
+        textos.append(bloque['texto'])
+    textos.extend(parte.get('texto', '') for parte in bloque.get('partes', []))
+    for fila in bloque.get('filas', []):
+        textos.extend(str(valor) for valor in fila)
+    return textos
+
+
+def referencias_bloque(bloque):
+    """Devuelve los campos de datos de los que depende un bloque"""
+
+    referencias = set()
+    for texto in _textos_bloque(bloque):
+        referencias |= campos_texto(texto)
+    for clave in ('datos', 'si', 'sin'):
+        if clave in bloque:
+            referencias.add(bloque[clave])
+    return referencias
+
+
+def valores_campos(datos, campos):
+    """Formatea como texto los campos que usa la especificación"""
+
+    valores = {}
+    for campo in campos:
+        valor = datos.get(campo)
+        if campo == 'fecha':
+            valor = valor.strftime('%d/%m/%Y')
+        valores[campo] = '' if valor is None else str(valor)
+    return valores
+
+
+def formatear(texto, valores):
+    """Sustituye los campos de un texto; los textos sin campos se devuelven tal cual"""
+
+    return texto.format_map(valores) if campos_texto(texto) else texto
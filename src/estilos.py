@@ -0,0 +1,125 @@
+"""
+Registro de estilos por documento.
+
+python-docx resuelve cada ``style='...'`` recorriendo la parte de estilos
+(por nombre, por id y otra vez para el estilo por defecto). El registro la
+recorre una sola vez por documento y memoriza nombre, alias de interfaz
+(``'Heading 1'``, ``'List Bullet'``) e id (``'LightShading-Accent1'``) de cada
+estilo, de modo que las secciones con muchos párrafos no repiten la búsqueda
+en cada línea. Un nombre desconocido falla en el primer uso con el mismo
+error que python-docx y no se vuelve a buscar.
+"""
+
+import weakref
+
+from docx.enum.style import WD_STYLE_TYPE
+from docx.styles import BabelFish
+
+from contenido import DocumentoIR
+from indice import registrar_titulo
+
+_registros = weakref.WeakKeyDictionary()
+
+
+class RegistroEstilos:
+    """Índice de los estilos de un documento: nombre o id → (id, tipo)"""
+
+    def __init__(self, estilos):
+        self._estilos = estilos
+        self._desconocidos = set()
+        self._indexar()
+
+    def _indexar(self):
+        """Recorre la parte de estilos una vez"""
+
+        self._por_nombre = {}
+        self._por_id = {}
+        self._por_defecto = {}
+        for estilo in self._estilos.style_lst:
+            entrada = (estilo.styleId, estilo.type)
+            # Como en python-docx, ante nombres repetidos gana el primero
+            if estilo.name_val is not None:
+                self._por_nombre.setdefault(estilo.name_val, entrada)
+            self._por_id.setdefault(estilo.styleId, entrada)
+            if estilo.default:
+                # El estilo por defecto de cada tipo es el último marcado (como en python-docx)
+                self._por_defecto[estilo.type] = estilo.styleId
+
+    def _buscar(self, estilo):
+        return (self._por_nombre.get(BabelFish.ui2internal(estilo))
+                or self._por_id.get(estilo))
+
+    def resolver(self, estilo, tipo=None):
+        """Devuelve el id del estilo con ese nombre, alias o id.
+
+        Lanza KeyError si no existe y ValueError si no es del ``tipo`` pedido.
+        """
+
+        if estilo in self._desconocidos:
+            raise KeyError(f"no style with name '{estilo}'")
+        entrada = self._buscar(estilo)
+        if entrada is None:
+            # Puede haberse agregado un estilo después de indexar: se reindexa una vez
+            self._indexar()
+            entrada = self._buscar(estilo)
+            if entrada is None:
+                self._desconocidos.add(estilo)
+                raise KeyError(f"no style with name '{estilo}'")
+        estilo_id, tipo_estilo = entrada
+        if tipo is not None and tipo_estilo != tipo:
+            raise ValueError(f"assigned style is type {tipo_estilo}, need type {tipo}")
+        return estilo_id
+
+    def resolver_parrafo(self, estilo):
+        """Id de un estilo de párrafo, o None si es el estilo por defecto (como python-docx)"""
+
+        if estilo is None:
+            return None
+        estilo_id = self.resolver(estilo, WD_STYLE_TYPE.PARAGRAPH)
+        if estilo_id == self._por_defecto.get(WD_STYLE_TYPE.PARAGRAPH):
+            return None
+        return estilo_id
+
+
+def registro_estilos(doc):
+    """Devuelve el registro de estilos del documento, creándolo en el primer uso"""
+
+    parte = doc.part
+    registro = _registros.get(parte)
+    if registro is None:
+        registro = _registros[parte] = RegistroEstilos(doc.styles.element)
+    return registro
+
+
+def resolver_estilo(doc, estilo, tipo=None):
+    """Devuelve el id de un estilo del documento a partir de su nombre, alias o id"""
+
+    return registro_estilos(doc).resolver(estilo, tipo)
+
+
+def agregar_parrafo(doc, texto='', estilo=None):
+    """Equivale a ``doc.add_paragraph(texto, style=estilo)`` con el estilo memorizado"""
+
+    if isinstance(doc, DocumentoIR):
+        return doc.add_paragraph(texto, estilo)
+    # El estilo se resuelve antes de agregar nada: un nombre erróneo no deja párrafos sueltos
+    estilo_id = registro_estilos(doc).resolver_parrafo(estilo)
+    parrafo = doc.add_paragraph(texto)
+    if estilo_id is not None:
+        parrafo._p.style = estilo_id
+    return parrafo
+
+
+def agregar_titulo(doc, texto='', nivel=1):
+    """Equivale a ``doc.add_heading(texto, nivel)`` con el estilo memorizado.
+
+    El título queda registrado en el índice de títulos del documento (``indice.py``).
+    """
+
+    if isinstance(doc, DocumentoIR):
+        return doc.add_heading(texto, nivel)
+    if not 0 <= nivel <= 9:
+        raise ValueError(f"level must be in range 0-9, got {nivel}")
+    parrafo = agregar_parrafo(doc, texto, 'Title' if nivel == 0 else f'Heading {nivel}')
+    registrar_titulo(doc, parrafo, nivel, texto)
+    return parrafo
@@ -0,0 +1,193 @@
+"""
+Caché de fragmentos XML de secciones.
+
+Cada sección se identifica por su función (con su especificación, si el
+contenido está en ``especificacion_transferencia.json``) y por el hash de los
+datos de los que depende. El XML que produce se guarda serializado (en memoria con
+expulsión LRU y, opcionalmente, en disco); en un acierto se inserta
+directamente en el cuerpo en lugar de volver a ejecutar la sección.
+"""
+
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import os
+from collections import OrderedDict
+from datetime import date, datetime
+
+from lxml import etree
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsmap, qn
+
+from indice import registrar_insertados
+
+# Incrementar si cambian los auxiliares que usan las secciones (tablas, estilos...)
+VERSION_FRAGMENTOS = 1
+
+_ATRIBUTOS_RELACION = '{%s}' % nsmap['r']
+
+
+def _valor_canonico(valor):
+    """Convierte valores no JSON a una forma estable para el hash"""
+
+    # Las secciones solo muestran la fecha, no la hora
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f"Valor no admitido en la clave de caché: {type(valor).__name__}")
+
+
+@functools.lru_cache(maxsize=None)
+def _huella_funcion(seccion):
+    """Devuelve el hash del código fuente de una sección y de su especificación, si la tiene"""
+
+    try:
+        fuente = inspect.getsource(seccion)
+    except (OSError, TypeError):
+        fuente = seccion.__qualname__
+    especificacion = getattr(seccion, 'especificacion', None)
+    if especificacion is not None:
+        fuente += json.dumps(especificacion, sort_keys=True)
+    return hashlib.sha256(fuente.encode('utf-8')).hexdigest()
+
+
+def clave_seccion(seccion, datos, entradas):
+    """Devuelve la clave de caché de una sección o None si no es cacheable"""
+
+    if entradas is None:
+        return None
+    try:
+        contenido = json.dumps(
+            [VERSION_FRAGMENTOS, {clave: datos.get(clave) for clave in entradas}],
+            sort_keys=True,
+            default=_valor_canonico,
+        )
+    except TypeError:
+        # Entradas no serializables (p. ej. iteradores): no se almacenan
+        return None
+
+    h = hashlib.sha256()
+    # Sin el módulo: la misma sección puede ejecutarse como __main__ o importada
+    h.update(seccion.__qualname__.encode('utf-8'))
+    h.update(_huella_funcion(seccion).encode('ascii'))
+    h.update(contenido.encode('utf-8'))
+    return h.hexdigest()
+
+
+class CacheFragmentos:
+    """Caché LRU de fragmentos XML con persistencia opcional en disco"""
+
+    def __init__(self, capacidad=256, directorio=None):
+        self.capacidad = capacidad
+        self.directorio = directorio
+        self.aciertos = 0
+        self.fallos = 0
+        self._memoria = OrderedDict()
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.xml")
+
+    def obtener(self, clave):
+        """Devuelve el fragmento asociado a la clave o None"""
+
+        fragmento = self._memoria.get(clave)
+        if fragmento is not None:
+            self._memoria.move_to_end(clave)
+            self.aciertos += 1
+            return fragmento
+
+        if self.directorio and os.path.exists(self._ruta(clave)):
+            with open(self._ruta(clave), 'rb') as archivo:
+                fragmento = archivo.read()
+            self._recordar(clave, fragmento)
+            self.aciertos += 1
+            return fragmento
+
+        self.fallos += 1
+        return None
+
+    def guardar(self, clave, fragmento):
+        """Almacena un fragmento en memoria y, si procede, en disco"""
+
+        self._recordar(clave, fragmento)
+        if self.directorio:
+            # Escritura atómica para procesos concurrentes
+            temporal = f"{self._ruta(clave)}.{os.getpid()}.tmp"
+            with open(temporal, 'wb') as archivo:
+                archivo.write(fragmento)
+            os.replace(temporal, self._ruta(clave))
+
+    def _recordar(self, clave, fragmento):
+        self._memoria[clave] = fragmento
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.capacidad:
+            self._memoria.popitem(last=False)
+
+
+def total_contenido(cuerpo):
+    """Devuelve el número de hijos del cuerpo sin contar el w:sectPr final"""
+
+    return len(cuerpo) - (0 if cuerpo.sectPr is None else 1)
+
+
+def serializar_fragmento(elementos, espacios_nombres):
+    """Serializa una lista de elementos del cuerpo como un único fragmento"""
+
+    # Un contenedor común evita repetir las declaraciones de espacios de nombres
+    contenedor = etree.Element(qn('w:body'), nsmap=espacios_nombres)
+    contenedor.extend(copy.deepcopy(elemento) for elemento in elementos)
+    return etree.tostring(contenedor, encoding='UTF-8')
+
+
+def insertar_fragmento(doc, fragmento):
+    """Inserta los elementos de un fragmento al final del cuerpo"""
+
+    cuerpo = doc.element.body
+    sect_pr = cuerpo.sectPr
+    for elemento in list(parse_xml(fragmento)):
+        # La copia es raíz de su propio árbol y declara sus espacios de nombres:
+        # trasladarla al cuerpo no obliga a reconciliarlos nodo a nodo
+        elemento = copy.deepcopy(elemento)
+        if sect_pr is not None:
+            sect_pr.addprevious(elemento)
+        else:
+            cuerpo.append(elemento)
+
+
+def _usa_relaciones(elementos):
+    """Indica si algún elemento referencia relaciones del paquete (imágenes, enlaces)"""
+
+    for elemento in elementos:
+        for nodo in elemento.iter():
+            if any(atributo.startswith(_ATRIBUTOS_RELACION) for atributo in nodo.attrib):
+                return True
+    return False
+
+
+def renderizar_seccion(doc, seccion, datos, clave, cache):
+    """Ejecuta una sección (o inserta su fragmento en caché) y devuelve
+    el número de elementos que agregó al cuerpo"""
+
+    cuerpo = doc.element.body
+    inicio = total_contenido(cuerpo)
+
+    fragmento = cache.obtener(clave) if cache is not None and clave is not None else None
+    if fragmento is not None:
+        insertar_fragmento(doc, fragmento)
+        # Sus títulos no pasan por agregar_titulo: se registran desde lo insertado
+        registrar_insertados(doc, cuerpo[inicio:total_contenido(cuerpo)])
+        return total_contenido(cuerpo) - inicio
+
+    seccion(doc, datos)
+    nuevos = cuerpo[inicio:total_contenido(cuerpo)]
+
+    # Las referencias a relaciones solo son válidas dentro de su propio paquete
+    if cache is not None and clave is not None and not _usa_relaciones(nuevos):
+        cache.guardar(clave, serializar_fragmento(nuevos, doc.element.nsmap))
+    return len(nuevos)
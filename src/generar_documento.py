@@ -71,5 +71,11 @@ def crear_documento_ejemplo():
     print(f'✓ Documento creado exitosamente: {nombre_archivo}')
 
 
-if __name__ == '__main__':
+def main(argv=None):
+    """Punto de entrada de línea de comandos."""
     crear_documento_ejemplo()
+    return 0
+
+
+if __name__ == '__main__':
+    main()
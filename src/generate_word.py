@@ -3,278 +3,55 @@ Generador de Documento de Transferencia Tecnológica
 para Sistemas con Microservicios .NET 8 + Podman
 """
 
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
+from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.table import WD_TABLE_ALIGNMENT
-from docx.enum.style import WD_STYLE_TYPE
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
-from datetime import datetime
+from datetime import datetime, time
+import argparse
+import json
 import os
+import sys
 
-def crear_documento_transferencia():
-    """Crea el documento completo de transferencia tecnológica"""
-    
-    # Crear documento
-    doc = Document()
-    
-    # Configurar propiedades del documento
-    doc.core_properties.title = "Documento de Transferencia Tecnológica"
-    doc.core_properties.author = "Departamento de Desarrollo"
-    doc.core_properties.subject = "Transferencia Sistema Web Microservicios"
-    
-    # Configurar estilos personalizados
-    configurar_estilos(doc)
-    
-    # Agregar contenido
-    agregar_portada(doc)
-    agregar_indice(doc)
-    agregar_resumen_ejecutivo(doc)
-    agregar_arquitectura(doc)
-    agregar_infraestructura(doc)
-    agregar_despliegue(doc)
-    agregar_configuracion(doc)
-    agregar_monitoreo(doc)
-    agregar_backup(doc)
-    agregar_seguridad(doc)
-    agregar_incidentes(doc)
-    agregar_mejoras(doc)
-    agregar_anexos(doc)
-    agregar_firmas(doc)
-    
-    # Guardar documento
-    nombre_archivo = f"Transferencia_Tecnologica_{datetime.now().strftime('%Y%m%d')}.docx"
-    doc.save(nombre_archivo)
-    print(f"✅ Documento generado: {nombre_archivo}")
-    print(f"📁 Ruta: {os.path.abspath(nombre_archivo)}")
-    
-    return nombre_archivo
+from codigo import ESTILO_CODIGO, agregar_codigo
+from contenido import DocumentoIR
+from diagramas import agregar_diagrama, huellas_diagramas
+from especificacion import formatear, referencias_bloque, seccion_por_defecto, valores_campos
+from estilos import agregar_parrafo, agregar_titulo
+from fragmentos import clave_seccion, renderizar_seccion
+from huellas import guardar_huellas
+from indice import emitir_indice, entradas_previstas, marcar_previstos, reservar_indice
+from inventario import aplicar_inventario
+from instrumentacion import INFORME_POR_DEFECTO, activar_perfilador, obtener_perfilador
+from plantilla import nuevo_documento
+from reproducible import activar_reproducible, ahora
+from resultados import CacheResultados, clave_resultado, generar_con_cache
+from salida import guardar_documento
+from streaming import EscritorStreaming
+from tablas import agregar_tabla
 
-def configurar_estilos(doc):
-    """Configura los estilos personalizados del documento"""
-    
-    # Estilo para títulos principales
-    estilo_titulo = doc.styles.add_style('TituloPrincipal', WD_STYLE_TYPE.PARAGRAPH)
-    estilo_titulo.font.name = 'Calibri'
-    estilo_titulo.font.size = Pt(16)
-    estilo_titulo.font.bold = True
-    estilo_titulo.font.color.rgb = RGBColor(46, 84, 149)  # Azul oscuro
-    estilo_titulo.paragraph_format.space_after = Pt(12)
-    
-    # Estilo para subtítulos
-    estilo_subtitulo = doc.styles.add_style('Subtitulo', WD_STYLE_TYPE.PARAGRAPH)
-    estilo_subtitulo.font.name = 'Calibri'
-    estilo_subtitulo.font.size = Pt(14)
-    estilo_subtitulo.font.bold = True
-    estilo_subtitulo.font.color.rgb = RGBColor(64, 64, 64)  # Gris oscuro
-    estilo_subtitulo.paragraph_format.space_before = Pt(18)
-    estilo_subtitulo.paragraph_format.space_after = Pt(6)
-    
-    # Estilo para encabezados de sección
-    estilo_seccion = doc.styles.add_style('Seccion', WD_STYLE_TYPE.PARAGRAPH)
-    estilo_seccion.font.name = 'Calibri'
-    estilo_seccion.font.size = Pt(12)
-    estilo_seccion.font.bold = True
-    estilo_seccion.paragraph_format.space_before = Pt(12)
-    estilo_seccion.paragraph_format.space_after = Pt(6)
-    
-    # Estilo para código
-    estilo_codigo = doc.styles.add_style('Codigo', WD_STYLE_TYPE.PARAGRAPH)
-    estilo_codigo.font.name = 'Consolas'
-    estilo_codigo.font.size = Pt(10)
-    estilo_codigo.paragraph_format.left_indent = Inches(0.5)
-    estilo_codigo.paragraph_format.space_before = Pt(6)
-    estilo_codigo.paragraph_format.space_after = Pt(6)
-    
-    # Estilo normal modificado
-    estilo_normal = doc.styles['Normal']
-    estilo_normal.font.name = 'Calibri'
-    estilo_normal.font.size = Pt(11)
-
-def agregar_portada(doc):
-    """Agrega la portada del documento"""
-    
-    # Título principal
-    titulo = doc.add_heading('DOCUMENTO DE TRANSFERENCIA TECNOLÓGICA', 0)
-    titulo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    # Espacio
-    doc.add_paragraph()
-    
-    # Información del sistema
-    tabla_info = doc.add_table(rows=5, cols=2)
-    tabla_info.style = 'LightShading-Accent1'
-    
-    datos_portada = [
-        ("Sistema:", "[NOMBRE DEL SISTEMA WEB]"),
-        ("Versión:", "[vX.X.X]"),
-        ("Fecha de transferencia:", datetime.now().strftime('%d/%m/%Y')),
-        ("Responsable actual:", "[Tu Nombre Completo]"),
-        ("Área receptora:", "Operaciones e Infraestructura"),
-    ]
-    
-    for i, (campo, valor) in enumerate(datos_portada):
-        tabla_info.rows[i].cells[0].text = campo
-        tabla_info.rows[i].cells[1].text = valor
-        tabla_info.rows[i].cells[0].paragraphs[0].runs[0].bold = True
-    
-    doc.add_page_break()
-
-def agregar_indice(doc):
-    """Agrega el índice del documento"""
-    
-    doc.add_heading('ÍNDICE', level=1)
-    doc.add_paragraph()
-    
-    secciones = [
-        "1. RESUMEN EJECUTIVO",
-        "2. ARQUITECTURA DEL SISTEMA",
-        "2.1 Diagrama de componentes",
-        "2.2 Listado de microservicios",
-        "3. INFRAESTRUCTURA DE PRODUCCIÓN",
-        "4. PROCESO DE DESPLIEGUE ACTUAL",
-        "5. CONFIGURACIÓN Y VARIABLES DE ENTORNO",
-        "6. MONITOREO Y LOGS",
-        "7. BACKUP Y RECUPERACIÓN",
-        "8. SEGURIDAD",
-        "9. PROCEDIMIENTOS DE INCIDENTES",
-        "10. MEJORAS PLANEADAS / DEUDA TÉCNICA",
-        "11. ANEXOS",
-        "FIRMAS DE CONFORMIDAD"
-    ]
-    
-    for seccion in secciones:
-        p = doc.add_paragraph(seccion)
-        p.paragraph_format.left_indent = Inches(0.5 if '.' in seccion[:3] else 0)
-    
-    doc.add_page_break()
-
-def agregar_resumen_ejecutivo(doc):
-    """Agrega la sección de resumen ejecutivo"""
-    
-    doc.add_heading('1. RESUMEN EJECUTIVO', level=1)
-    
-    # Crear tabla de resumen
-    tabla = doc.add_table(rows=7, cols=2)
-    tabla.style = 'LightGrid-Accent1'
-    
-    # Configurar ancho de columnas
-    for row in tabla.rows:
-        row.cells[0].width = Inches(2)
-        row.cells[1].width = Inches(4)
-    
-    datos_resumen = [
-        ("Arquitectura:", "Sistema web basado en microservicios (25 servicios)"),
-        ("Tecnología principal:", ".NET 8 (ASP.NET Core)"),
-        ("Orquestación:", "Podman en producción"),
-        ("Estrategia despliegue:", "CI/CD manual desde repositorio Git"),
-        ("Entorno producción:", "[Especificar servidores/cloud]"),
-        ("Disponibilidad:", "[Ej: 99.5% en horario comercial]"),
-        ("SLA actual:", "[Especificar acuerdos de nivel de servicio]")
-    ]
-    
-    for i, (campo, valor) in enumerate(datos_resumen):
-        tabla.rows[i].cells[0].text = campo
-        tabla.rows[i].cells[1].text = valor
-        tabla.rows[i].cells[0].paragraphs[0].runs[0].bold = True
-
-def agregar_arquitectura(doc):
-    """Agrega la sección de arquitectura"""
-    
-    doc.add_heading('2. ARQUITECTURA DEL SISTEMA', level=1)
-    
-    # 2.1 Diagrama de componentes
-    doc.add_heading('2.1 Diagrama de componentes', level=2)
-    doc.add_paragraph('(Insertar diagrama arquitectónico aquí)', style='Intense Quote')
-    
-    # Diagrama ASCII
-    p = doc.add_paragraph()
-    run = p.add_run()
-    run.text = """\
-[API Gateway] → [Microservicios (25)] → [Bases de datos/Storage]
-       ↑
-[Cliente Web]  [Otros consumidores]\
-"""
-    run.font.name = 'Consolas'
-    run.font.size = Pt(10)
-    
-    # 2.2 Listado de microservicios
-    doc.add_heading('2.2 Listado de microservicios', level=2)
-    
-    # Crear tabla de microservicios
-    tabla_ms = doc.add_table(rows=6, cols=5)
-    tabla_ms.style = 'MediumShading1-Accent1'
-    
-    # Encabezados
-    headers = ["#", "Nombre del Servicio", "Puerto", "Función principal", "Dependencias"]
-    for i, header in enumerate(headers):
-        cell = tabla_ms.rows[0].cells[i]
-        cell.text = header
-        cell.paragraphs[0].runs[0].bold = True
-    
-    # Datos de ejemplo (primeros 5 servicios)
-    datos_ms = [
+# Valores por defecto de un sistema (se usan cuando el registro no los define)
+DATOS_POR_DEFECTO = {
+    'sistema': "[NOMBRE DEL SISTEMA WEB]",
+    'version': "[vX.X.X]",
+    'fecha': None,  # None = fecha actual
+    'responsable': "[Tu Nombre Completo]",
+    'area_receptora': "Operaciones e Infraestructura",
+    'receptor': "[Nombre Receptor]",
+    'testigo': "[Nombre Testigo]",
+    'gerente': "[Nombre Gerente]",
+    'microservicios': [
         ("1", "servicio-autenticacion", "5001", "Gestión de usuarios y tokens", "BD_Usuarios, Redis"),
         ("2", "servicio-catalogo", "5002", "Catálogo de productos", "BD_Catalogo"),
         ("3", "servicio-pedidos", "5003", "Procesamiento de pedidos", "BD_Pedidos, Redis"),
         ("4", "servicio-pagos", "5004", "Procesamiento de pagos", "API externa, BD_Pagos"),
         ("5", "servicio-notificaciones", "5005", "Envío de notificaciones", "SMTP, BD_Notificaciones")
-    ]
-    
-    for i, datos in enumerate(datos_ms, 1):
-        for j, valor in enumerate(datos):
-            tabla_ms.rows[i].cells[j].text = str(valor)
-    
-    doc.add_paragraph("... (continuación para los 25 servicios)")
-
-def agregar_infraestructura(doc):
-    """Agrega la sección de infraestructura"""
-    
-    doc.add_heading('3. INFRAESTRUCTURA DE PRODUCCIÓN', level=1)
-    
-    # 3.1 Especificaciones del servidor
-    doc.add_heading('3.1 Especificaciones del servidor', level=2)
-    
-    p = doc.add_paragraph()
-    run = p.add_run()
-    run.text = """\
-Servidor Principal:
-  - Hostname: [nombre-servidor]
-  - IP: [XXX.XXX.XXX.XXX]
-  - SO: [Ej: RHEL 8.6 / Ubuntu 22.04]
-  - CPU: [Especificaciones - ej: 8 cores]
-  - RAM: [XX GB - ej: 32GB]
-  - Storage: [XX GB - ej: 500GB] (Ruta principal: [/opt/aplicacion])
-  - Podman version: [X.X.X - ej: 4.6.1]
-
-Servidores Adicionales:
-  - [Listar otros servidores si existen]\
-"""
-    run.font.name = 'Consolas'
-    run.font.size = Pt(10)
-
-def agregar_despliegue(doc):
-    """Agrega la sección de proceso de despliegue"""
-    
-    doc.add_heading('4. PROCESO DE DESPLIEGUE ACTUAL', level=1)
-    
-    # 4.1 Flujo completo
-    doc.add_heading('4.1 Flujo completo', level=2)
-    
-    p = doc.add_paragraph()
-    run = p.add_run()
-    run.text = """\
-1. Desarrollo local → 2. Commit/Push a Git → 3. SSH al servidor → 
-4. Git pull → 5. Build/Publicación → 6. Recrear contenedores → 
-7. Health checks → 8. Validación\
-"""
-    run.font.name = 'Consolas'
-    
-    # 4.2 Comandos críticos
-    doc.add_heading('4.2 Comandos críticos', level=2)
-    
-    comandos = [
+    ],
+    'nota_microservicios': "... (continuación para los 25 servicios)",
+    # Diagramas PNG/JPEG/SVG (None = marcador para insertarlo a mano)
+    'diagrama_arquitectura': None,
+    'diagramas_servicios': {},  # nombre del servicio -> ruta del diagrama
+    # Lenguaje de resaltado de los comandos ('bash', 'powershell'; None = sin resaltar)
+    'resaltado_comandos': None,
+    'comandos': [
         "# 1. Conectar al servidor",
         "ssh usuario@[IP-servidor] -p [puerto]",
         "",
@@ -299,236 +76,510 @@ def agregar_despliegue(doc):
         "",
         "# 7. Health check",
         "curl -f http://localhost:5001/health || echo 'FAILED'"
-    ]
-    
-    for cmd in comandos:
-        if cmd.startswith("#"):
-            p = doc.add_paragraph(cmd)
-            p.paragraph_format.left_indent = Inches(0)
-        elif cmd:
-            p = doc.add_paragraph(cmd, style='Codigo')
-        else:
-            doc.add_paragraph()
-
-def agregar_configuracion(doc):
-    """Agrega la sección de configuración"""
-    
-    doc.add_heading('5. CONFIGURACIÓN Y VARIABLES DE ENTORNO', level=1)
-    
-    # Tabla de variables
-    tabla_vars = doc.add_table(rows=5, cols=3)  # 1 encabezado + 4 datos
-    tabla_vars.style = 'LightGrid-Accent1'
-    
-    headers = ["Variable", "Ubicación", "Método de actualización"]
-    for i, header in enumerate(headers):
-        tabla_vars.rows[0].cells[i].text = header
-        tabla_vars.rows[0].cells[i].paragraphs[0].runs[0].bold = True
-    
-    datos_vars = [
+    ],
+    'variables': [
         ("ConnectionStrings__Default", "HashiCorp Vault / Archivo encriptado", "Script de rotación mensual"),
         ("JWT__SecretKey", "Azure Key Vault", "Portal Azure + redeploy"),
         ("ExternalAPI__Key", "Variable de entorno en contenedor", "Update en podman run"),
         ("Logging__Level", "appsettings.Production.json", "Modificar y redeploy")
-    ]
-    
-    for i, datos in enumerate(datos_vars, 1):
-        for j, valor in enumerate(datos):
-            tabla_vars.rows[i].cells[j].text = valor
-
-def agregar_monitoreo(doc):
-    """Agrega la sección de monitoreo"""
-    
-    doc.add_heading('6. MONITOREO Y LOGS', level=1)
-    
-    # 6.1 Métricas
-    doc.add_heading('6.1 Métricas a monitorear', level=2)
-    
-    p = doc.add_paragraph()
-    run = p.add_run()
-    run.text = """\
-Críticas:
-  - CPU uso > 80% por 5 min
-  - Memoria uso > 85%
-  - HTTP 5xx errors > 1%/min
-  - Latencia p95 > 2s
-
-Importantes:
-  - Tasa de errores por servicio
-  - Tiempo de respuesta promedio
-  - Health checks fallidos
-  - Espacio en disco < 20% libre\
-"""
-    run.font.name = 'Consolas'
-
-def agregar_backup(doc):
-    """Agrega la sección de backup"""
-    
-    doc.add_heading('7. BACKUP Y RECUPERACIÓN', level=1)
-    
-    # Tabla de estrategia de backup
-    tabla_backup = doc.add_table(rows=5, cols=4)  # 1 encabezado + 4 datos
-    tabla_backup.style = 'MediumList1-Accent1'
-    
-    headers = ["Componente", "Frecuencia", "Retención", "Ubicación"]
-    for i, header in enumerate(headers):
-        tabla_backup.rows[0].cells[i].text = header
-        tabla_backup.rows[0].cells[i].paragraphs[0].runs[0].bold = True
-    
-    datos_backup = [
+    ],
+    'backup': [
         ("Bases de datos", "Diario (22:00)", "30 días", "/backups/db/"),
         ("Configuraciones", "Semanal (domingo)", "12 semanas", "/backups/config/"),
         ("Logs importantes", "Mensual", "1 año", "NAS/Cloud Storage"),
         ("Imágenes contenedores", "Por versión", "5 versiones", "Registry interno")
-    ]
-    
-    for i, datos in enumerate(datos_backup, 1):
-        for j, valor in enumerate(datos):
-            tabla_backup.rows[i].cells[j].text = valor
+    ],
+}
 
-def agregar_seguridad(doc):
-    """Agrega la sección de seguridad"""
+# Secciones obligatorias del documento (el validador comprueba que existan como títulos)
+SECCIONES_INDICE = (
+    "1. RESUMEN EJECUTIVO",
+    "2. ARQUITECTURA DEL SISTEMA",
+    "2.1 Diagrama de componentes",
+    "2.2 Listado de microservicios",
+    "3. INFRAESTRUCTURA DE PRODUCCIÓN",
+    "4. PROCESO DE DESPLIEGUE ACTUAL",
+    "5. CONFIGURACIÓN Y VARIABLES DE ENTORNO",
+    "6. MONITOREO Y LOGS",
+    "7. BACKUP Y RECUPERACIÓN",
+    "8. SEGURIDAD",
+    "9. PROCEDIMIENTOS DE INCIDENTES",
+    "10. MEJORAS PLANEADAS / DEUDA TÉCNICA",
+    "11. ANEXOS",
+    "FIRMAS DE CONFORMIDAD",
+)
+
+# Encabezados de la tabla de firmas
+ENCABEZADOS_FIRMAS = ("Rol", "Nombre", "Firma", "Fecha")
+
+def resolver_fecha(fecha):
+    """Convierte la fecha de los datos (None, texto ISO o datetime) en datetime"""
+    
+    if fecha is None:
+        return ahora()
+    if isinstance(fecha, str):
+        return datetime.fromisoformat(fecha)
+    if not isinstance(fecha, datetime):
+        raise TypeError(f"'fecha' debe ser texto ISO o datetime, no {type(fecha).__name__}")
+    return fecha
+
+def completar_datos(datos=None):
+    """Combina los datos de un sistema con los valores por defecto.
     
-    doc.add_heading('8. SEGURIDAD', level=1)
+    Si los datos traen ``inventario``, se ingiere aquí (``inventario.py``), de
+    modo que todos los puntos de entrada lo aplican igual.
+    """
     
-    # Checklist de hardening
-    doc.add_heading('8.1 Hardening aplicado', level=2)
+    datos = aplicar_inventario(datos)
+    completos = dict(DATOS_POR_DEFECTO)
+    if datos:
+        completos.update(datos)
+        # La nota de continuación solo aplica al listado de ejemplo
+        propio = 'microservicios' in datos or 'inventario' in datos
+        if propio and 'nota_microservicios' not in datos:
+            completos['nota_microservicios'] = None
     
-    checklist = [
-        ("✓", "Contenedores ejecutan como usuario no-root"),
-        ("✓", "Secrets en variables de entorno (no en código)"),
-        ("✓", "Firewall configurado (ufw/iptables)"),
-        ("○", "Escaneo de vulnerabilidades periódico"),
-        ("✓", "Logs de auditoría habilitados"),
-        ("○", "WAF (Web Application Firewall) implementado")
-    ]
+    completos['fecha'] = resolver_fecha(completos['fecha'])
     
-    for estado, desc in checklist:
-        p = doc.add_paragraph()
-        p.add_run(f"{estado} {desc}").bold = (estado == "✓")
+    # El contenido de los diagramas (no solo su ruta) forma parte de las claves de caché
+    completos['huellas_diagramas'] = huellas_diagramas(completos)
+    
+    return completos
 
-def agregar_incidentes(doc):
-    """Agrega la sección de procedimientos de incidentes"""
+def nombre_archivo_por_defecto(datos):
+    """Devuelve el nombre del archivo de salida para un sistema"""
     
-    doc.add_heading('9. PROCEDIMIENTOS DE INCIDENTES', level=1)
+    return f"Transferencia_Tecnologica_{datos['fecha'].strftime('%Y%m%d')}.docx"
+
+def crear_documento_transferencia(datos=None, nombre_archivo=None, streaming=False, cache=None,
+                                  compresion=None, hilos=None, cache_resultados=None, procesos=None):
+    """Crea el documento completo de transferencia tecnológica.
+    
+    ``nombre_archivo`` puede ser una ruta, un objeto binario (``BytesIO``), un
+    descriptor de archivo o ``'-'`` (salida estándar); ``compresion`` es el
+    nivel del zip (0 = sin comprimir, 9 = máximo) y ``hilos`` comprime en
+    paralelo las partes grandes. Con ``cache_resultados`` (un
+    ``CacheResultados``), si ya se generó un documento con las mismas entradas
+    se copia en lugar de volver a generarlo. Con ``procesos`` mayor que 1 las
+    secciones se renderizan en paralelo (``paralelo.py``).
+    """
+    
+    datos = completar_datos(datos)
+    if nombre_archivo is None:
+        nombre_archivo = nombre_archivo_por_defecto(datos)
+    
+    perfil = obtener_perfilador()
+    reutilizado = False
+    if streaming:
+        # Cada sección se escribe en el zip en cuanto termina y se libera
+        doc = crear_documento_base(datos['fecha'])
+        with EscritorStreaming(doc, nombre_archivo, compresion, hilos) as escritor:
+            def volcar(seccion):
+                if seccion is agregar_indice:
+                    # El índice se escribe antes que los títulos que lista: sus
+                    # entradas salen de la representación intermedia
+                    emitir_indice(doc, entradas_previstas(construir_ir(datos)))
+                marcar_previstos(doc)
+                escritor.volcar()
+            
+            agregar_secciones(
+                doc, datos, despues_de_seccion=volcar, cache=cache, procesos=procesos,
+            )
+            with perfil.guardado():
+                escritor.cerrar()
+    else:
+        def generar(destino):
+            doc = construir_documento(datos, cache=cache, procesos=procesos)
+            with perfil.guardado():
+                guardar_documento(doc, destino, compresion, hilos)
+        
+        clave = None
+        if cache_resultados is not None:
+            clave = clave_resultado(datos, SECCIONES, compresion, hilos)
+        reutilizado = generar_con_cache(cache_resultados, clave, nombre_archivo, generar)
+    
+    # Con la salida estándar los mensajes no deben mezclarse con el documento
+    mensajes = sys.stderr if nombre_archivo == '-' else sys.stdout
+    if isinstance(nombre_archivo, (str, os.PathLike)) and nombre_archivo != '-':
+        estado = "reutilizado de la caché" if reutilizado else "generado"
+        print(f"✅ Documento {estado}: {nombre_archivo}", file=mensajes)
+        print(f"📁 Ruta: {os.path.abspath(nombre_archivo)}", file=mensajes)
+    
+    if perfil.activo:
+        ruta_informe = perfil.escribir_informe()
+        print(f"⏱️  Perfil de generación: {os.path.abspath(ruta_informe)}", file=mensajes)
     
-    # Tabla de incidentes comunes
-    tabla_incidentes = doc.add_table(rows=5, cols=4)  # 1 encabezado + 4 datos
-    tabla_incidentes.style = 'LightShading-Accent1'
+    return nombre_archivo
+
+def construir_documento(datos=None, cache=None, procesos=None):
+    """Construye en memoria el documento de transferencia de un sistema"""
     
-    headers = ["Síntoma", "Posible causa", "Acción inmediata", "Resolución"]
-    for i, header in enumerate(headers):
-        tabla_incidentes.rows[0].cells[i].text = header
-        tabla_incidentes.rows[0].cells[i].paragraphs[0].runs[0].bold = True
+    datos = completar_datos(datos)
+    doc = crear_documento_base(datos['fecha'])
+    agregar_secciones(doc, datos, cache=cache, procesos=procesos)
+    return doc
+
+def construir_ir(datos=None):
+    """Registra el contenido de las secciones en la representación intermedia ligera"""
+    
+    datos = completar_datos(datos)
+    ir = DocumentoIR()
+    for seccion in SECCIONES:
+        ir.iniciar_seccion(seccion.__name__)
+        seccion(ir, datos)
+    return ir
+
+def crear_documento_base(fecha=None):
+    """Crea el documento vacío con estilos y propiedades"""
     
-    datos_incidentes = [
-        ("Error 502 en gateway", "Microservicio caído", "1. Verificar podman ps\n2. Revisar logs", "Restart del servicio"),
-        ("Alta latencia", "CPU/Memoria saturada", "1. Usar top/htop\n2. Escalar temporalmente", "Optimizar o escalar recursos"),
-        ("Conexión BD rechazada", "BD no responde", "1. Verificar proceso BD\n2. Check conexión", "Restart servicio BD"),
-        ("Disk space full", "Logs sin rotación", "1. df -h\n2. Limpiar logs antiguos", "Implementar log rotation")
-    ]
+    # Crear documento a partir de la plantilla con los estilos personalizados
+    doc = nuevo_documento()
     
-    for i, datos in enumerate(datos_incidentes, 1):
-        for j, valor in enumerate(datos):
-            tabla_incidentes.rows[i].cells[j].text = str(valor)
+    # Configurar propiedades del documento
+    doc.core_properties.title = "Documento de Transferencia Tecnológica"
+    doc.core_properties.author = "Departamento de Desarrollo"
+    doc.core_properties.subject = "Transferencia Sistema Web Microservicios"
+    if fecha is not None:
+        fechar_documento(doc, fecha)
+    
+    return doc
 
-def agregar_mejoras(doc):
-    """Agrega la sección de mejoras planeadas"""
+def fechar_documento(doc, fecha, creado=True):
+    """Fija las fechas de creación y modificación a partir de la fecha del documento.
     
-    doc.add_heading('10. MEJORAS PLANEADAS / DEUDA TÉCNICA', level=1)
+    Se usa solo el día (lo único que muestran las secciones), de modo que las
+    propiedades dependen de los datos y no del instante de la generación.
+    """
     
-    tabla_mejoras = doc.add_table(rows=6, cols=4)  # 1 encabezado + 5 datos
-    tabla_mejoras.style = 'MediumGrid3-Accent1'
+    dia = datetime.combine(fecha.date(), time())
+    if creado:
+        doc.core_properties.created = dia
+    doc.core_properties.modified = dia
+
+def agregar_secciones(doc, datos=None, despues_de_seccion=None, cache=None, procesos=None):
+    """Agrega todas las secciones en orden, notificando el final de cada una.
+    
+    Con ``cache`` (un ``CacheFragmentos``), las secciones cuyas entradas no han
+    cambiado se insertan desde su fragmento XML ya renderizado. Con
+    ``procesos`` mayor que 1 se renderizan en paralelo y se ensamblan en orden.
+    Al final, el índice se rellena con los títulos registrados durante la
+    generación. La huella de cada sección se guarda en el documento para la
+    regeneración incremental.
+    """
+    
+    datos = completar_datos(datos)
+    perfil = obtener_perfilador()
+    if perfil.activo:
+        perfil.documento = datos['sistema']
+    
+    if procesos is not None and procesos > 1:
+        from paralelo import agregar_secciones_en_paralelo
+        huellas = agregar_secciones_en_paralelo(
+            doc, SECCIONES, ENTRADAS_SECCIONES, datos, procesos, despues_de_seccion, cache
+        )
+        emitir_indice(doc)
+        guardar_huellas(doc, huellas)
+        return huellas
+    
+    huellas = []
+    for seccion in SECCIONES:
+        clave = clave_seccion(seccion, datos, ENTRADAS_SECCIONES.get(seccion))
+        with perfil.seccion(seccion.__name__, doc):
+            elementos = renderizar_seccion(doc, seccion, datos, clave, cache)
+        huellas.append({'seccion': seccion.__name__, 'hash': clave, 'elementos': elementos})
+        if despues_de_seccion is not None:
+            despues_de_seccion(seccion)
+    
+    emitir_indice(doc)
+    guardar_huellas(doc, huellas)
+    return huellas
+
+# Alineaciones de los bloques de la especificación
+ALINEACIONES = {
+    'izquierda': WD_ALIGN_PARAGRAPH.LEFT,
+    'centro': WD_ALIGN_PARAGRAPH.CENTER,
+    'derecha': WD_ALIGN_PARAGRAPH.RIGHT,
+    'justificado': WD_ALIGN_PARAGRAPH.JUSTIFY,
+}
+
+def agregar_bloques(doc, nombre, datos=None):
+    """Agrega los bloques de una sección de la especificación (``especificacion.py``).
+    
+    Es la única copia del contenido de las secciones: ``plan.py`` compila la
+    misma especificación.
+    """
+    
+    bloques = seccion_por_defecto(nombre).get('bloques', [])
+    campos = set()
+    for bloque in bloques:
+        campos |= referencias_bloque(bloque)
+    valores = {}
+    if campos:
+        datos = completar_datos(datos)
+        valores = valores_campos(datos, campos)
+    
+    for bloque in bloques:
+        if 'si' in bloque and not datos.get(bloque['si']):
+            continue
+        if 'sin' in bloque and datos.get(bloque['sin']):
+            continue
+        _agregar_bloque(doc, bloque, datos, valores)
+
+def _agregar_bloque(doc, bloque, datos, valores):
+    """Agrega un bloque de la especificación con la API de python-docx"""
+    
+    tipo = bloque['tipo']
+    
+    if tipo == 'salto_pagina':
+        doc.add_page_break()
+    
+    elif tipo == 'indice':
+        # Solo el hueco: se rellena al final con los títulos agregados (indice.py)
+        reservar_indice(doc)
+    
+    elif tipo == 'titulo':
+        titulo = agregar_titulo(doc, formatear(bloque['texto'], valores), bloque.get('nivel', 1))
+        if 'alineacion' in bloque:
+            titulo.alignment = ALINEACIONES[bloque['alineacion']]
+    
+    elif tipo == 'parrafo':
+        if 'partes' in bloque:
+            p = agregar_parrafo(doc, estilo=bloque.get('estilo'))
+            for parte in bloque['partes']:
+                ejecucion = p.add_run(formatear(parte.get('texto', ''), valores))
+                if parte.get('negrita'):
+                    ejecucion.bold = True
+        else:
+            p = agregar_parrafo(doc, formatear(bloque.get('texto', ''), valores), bloque.get('estilo'))
+        if 'sangria' in bloque:
+            p.paragraph_format.left_indent = Inches(bloque['sangria'])
+        if 'alineacion' in bloque:
+            p.alignment = ALINEACIONES[bloque['alineacion']]
+    
+    elif tipo == 'codigo':
+        p = agregar_codigo(doc, bloque['lineas'], estilo=bloque.get('estilo', ESTILO_CODIGO),
+                           lenguaje=bloque.get('lenguaje'))
+        # Fuente y tamaño solo si se fuerzan (la IR no los registra)
+        for ejecucion in getattr(p, 'runs', ()):
+            if 'fuente' in bloque:
+                ejecucion.font.name = bloque['fuente']
+            if 'tamano' in bloque:
+                ejecucion.font.size = Pt(bloque['tamano'])
+    
+    elif tipo == 'comandos':
+        # Todo el listado en un único bloque (comentarios y líneas en blanco incluidos)
+        agregar_codigo(doc, datos[bloque['datos']], estilo=bloque.get('estilo', ESTILO_CODIGO),
+                       lenguaje=datos['resaltado_comandos'])
+    
+    elif tipo == 'verificacion':
+        marca = bloque.get('marca', '✓')
+        for estado, descripcion in bloque['elementos']:
+            p = agregar_parrafo(doc)
+            p.add_run(f"{estado} {descripcion}").bold = (estado == marca)
+    
+    elif tipo == 'lista':
+        prefijo = bloque.get('prefijo', '')
+        for elemento in bloque['elementos']:
+            p = agregar_parrafo(doc, estilo=bloque.get('estilo', 'List Bullet'))
+            p.add_run(f"{prefijo}{elemento}")
+    
+    elif tipo == 'tabla':
+        if 'datos' in bloque:
+            filas = datos[bloque['datos']]
+        else:
+            filas = [[formatear(str(valor), valores) for valor in fila] for fila in bloque['filas']]
+        agregar_tabla(
+            doc, filas, encabezados=bloque.get('encabezados'), estilo=bloque.get('estilo'),
+            anchos=[Inches(ancho) for ancho in bloque['anchos']] if bloque.get('anchos') else None,
+            negrita_encabezado=bloque.get('negrita_encabezado', True),
+            negrita_primera_columna=bloque.get('negrita_primera_columna', False),
+        )
+    
+    elif tipo == 'diagrama':
+        # Una ruta o, con un diccionario, un título (con el nombre) y un diagrama por
+        # entrada; cada imagen se guarda una sola vez en el paquete
+        diagramas = datos.get(bloque['datos']) or {}
+        ancho = Inches(bloque['ancho']) if 'ancho' in bloque else None
+        if isinstance(diagramas, str):
+            diagramas = {None: diagramas}
+        for nombre, ruta in diagramas.items():
+            if nombre is not None:
+                agregar_titulo(doc, nombre, bloque.get('nivel', 3))
+            agregar_diagrama(doc, ruta, ancho=ancho)
+    
+    else:
+        raise ValueError(f"tipo de bloque desconocido {tipo!r}")
+
+def agregar_portada(doc, datos=None):
+    """Agrega la portada del documento"""
     
-    headers = ["Item", "Prioridad", "Estimado", "Notas"]
-    for i, header in enumerate(headers):
-        tabla_mejoras.rows[0].cells[i].text = header
-        tabla_mejoras.rows[0].cells[i].paragraphs[0].runs[0].bold = True
+    agregar_bloques(doc, 'portada', datos)
+
+def agregar_indice(doc, datos=None):
+    """Agrega el índice del documento.
     
-    datos_mejoras = [
-        ("Implementar CI/CD automático", "Alta", "2-3 sprints", "Jenkins/GitHub Actions"),
-        ("Migrar a Kubernetes", "Media", "Q3 2024", "Evaluar costos/beneficios"),
-        ("Centralizar logs con ELK", "Alta", "1 sprint", "Mejora debugging"),
-        ("Autoscaling horizontal", "Baja", "Q4 2024", "Depende de crecimiento tráfico"),
-        ("Monitoring avanzado", "Media", "Q2 2024", "Prometheus + Grafana dashboards")
-    ]
+    Solo se reserva su hueco: las entradas se emiten al final de la generación
+    a partir de los títulos que agregan las demás secciones (``indice.py``).
+    """
     
-    for i, datos in enumerate(datos_mejoras, 1):
-        for j, valor in enumerate(datos):
-            tabla_mejoras.rows[i].cells[j].text = valor
+    agregar_bloques(doc, 'indice', datos)
 
-def agregar_anexos(doc):
-    """Agrega la sección de anexos"""
-    
-    doc.add_heading('11. ANEXOS', level=1)
+def agregar_resumen_ejecutivo(doc, datos=None):
+    """Agrega la sección de resumen ejecutivo"""
     
-    # Checklist pre-despliegue
-    doc.add_heading('A. Checklist pre-despliegue', level=2)
+    agregar_bloques(doc, 'resumen_ejecutivo', datos)
+
+def agregar_arquitectura(doc, datos=None):
+    """Agrega la sección de arquitectura"""
     
-    checklist_items = [
-        "Backups completados",
-        "Team notificado",
-        "Ventana de mantenimiento confirmada",
-        "Rollback plan listo",
-        "Health checks configurados",
-        "Documentación actualizada",
-        "Tests de integración pasados"
-    ]
+    agregar_bloques(doc, 'arquitectura', datos)
+
+def agregar_infraestructura(doc, datos=None):
+    """Agrega la sección de infraestructura"""
     
-    for item in checklist_items:
-        p = doc.add_paragraph(style='List Bullet')
-        p.add_run(f"[ ] {item}")
+    agregar_bloques(doc, 'infraestructura', datos)
 
-def agregar_firmas(doc):
-    """Agrega la sección de firmas"""
+def agregar_despliegue(doc, datos=None):
+    """Agrega la sección de proceso de despliegue"""
     
-    doc.add_page_break()
-    doc.add_heading('FIRMAS DE CONFORMIDAD', level=1)
+    agregar_bloques(doc, 'despliegue', datos)
+
+def agregar_configuracion(doc, datos=None):
+    """Agrega la sección de configuración"""
     
-    # Tabla de firmas
-    tabla_firmas = doc.add_table(rows=5, cols=4)  # 1 encabezado + 4 datos
-    tabla_firmas.style = 'LightGrid-Accent1'
+    agregar_bloques(doc, 'configuracion', datos)
+
+def agregar_monitoreo(doc, datos=None):
+    """Agrega la sección de monitoreo"""
     
-    headers = ["Rol", "Nombre", "Firma", "Fecha"]
-    for i, header in enumerate(headers):
-        tabla_firmas.rows[0].cells[i].text = header
-        tabla_firmas.rows[0].cells[i].paragraphs[0].runs[0].bold = True
+    agregar_bloques(doc, 'monitoreo', datos)
+
+def agregar_backup(doc, datos=None):
+    """Agrega la sección de backup"""
     
-    datos_firmas = [
-        ("Entrega (Desarrollo)", "[Tu Nombre Completo]", "__________", datetime.now().strftime('%d/%m/%Y')),
-        ("Recibe (Operaciones)", "[Nombre Receptor]", "__________", ""),
-        ("Testigo (Infraestructura)", "[Nombre Testigo]", "__________", ""),
-        ("Aprobación (Gerencia)", "[Nombre Gerente]", "__________", "")
-    ]
+    agregar_bloques(doc, 'backup', datos)
+
+def agregar_seguridad(doc, datos=None):
+    """Agrega la sección de seguridad"""
     
-    for i, datos in enumerate(datos_firmas, 1):
-        for j, valor in enumerate(datos):
-            tabla_firmas.rows[i].cells[j].text = str(valor)
+    agregar_bloques(doc, 'seguridad', datos)
+
+def agregar_incidentes(doc, datos=None):
+    """Agrega la sección de procedimientos de incidentes"""
     
-    # Notas finales
-    doc.add_paragraph()
-    p = doc.add_paragraph()
-    p.add_run("NOTA: ").bold = True
-    p.add_run("Este documento debe actualizarse con cada cambio arquitectónico significativo.")
+    agregar_bloques(doc, 'incidentes', datos)
+
+def agregar_mejoras(doc, datos=None):
+    """Agrega la sección de mejoras planeadas"""
     
-    p = doc.add_paragraph()
-    p.add_run("Última revisión: ").bold = True
-    p.add_run(datetime.now().strftime('%d/%m/%Y'))
+    agregar_bloques(doc, 'mejoras', datos)
+
+def agregar_anexos(doc, datos=None):
+    """Agrega la sección de anexos"""
     
-    p = doc.add_paragraph()
-    p.add_run("Próxima revisión programada: ").bold = True
-    p.add_run("[DD/MM/AAAA]")
+    agregar_bloques(doc, 'anexos', datos)
+
+def agregar_firmas(doc, datos=None):
+    """Agrega la sección de firmas"""
     
-    p = doc.add_paragraph()
-    p.add_run("Custodio del documento: ").bold = True
-    p.add_run("[Nombre del Arquitecto/Lead Técnico]")
+    agregar_bloques(doc, 'firmas', datos)
 
-# Ejecutar el generador
-if __name__ == "__main__":
-    print("🚀 Generando documento de transferencia tecnológica...")
-    archivo_generado = crear_documento_transferencia()
+# Secciones del documento en orden de aparición
+SECCIONES = [
+    agregar_portada,
+    agregar_indice,
+    agregar_resumen_ejecutivo,
+    agregar_arquitectura,
+    agregar_infraestructura,
+    agregar_despliegue,
+    agregar_configuracion,
+    agregar_monitoreo,
+    agregar_backup,
+    agregar_seguridad,
+    agregar_incidentes,
+    agregar_mejoras,
+    agregar_anexos,
+    agregar_firmas,
+]
+
+# Datos de los que depende cada sección (clave de la caché de fragmentos)
+ENTRADAS_SECCIONES = {
+    agregar_portada: ('sistema', 'version', 'fecha', 'responsable', 'area_receptora'),
+    agregar_indice: (),
+    agregar_resumen_ejecutivo: (),
+    agregar_arquitectura: ('microservicios', 'nota_microservicios', 'diagrama_arquitectura',
+                           'diagramas_servicios', 'huellas_diagramas'),
+    agregar_infraestructura: (),
+    agregar_despliegue: ('comandos', 'resaltado_comandos'),
+    agregar_configuracion: ('variables',),
+    agregar_monitoreo: (),
+    agregar_backup: ('backup',),
+    agregar_seguridad: (),
+    agregar_incidentes: (),
+    agregar_mejoras: (),
+    agregar_anexos: (),
+    agregar_firmas: ('fecha', 'responsable', 'receptor', 'testigo', 'gerente'),
+}
+
+# El contenido de cada sección está en la especificación: forma parte de su huella
+# (caché de fragmentos y regeneración incremental, ``fragmentos.clave_seccion``)
+for seccion in SECCIONES:
+    seccion.especificacion = seccion_por_defecto(seccion.__name__.removeprefix('agregar_'))
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+    
+    parser = argparse.ArgumentParser(description="Genera el documento de transferencia tecnológica")
+    parser.add_argument('--datos', help="Archivo JSON con los datos del sistema")
+    parser.add_argument('-o', '--salida', help="Nombre del archivo de salida ('-' = salida estándar)")
+    parser.add_argument('--inventario', nargs='+', metavar='VOLCADO',
+                        help="Volcados de podman ps/inspect (JSON) o CSV para la tabla de microservicios")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Escribe el documento sección a sección (memoria constante)")
+    parser.add_argument('--compresion', type=int, choices=range(10), metavar='0-9',
+                        help="Nivel de compresión del zip (0 = sin comprimir, 9 = máximo)")
+    parser.add_argument('--hilos', type=int, default=None,
+                        help="Hilos para comprimir en paralelo las partes grandes")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos para renderizar las secciones en paralelo")
+    parser.add_argument('--perfil', nargs='?', const=INFORME_POR_DEFECTO, metavar='INFORME',
+                        help="Mide cada sección y escribe un informe JSON o CSV")
+    parser.add_argument('--reproducible', action='store_true',
+                        help="Salida idéntica byte a byte para las mismas entradas (marcas de tiempo fijas)")
+    parser.add_argument('--cache-resultados', metavar='DIRECTORIO',
+                        help="Reutiliza el documento ya generado si las entradas no cambiaron")
+    args = parser.parse_args(argv)
+    
+    if args.perfil:
+        activar_perfilador(args.perfil)
+    if args.reproducible:
+        activar_reproducible()
+    
+    datos = None
+    if args.datos:
+        with open(args.datos, encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+    if args.inventario:
+        datos = dict(datos or {}, inventario=args.inventario)
+    
+    # Con '-o -' el documento ocupa la salida estándar y los mensajes van a stderr
+    mensajes = sys.stderr if args.salida == '-' else sys.stdout
+    print("🚀 Generando documento de transferencia tecnológica...", file=mensajes)
+    cache_resultados = CacheResultados(args.cache_resultados) if args.cache_resultados else None
+    archivo_generado = crear_documento_transferencia(
+        datos, args.salida, streaming=args.streaming, compresion=args.compresion, hilos=args.hilos,
+        cache_resultados=cache_resultados, procesos=args.procesos,
+    )
+    if args.salida == '-':
+        return 0
     print("🎉 Documento generado exitosamente!")
     print("\n📋 Pasos siguientes:")
     print("1. Revisar el documento generado")
-    print("2. Completar los campos entre [corchetes]")
-    print("3. Insertar diagramas en las secciones indicadas")
-    print("4. Personalizar según necesidades específicas")
\ No newline at end of file
+    print("2. Completar los campos entre [corchetes] (o en masa con src/marcadores.py)")
+    print("3. Insertar diagramas en las secciones indicadas (o indicarlos en los datos)")
+    print("4. Personalizar según necesidades específicas")
+    return 0
+
+# Ejecutar el generador
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Huellas de sección guardadas dentro del propio .docx.
+
+Cada documento generado incluye una parte XML personalizada con, por cada
+sección, el hash de sus entradas y el número de elementos del cuerpo que
+ocupa. La regeneración incremental usa esta información para localizar y
+sustituir solo las secciones que cambiaron.
+"""
+
+from lxml import etree
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.opc.part import Part
+
+NOMBRE_PARTE = PackURI('/customXml/huellas_secciones.xml')
+TIPO_CONTENIDO = 'application/xml'
+ESPACIO_NOMBRES = 'urn:generar-word:huellas-secciones'
+
+
+def _buscar_parte(doc):
+    """Devuelve la parte de huellas del documento o None"""
+
+    for relacion in doc.part.rels.values():
+        if relacion.is_external or relacion.reltype != RT.CUSTOM_XML:
+            continue
+        if relacion.target_part.partname == NOMBRE_PARTE:
+            return relacion.target_part
+    return None
+
+
+def serializar_huellas(huellas):
+    """Convierte la lista de huellas en el XML de la parte"""
+
+    raiz = etree.Element(f'{{{ESPACIO_NOMBRES}}}secciones', nsmap={None: ESPACIO_NOMBRES})
+    for huella in huellas:
+        elemento = etree.SubElement(raiz, f'{{{ESPACIO_NOMBRES}}}seccion')
+        elemento.set('nombre', huella['seccion'])
+        elemento.set('elementos', str(huella['elementos']))
+        if huella['hash'] is not None:
+            elemento.set('hash', huella['hash'])
+    return etree.tostring(raiz, encoding='UTF-8', xml_declaration=True, standalone=True)
+
+
+def guardar_huellas(doc, huellas):
+    """Crea o actualiza la parte de huellas del documento"""
+
+    blob = serializar_huellas(huellas)
+    parte = _buscar_parte(doc)
+    if parte is None:
+        parte = Part(NOMBRE_PARTE, TIPO_CONTENIDO, blob, doc.part.package)
+        doc.part.relate_to(parte, RT.CUSTOM_XML)
+    else:
+        parte._blob = blob
+
+
+def leer_huellas(doc):
+    """Devuelve la lista de huellas guardada en el documento o None"""
+
+    parte = _buscar_parte(doc)
+    if parte is None:
+        return None
+
+    raiz = etree.fromstring(parte.blob)
+    return [
+        {
+            'seccion': elemento.get('nombre'),
+            'hash': elemento.get('hash'),
+            'elementos': int(elemento.get('elementos')),
+        }
+        for elemento in raiz.iter(f'{{{ESPACIO_NOMBRES}}}seccion')
+    ]
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Regeneración incremental de un documento de transferencia existente.
+
+Compara las huellas guardadas en el .docx con las de los datos nuevos y
+vuelve a renderizar únicamente las secciones cuyas entradas cambiaron,
+sustituyendo sus elementos en el cuerpo del documento existente.
+"""
+
+import argparse
+import json
+import os
+import time
+
+from docx import Document
+
+from fragmentos import clave_seccion, renderizar_seccion, total_contenido
+from generate_word import (
+    ENTRADAS_SECCIONES,
+    SECCIONES,
+    completar_datos,
+    construir_documento,
+    fechar_documento,
+)
+from huellas import guardar_huellas, leer_huellas
+from indice import reconstruir_indice
+from salida import guardar_documento
+
+
+def _huellas_validas(huellas, cuerpo):
+    """Comprueba que las huellas describen las secciones actuales del cuerpo"""
+
+    if huellas is None:
+        return False
+    if [huella['seccion'] for huella in huellas] != [seccion.__name__ for seccion in SECCIONES]:
+        return False
+    # Si el documento se editó a mano, los recuentos ya no cuadran
+    return sum(huella['elementos'] for huella in huellas) == total_contenido(cuerpo)
+
+
+def regenerar_documento(ruta, datos=None, destino=None, cache=None):
+    """Actualiza un documento existente re-renderizando solo las secciones cambiadas"""
+
+    inicio = time.perf_counter()
+    datos = completar_datos(datos)
+    destino = destino or ruta
+
+    doc = Document(ruta)
+    cuerpo = doc.element.body
+    anteriores = leer_huellas(doc)
+
+    if not _huellas_validas(anteriores, cuerpo):
+        # Sin huellas fiables se regenera el documento completo
+        guardar_documento(construir_documento(datos, cache=cache), destino)
+        return {
+            'completo': True,
+            'regeneradas': [seccion.__name__ for seccion in SECCIONES],
+            'segundos': round(time.perf_counter() - inicio, 4),
+        }
+
+    posicion = 0
+    huellas = []
+    regeneradas = []
+    for seccion, anterior in zip(SECCIONES, anteriores):
+        clave = clave_seccion(seccion, datos, ENTRADAS_SECCIONES.get(seccion))
+        if clave is not None and clave == anterior['hash']:
+            huellas.append(anterior)
+            posicion += anterior['elementos']
+            continue
+
+        # Se eliminan los elementos anteriores de la sección...
+        for elemento in cuerpo[posicion:posicion + anterior['elementos']]:
+            cuerpo.remove(elemento)
+
+        # ...se renderiza al final del cuerpo (así las imágenes y demás
+        # relaciones se crean en este mismo paquete) y se mueve a su lugar
+        final = total_contenido(cuerpo)
+        elementos = renderizar_seccion(doc, seccion, datos, clave, cache)
+        for desplazamiento, elemento in enumerate(cuerpo[final:final + elementos]):
+            cuerpo.insert(posicion + desplazamiento, elemento)
+
+        posicion += elementos
+        huellas.append({'seccion': seccion.__name__, 'hash': clave, 'elementos': elementos})
+        regeneradas.append(seccion.__name__)
+
+    if regeneradas:
+        # Las secciones regeneradas pueden haber cambiado sus títulos
+        reconstruir_indice(doc, cuerpo[:total_contenido(cuerpo)])
+    if regeneradas or destino != ruta:
+        guardar_huellas(doc, huellas)
+        fechar_documento(doc, datos['fecha'], creado=False)
+        guardar_documento(doc, destino)
+
+    return {
+        'completo': False,
+        'regeneradas': regeneradas,
+        'segundos': round(time.perf_counter() - inicio, 4),
+    }
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Regenera solo las secciones que cambiaron")
+    parser.add_argument('documento', help="Documento de transferencia generado previamente")
+    parser.add_argument('--datos', help="Archivo JSON con los datos actualizados del sistema")
+    parser.add_argument('-o', '--salida', help="Archivo de salida (por defecto, el mismo documento)")
+    args = parser.parse_args(argv)
+
+    datos = None
+    if args.datos:
+        with open(args.datos, encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+
+    resultado = regenerar_documento(args.documento, datos, args.salida)
+    destino = args.salida or args.documento
+    if resultado['completo']:
+        print("⚠️  El documento no tenía huellas válidas: se regeneró por completo")
+    print(f"✅ Secciones regeneradas: {len(resultado['regeneradas'])}/{len(SECCIONES)} "
+          f"en {resultado['segundos']} s")
+    for nombre in resultado['regeneradas']:
+        print(f"   - {nombre}")
+    print(f"📁 Ruta: {os.path.abspath(destino)}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
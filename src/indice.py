@@ -0,0 +1,299 @@
+"""
+Índice de títulos construido durante la generación.
+
+``agregar_titulo`` registra cada título en el índice del documento (nivel,
+texto y párrafo) a medida que se agrega. ``agregar_indice`` solo reserva un
+hueco (un control de contenido ``w:sdt`` de tabla de contenido) y, cuando
+todas las secciones están en el cuerpo, ``emitir_indice`` lo rellena con un
+campo TOC de Word cuyas entradas son hipervínculos a marcadores colocados en
+los títulos registrados. No hace falta volver a recorrer el cuerpo: el coste
+es proporcional al número de títulos.
+
+En streaming el hueco se escribe antes que los títulos que lista: sus
+entradas se toman de la representación intermedia (``entradas_previstas``) y
+los marcadores se colocan con ``marcar_previstos`` a medida que los títulos
+llegan al cuerpo, así que el índice es el mismo que en memoria.
+
+El hueco ocupa siempre un único elemento del cuerpo, de modo que rellenarlo
+no altera el recuento de elementos de las huellas de sección.
+"""
+
+import re
+import weakref
+from collections import namedtuple
+from xml.sax.saxutils import escape
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+
+from contenido import DocumentoIR
+from lector import estilo_parrafo, texto_parrafo
+
+# Niveles de título que recoge el índice (Heading 1 y Heading 2)
+NIVELES_INDICE = 2
+
+INSTRUCCION_TOC = f' TOC \\o "1-{NIVELES_INDICE}" \\h \\z \\u '
+PREFIJO_MARCADOR = '_Toc'
+# Sangría de cada nivel de entrada (twips: 720 = media pulgada)
+SANGRIA_NIVEL = 720
+
+_GALERIA = 'Table of Contents'
+# XML del hueco reservado (también lo usa el plan declarativo)
+HUECO_INDICE = (
+    f'<w:sdt {nsdecls("w")}><w:sdtPr><w:docPartObj>'
+    f'<w:docPartGallery w:val="{_GALERIA}"/><w:docPartUnique/>'
+    '</w:docPartObj></w:sdtPr><w:sdtContent><w:p/></w:sdtContent></w:sdt>'
+)
+
+_TITULO = re.compile(r'heading (\d)$', re.IGNORECASE)
+
+_P = qn('w:p')
+_SDT = qn('w:sdt')
+_PPR = qn('w:pPr')
+_NOMBRE = qn('w:name')
+_ID = qn('w:id')
+_MARCADOR_INICIO = qn('w:bookmarkStart')
+_MARCADOR_FIN = qn('w:bookmarkEnd')
+_CONTENIDO = qn('w:sdtContent')
+_GALERIA_HUECO = f"{qn('w:sdtPr')}/{qn('w:docPartObj')}/{qn('w:docPartGallery')}"
+
+Titulo = namedtuple('Titulo', 'nivel texto parrafo')
+
+_indices = weakref.WeakKeyDictionary()
+
+
+class IndiceTitulos:
+    """Títulos de un documento en orden de aparición y hueco reservado para el índice"""
+
+    def __init__(self):
+        self.titulos = []
+        self.hueco = None
+        self.emitido = False
+        # Las entradas son los títulos que siguen al hueco
+        self._inicio = 0
+        self._niveles = None
+        # Entradas emitidas antes que sus títulos (streaming) y cuántas están marcadas
+        self._previstas = None
+        self._marcadas = 0
+
+    def registrar(self, parrafo, nivel, texto=''):
+        """Registra un título (elemento ``w:p``) al final del índice"""
+
+        self.titulos.append(Titulo(nivel, texto, parrafo))
+
+    def reservar(self, hueco):
+        """Fija el hueco del índice; los títulos posteriores serán sus entradas"""
+
+        self.hueco = hueco
+        self.emitido = False
+        self._inicio = len(self.titulos)
+        self._previstas = None
+        self._marcadas = 0
+
+    def entradas(self):
+        """Títulos posteriores al hueco dentro de los niveles del índice"""
+
+        return [titulo for titulo in self.titulos[self._inicio:] if 1 <= titulo.nivel <= NIVELES_INDICE]
+
+    def registrar_elementos(self, doc, elementos):
+        """Registra los títulos y el hueco de elementos ya insertados en el cuerpo.
+
+        Se usa con las secciones que no pasan por ``agregar_titulo`` en este
+        documento (fragmentos de la caché o renderizados en otro proceso): solo
+        se examinan los elementos de primer nivel insertados.
+        """
+
+        if self._niveles is None:
+            self._niveles = _niveles_titulo(doc)
+        for elemento in elementos:
+            if elemento.tag == _SDT and _es_hueco(elemento):
+                self.reservar(elemento)
+            elif elemento.tag == _P:
+                nivel = self._niveles.get(estilo_parrafo(elemento))
+                if nivel is not None:
+                    _quitar_marcadores(elemento)
+                    self.registrar(elemento, nivel)
+
+    def emitir(self, previstas=None):
+        """Rellena el hueco con el campo TOC y marca los títulos enlazados.
+
+        Con ``previstas`` (``Titulo`` sin párrafo de los títulos que aún no se
+        han agregado, como en streaming) las entradas salen de esa lista y los
+        títulos se marcan después, con ``marcar_previstos``.
+        """
+
+        if self.hueco is None or self.emitido:
+            return False
+        self.emitido = True
+        contenido = self.hueco.find(_CONTENIDO)
+        del contenido[:]
+
+        entradas = self.entradas() if previstas is None else previstas
+        self._previstas = previstas
+        if not entradas:
+            contenido.append(_parrafo_campo('', inicio=True, fin=True))
+            return True
+        for numero, titulo in enumerate(entradas, 1):
+            marcador = f"{PREFIJO_MARCADOR}{numero}"
+            if previstas is None:
+                _marcar(titulo.parrafo, marcador, numero)
+            texto = titulo.texto or texto_parrafo(titulo.parrafo)
+            enlace = (f'<w:hyperlink w:anchor="{marcador}" w:history="1">'
+                      f'{_ejecucion(texto)}</w:hyperlink>')
+            contenido.append(_parrafo_campo(
+                enlace, sangria=(titulo.nivel - 1) * SANGRIA_NIVEL,
+                inicio=numero == 1, fin=numero == len(entradas),
+            ))
+        return True
+
+    def marcar_previstos(self):
+        """Marca los títulos registrados desde la última llamada con sus entradas previstas"""
+
+        if self._previstas is None:
+            return
+        entradas = self.entradas()
+        if len(entradas) > len(self._previstas):
+            raise ValueError(f"El índice preveía {len(self._previstas)} títulos y hay {len(entradas)}")
+        for numero in range(self._marcadas + 1, len(entradas) + 1):
+            titulo, prevista = entradas[numero - 1], self._previstas[numero - 1]
+            texto = titulo.texto or texto_parrafo(titulo.parrafo)
+            if (titulo.nivel, texto) != (prevista.nivel, prevista.texto):
+                raise ValueError(f"El título '{texto}' no coincide con la entrada prevista "
+                                 f"del índice '{prevista.texto}'")
+            _marcar(titulo.parrafo, f"{PREFIJO_MARCADOR}{numero}", numero)
+        self._marcadas = len(entradas)
+
+
+def _niveles_titulo(doc):
+    """Devuelve ``{id de estilo: nivel}`` de los estilos de título del documento"""
+
+    niveles = {}
+    for estilo in doc.styles.element.style_lst:
+        nombre = estilo.name_val or ''
+        coincidencia = _TITULO.match(nombre)
+        if nombre.lower() == 'title':
+            niveles.setdefault(estilo.styleId, 0)
+        elif coincidencia:
+            niveles.setdefault(estilo.styleId, int(coincidencia.group(1)))
+    return niveles
+
+
+def _es_hueco(sdt):
+    galeria = sdt.find(_GALERIA_HUECO)
+    return galeria is not None and galeria.get(qn('w:val')) == _GALERIA
+
+
+def _quitar_marcadores(parrafo):
+    """Elimina los marcadores de índice de una emisión anterior"""
+
+    ids = set()
+    for marcador in parrafo.findall(_MARCADOR_INICIO):
+        if (marcador.get(_NOMBRE) or '').startswith(PREFIJO_MARCADOR):
+            ids.add(marcador.get(_ID))
+            parrafo.remove(marcador)
+    for marcador in parrafo.findall(_MARCADOR_FIN):
+        if marcador.get(_ID) in ids:
+            parrafo.remove(marcador)
+
+
+def _marcar(parrafo, nombre, numero):
+    """Rodea el contenido de un título con un marcador"""
+
+    inicio = parrafo.makeelement(_MARCADOR_INICIO, {_ID: str(numero), _NOMBRE: nombre})
+    fin = parrafo.makeelement(_MARCADOR_FIN, {_ID: str(numero)})
+    parrafo.insert(1 if len(parrafo) and parrafo[0].tag == _PPR else 0, inicio)
+    parrafo.append(fin)
+
+
+def _ejecucion(texto):
+    return f'<w:r><w:t xml:space="preserve">{escape(texto)}</w:t></w:r>' if texto else ''
+
+
+def _parrafo_campo(contenido, sangria=0, inicio=False, fin=False):
+    """Párrafo del índice; el primero abre el campo TOC y el último lo cierra"""
+
+    partes = []
+    if sangria:
+        partes.append(f'<w:pPr><w:ind w:left="{sangria}"/></w:pPr>')
+    if inicio:
+        partes.append('<w:r><w:fldChar w:fldCharType="begin"/></w:r>'
+                      f'<w:r><w:instrText xml:space="preserve">{INSTRUCCION_TOC}</w:instrText></w:r>'
+                      '<w:r><w:fldChar w:fldCharType="separate"/></w:r>')
+    partes.append(contenido)
+    if fin:
+        partes.append('<w:r><w:fldChar w:fldCharType="end"/></w:r>')
+    return parse_xml(f'<w:p {nsdecls("w")}>{"".join(partes)}</w:p>')
+
+
+def indice_titulos(doc):
+    """Devuelve el índice de títulos del documento, creándolo en el primer uso"""
+
+    parte = doc.part
+    indice = _indices.get(parte)
+    if indice is None:
+        indice = _indices[parte] = IndiceTitulos()
+    return indice
+
+
+def registrar_titulo(doc, parrafo, nivel, texto=''):
+    """Registra un título recién agregado (``Paragraph`` de python-docx)"""
+
+    indice_titulos(doc).registrar(parrafo._p, nivel, texto)
+
+
+def registrar_insertados(doc, elementos):
+    """Registra los títulos y el hueco de elementos insertados sin ``agregar_titulo``"""
+
+    indice_titulos(doc).registrar_elementos(doc, elementos)
+
+
+def reservar_indice(doc):
+    """Agrega al final del cuerpo el hueco del índice y lo devuelve"""
+
+    if isinstance(doc, DocumentoIR):
+        return doc.reservar_indice()
+    hueco = parse_xml(HUECO_INDICE)
+    cuerpo = doc.element.body
+    if cuerpo.sectPr is not None:
+        cuerpo.sectPr.addprevious(hueco)
+    else:
+        cuerpo.append(hueco)
+    indice_titulos(doc).reservar(hueco)
+    return hueco
+
+
+def emitir_indice(doc, previstas=None):
+    """Rellena el hueco del índice a partir de los títulos registrados.
+
+    Con ``previstas`` (``entradas_previstas``), a partir de los títulos que
+    se agregarán después. Devuelve False si no hay hueco o ya se emitió.
+    """
+
+    return indice_titulos(doc).emitir(previstas)
+
+
+def entradas_previstas(ir):
+    """Entradas del índice de una ``DocumentoIR`` (``Titulo`` sin párrafo)"""
+
+    huecos = [bloque for bloque in ir.bloques if bloque.tipo == 'indice']
+    if not huecos:
+        return []
+    return [Titulo(titulo.nivel, titulo.text, None) for titulo in huecos[-1].entradas(NIVELES_INDICE)]
+
+
+def marcar_previstos(doc):
+    """Coloca los marcadores de los títulos agregados tras emitir el índice por adelantado"""
+
+    indice_titulos(doc).marcar_previstos()
+
+
+def reconstruir_indice(doc, elementos):
+    """Vuelve a indexar los elementos del cuerpo y emite de nuevo el índice.
+
+    La regeneración incremental mueve secciones de sitio, así que el índice se
+    rehace a partir de los elementos de primer nivel ya ensamblados.
+    """
+
+    indice = _indices[doc.part] = IndiceTitulos()
+    indice.registrar_elementos(doc, elementos)
+    return indice.emitir()
@@ -0,0 +1,206 @@
+"""
+Instrumentación de la generación por secciones.
+
+Para cada sección ``agregar_*`` registra tiempo de reloj, tiempo de CPU,
+memoria asignada (tracemalloc) y el número de párrafos, ejecuciones (runs) y
+celdas de tabla creados; el guardado del documento se mide aparte.
+
+Está desactivada por defecto: el perfilador inactivo devuelve un contexto
+nulo y no mide nada. Se activa con la variable de entorno
+``GENERAR_WORD_PERFIL`` (``1`` o la ruta del informe .json/.csv) o con
+``activar_perfilador()``.
+"""
+
+import contextlib
+import csv
+import json
+import os
+import time
+import tracemalloc
+
+from docx.oxml.ns import qn
+
+from fragmentos import total_contenido
+
+VARIABLE_PERFIL = 'GENERAR_WORD_PERFIL'
+INFORME_POR_DEFECTO = 'perfil_generacion.json'
+
+_W_P = qn('w:p')
+_W_R = qn('w:r')
+_W_TC = qn('w:tc')
+
+_CONTEXTO_NULO = contextlib.nullcontext()
+
+CAMPOS_INFORME = [
+    'documento', 'seccion', 'segundos', 'cpu_segundos', 'memoria_neta_kb',
+    'memoria_pico_kb', 'parrafos', 'ejecuciones', 'celdas',
+]
+
+
+def _contar_elementos(elementos):
+    """Cuenta párrafos, ejecuciones y celdas dentro de los elementos dados"""
+
+    parrafos = ejecuciones = celdas = 0
+    for elemento in elementos:
+        for nodo in elemento.iter(_W_P, _W_R, _W_TC):
+            if nodo.tag == _W_P:
+                parrafos += 1
+            elif nodo.tag == _W_R:
+                ejecuciones += 1
+            else:
+                celdas += 1
+    return parrafos, ejecuciones, celdas
+
+
+class PerfiladorInactivo:
+    """Perfilador desactivado: no mide nada"""
+
+    activo = False
+    documento = None
+
+    def seccion(self, nombre, doc):
+        return _CONTEXTO_NULO
+
+    def guardado(self):
+        return _CONTEXTO_NULO
+
+
+class Perfilador:
+    """Acumula las mediciones de las secciones de uno o varios documentos"""
+
+    activo = True
+
+    def __init__(self, ruta_informe=INFORME_POR_DEFECTO):
+        self.ruta_informe = ruta_informe
+        self.documento = None
+        self.registros = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def seccion(self, nombre, doc):
+        """Mide una sección y cuenta los elementos que agregó al cuerpo"""
+
+        cuerpo = doc.element.body
+        inicio_elementos = total_contenido(cuerpo)
+        memoria_inicio, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        inicio_cpu = time.process_time()
+        inicio = time.perf_counter()
+
+        yield
+
+        segundos = time.perf_counter() - inicio
+        cpu_segundos = time.process_time() - inicio_cpu
+        memoria_fin, memoria_pico = tracemalloc.get_traced_memory()
+        parrafos, ejecuciones, celdas = _contar_elementos(
+            cuerpo[inicio_elementos:total_contenido(cuerpo)]
+        )
+        self.registros.append({
+            'documento': self.documento,
+            'seccion': nombre,
+            'segundos': segundos,
+            'cpu_segundos': cpu_segundos,
+            'memoria_neta_kb': (memoria_fin - memoria_inicio) / 1024,
+            'memoria_pico_kb': (memoria_pico - memoria_inicio) / 1024,
+            'parrafos': parrafos,
+            'ejecuciones': ejecuciones,
+            'celdas': celdas,
+        })
+
+    @contextlib.contextmanager
+    def guardado(self):
+        """Mide la serialización del documento"""
+
+        memoria_inicio, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        inicio_cpu = time.process_time()
+        inicio = time.perf_counter()
+
+        yield
+
+        memoria_fin, memoria_pico = tracemalloc.get_traced_memory()
+        self.registros.append({
+            'documento': self.documento,
+            'seccion': 'guardado',
+            'segundos': time.perf_counter() - inicio,
+            'cpu_segundos': time.process_time() - inicio_cpu,
+            'memoria_neta_kb': (memoria_fin - memoria_inicio) / 1024,
+            'memoria_pico_kb': (memoria_pico - memoria_inicio) / 1024,
+            'parrafos': 0,
+            'ejecuciones': 0,
+            'celdas': 0,
+        })
+
+    def resumen(self):
+        """Agrega los registros por sección, ordenados por tiempo total"""
+
+        totales = {}
+        for registro in self.registros:
+            total = totales.setdefault(registro['seccion'], {
+                'seccion': registro['seccion'], 'llamadas': 0, 'segundos': 0.0,
+                'cpu_segundos': 0.0, 'segundos_max': 0.0, 'memoria_pico_kb_max': 0.0,
+                'parrafos': 0, 'ejecuciones': 0, 'celdas': 0,
+            })
+            total['llamadas'] += 1
+            total['segundos'] += registro['segundos']
+            total['cpu_segundos'] += registro['cpu_segundos']
+            total['segundos_max'] = max(total['segundos_max'], registro['segundos'])
+            total['memoria_pico_kb_max'] = max(total['memoria_pico_kb_max'], registro['memoria_pico_kb'])
+            for campo in ('parrafos', 'ejecuciones', 'celdas'):
+                total[campo] += registro[campo]
+
+        tiempo_total = sum(total['segundos'] for total in totales.values()) or 1.0
+        for total in totales.values():
+            total['porcentaje'] = round(100 * total['segundos'] / tiempo_total, 2)
+        return sorted(totales.values(), key=lambda total: total['segundos'], reverse=True)
+
+    def escribir_informe(self, ruta=None):
+        """Escribe el informe en JSON (resumen y registros) o CSV (registros)"""
+
+        ruta = ruta or self.ruta_informe
+        if ruta.lower().endswith('.csv'):
+            with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+                escritor = csv.DictWriter(archivo, fieldnames=CAMPOS_INFORME)
+                escritor.writeheader()
+                escritor.writerows(self.registros)
+        else:
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                json.dump(
+                    {'resumen': self.resumen(), 'registros': self.registros},
+                    archivo, ensure_ascii=False, indent=2,
+                )
+        return ruta
+
+
+_perfilador = None
+
+
+def activar_perfilador(ruta_informe=INFORME_POR_DEFECTO):
+    """Activa la instrumentación en el proceso actual"""
+
+    global _perfilador
+    _perfilador = Perfilador(ruta_informe)
+    return _perfilador
+
+
+def obtener_perfilador():
+    """Devuelve el perfilador del proceso (inactivo salvo que se haya activado)"""
+
+    global _perfilador
+    if _perfilador is None:
+        valor = os.environ.get(VARIABLE_PERFIL, '')
+        if valor.lower() in ('', '0', 'false', 'no'):
+            _perfilador = PerfiladorInactivo()
+        elif valor.lower() in ('1', 'true', 'si', 'sí', 'yes'):
+            _perfilador = Perfilador()
+        else:
+            _perfilador = Perfilador(valor)
+    return _perfilador
+
+
+def reiniciar_perfilador():
+    """Olvida el perfilador actual para volver a leer la variable de entorno"""
+
+    global _perfilador
+    _perfilador = None
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Ingesta del inventario real de microservicios.
+
+Lee volcados de ``podman ps --format json``, ``podman inspect`` (arreglos
+JSON, objetos concatenados o JSON por líneas) y exportaciones CSV. Los JSON
+se decodifican objeto a objeto sobre un búfer de tamaño fijo, de modo que
+un volcado de miles de contenedores nunca se carga entero en memoria; de
+cada contenedor solo se conserva la fila compacta de la tabla. Los servicios
+repetidos (réplicas en varios hosts) se fusionan y el resultado se ordena
+por nombre.
+
+    podman ps -a --format json > host1.json
+    python src/generate_word.py --inventario host1.json host2.json --datos sistema.json
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import re
+import sys
+import time
+
+TAMANO_BLOQUE = 64 * 1024
+
+# Columnas aceptadas en las exportaciones CSV (en minúsculas)
+COLUMNAS_CSV = {
+    'nombre': ('nombre', 'name', 'servicio', 'names'),
+    'puerto': ('puerto', 'port', 'ports', 'puertos'),
+    'funcion': ('funcion', 'función', 'description', 'descripcion', 'descripción'),
+    'dependencias': ('dependencias', 'dependencies'),
+}
+
+# Etiquetas de contenedor de las que se toman la función y las dependencias
+ETIQUETAS_FUNCION = ('funcion', 'description', 'org.opencontainers.image.description')
+ETIQUETAS_DEPENDENCIAS = ('dependencias', 'dependencies')
+
+_SEPARADORES = ' \t\r\n,[]'
+_PUERTO_TEXTO = re.compile(r':(\d+)->')
+
+
+def _abrir(ruta):
+    """Abre una ruta de inventario ('-' = entrada estándar)"""
+
+    if ruta == '-':
+        return contextlib.nullcontext(sys.stdin)
+    return open(ruta, encoding='utf-8', newline='')
+
+
+def objetos_json(archivo, tamano_bloque=TAMANO_BLOQUE):
+    """Devuelve uno a uno los objetos de un arreglo JSON, objetos concatenados o JSON por líneas"""
+
+    decodificador = json.JSONDecoder()
+    buffer = ''
+    posicion = 0
+    fin_archivo = False
+    while True:
+        # Se saltan los separadores entre objetos (comas, corchetes y espacios)
+        while posicion < len(buffer) and buffer[posicion] in _SEPARADORES:
+            posicion += 1
+        if posicion >= len(buffer):
+            if fin_archivo:
+                return
+            buffer = archivo.read(tamano_bloque)
+            posicion = 0
+            fin_archivo = not buffer
+            continue
+
+        try:
+            objeto, final = decodificador.raw_decode(buffer, posicion)
+        except json.JSONDecodeError:
+            if fin_archivo:
+                raise
+            # Objeto incompleto: se descarta lo ya consumido y se lee otro bloque
+            bloque = archivo.read(tamano_bloque)
+            fin_archivo = not bloque
+            buffer = buffer[posicion:] + bloque
+            posicion = 0
+            continue
+
+        if isinstance(objeto, dict):
+            yield objeto
+        posicion = final
+
+
+def _etiqueta(etiquetas, claves):
+    for clave in claves:
+        if etiquetas.get(clave):
+            return etiquetas[clave]
+    return ''
+
+
+def _servicio_ps(contenedor):
+    """Normaliza un contenedor de ``podman ps --format json``"""
+
+    nombres = contenedor.get('Names') or []
+    nombre = nombres[0] if isinstance(nombres, list) and nombres else nombres
+
+    puertos = contenedor.get('Ports') or []
+    if isinstance(puertos, str):
+        # Versiones antiguas: "0.0.0.0:5001->5001/tcp, ..."
+        puertos = [int(puerto) for puerto in _PUERTO_TEXTO.findall(puertos)]
+    else:
+        puertos = [puerto.get('host_port') or puerto.get('hostPort') for puerto in puertos]
+
+    etiquetas = contenedor.get('Labels') or {}
+    return {
+        'nombre': nombre,
+        'puertos': [puerto for puerto in puertos if puerto],
+        'funcion': _etiqueta(etiquetas, ETIQUETAS_FUNCION),
+        'imagen': contenedor.get('Image', ''),
+        'dependencias': _etiqueta(etiquetas, ETIQUETAS_DEPENDENCIAS),
+    }
+
+
+def _servicio_inspect(contenedor):
+    """Normaliza un contenedor de ``podman inspect``"""
+
+    configuracion = contenedor.get('Config') or {}
+    red = contenedor.get('NetworkSettings') or {}
+    puertos = []
+    for enlaces in (red.get('Ports') or {}).values():
+        # Solo los puertos publicados en el host (los demás llegan sin enlaces)
+        puertos.extend(enlace.get('HostPort') for enlace in enlaces or [])
+
+    etiquetas = configuracion.get('Labels') or {}
+    return {
+        'nombre': contenedor.get('Name', '').lstrip('/'),
+        'puertos': [puerto for puerto in puertos if puerto],
+        'funcion': _etiqueta(etiquetas, ETIQUETAS_FUNCION),
+        'imagen': configuracion.get('Image', ''),
+        'dependencias': _etiqueta(etiquetas, ETIQUETAS_DEPENDENCIAS),
+    }
+
+
+def _servicios_csv(archivo):
+    """Devuelve los servicios de una exportación CSV fila a fila"""
+
+    lector = csv.DictReader(archivo)
+    columnas = {}
+    for campo in lector.fieldnames or []:
+        for destino, alias in COLUMNAS_CSV.items():
+            if campo.strip().lower() in alias:
+                columnas.setdefault(destino, campo)
+    if 'nombre' not in columnas:
+        raise ValueError(f"El CSV de inventario necesita una columna de nombre ({', '.join(COLUMNAS_CSV['nombre'])})")
+
+    for fila in lector:
+        puertos = fila.get(columnas.get('puerto'), '') or ''
+        yield {
+            'nombre': (fila[columnas['nombre']] or '').strip(),
+            'puertos': [puerto.strip() for puerto in re.split(r'[,;\s]+', puertos) if puerto.strip()],
+            'funcion': (fila.get(columnas.get('funcion'), '') or '').strip(),
+            'dependencias': (fila.get(columnas.get('dependencias'), '') or '').strip(),
+            'imagen': '',
+        }
+
+
+def leer_servicios(ruta):
+    """Devuelve los servicios de un volcado (JSON de podman o CSV) sin cargarlo entero"""
+
+    with _abrir(ruta) as archivo:
+        if ruta.lower().endswith('.csv'):
+            yield from _servicios_csv(archivo)
+            return
+        for contenedor in objetos_json(archivo):
+            if 'Config' in contenedor or 'NetworkSettings' in contenedor:
+                yield _servicio_inspect(contenedor)
+            else:
+                yield _servicio_ps(contenedor)
+
+
+def _clave_natural(nombre):
+    """Ordena 'servicio-10' después de 'servicio-9'"""
+
+    return [int(parte) if parte.isdigit() else parte.lower() for parte in re.split(r'(\d+)', nombre)]
+
+
+def _clave_puerto(puerto):
+    return (0, int(puerto)) if str(puerto).isdigit() else (1, str(puerto))
+
+
+def cargar_inventario(rutas):
+    """Fusiona los volcados y devuelve las filas de la tabla de microservicios.
+
+    Las filas tienen la forma de ``datos['microservicios']``:
+    ``(#, nombre, puerto, función, dependencias)``, ordenadas por nombre.
+    """
+
+    if isinstance(rutas, str):
+        rutas = [rutas]
+
+    servicios = {}
+    for ruta in rutas:
+        for servicio in leer_servicios(ruta):
+            nombre = servicio['nombre']
+            if not nombre:
+                continue
+            existente = servicios.get(nombre)
+            if existente is None:
+                servicios[nombre] = [set(map(str, servicio['puertos'])), servicio['funcion'],
+                                     servicio['dependencias'], servicio['imagen']]
+            else:
+                # Réplicas del mismo servicio: se acumulan los puertos publicados
+                # y se completan los campos que falten
+                existente[0].update(map(str, servicio['puertos']))
+                existente[1] = existente[1] or servicio['funcion']
+                existente[2] = existente[2] or servicio['dependencias']
+                existente[3] = existente[3] or servicio['imagen']
+
+    filas = []
+    for indice, nombre in enumerate(sorted(servicios, key=_clave_natural), 1):
+        puertos, funcion, dependencias, imagen = servicios[nombre]
+        puerto = ", ".join(sorted(puertos, key=_clave_puerto))
+        # Sin etiqueta de función se muestra la imagen del contenedor
+        filas.append((str(indice), nombre, puerto, funcion or imagen, dependencias))
+    return filas
+
+
+def aplicar_inventario(datos):
+    """Sustituye ``datos['inventario']`` (ruta o lista de rutas) por el listado de microservicios"""
+
+    if not datos or not datos.get('inventario'):
+        return datos
+    datos = dict(datos)
+    datos['microservicios'] = cargar_inventario(datos.pop('inventario'))
+    return datos
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Ingiere inventarios de contenedores (podman/CSV)")
+    parser.add_argument('volcados', nargs='+', help="Volcados JSON de podman o CSV ('-' = entrada estándar)")
+    parser.add_argument('-o', '--salida', help="Escribe las filas resultantes en un CSV")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    filas = cargar_inventario(args.volcados)
+    segundos = time.perf_counter() - inicio
+
+    if args.salida:
+        with open(args.salida, 'w', newline='', encoding='utf-8') as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(['#', 'nombre', 'puerto', 'funcion', 'dependencias'])
+            escritor.writerows(filas)
+        print(f"📁 Inventario: {args.salida}")
+    print(f"✅ {len(filas)} servicios en {segundos * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
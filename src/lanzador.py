@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Lanzador rápido de los generadores.
+
+Solo importa la biblioteca estándar: si hay un servidor fork en marcha
+(``servidor_fork.py``), le envía el trabajo por un socket Unix y el proceso
+residente, que ya tiene python-docx importado y la plantilla construida,
+crea un hijo para ejecutarlo. Si no hay servidor, genera en el propio
+proceso.
+
+    python src/lanzador.py transferencia --datos sistema.json -o salida.docx
+    python src/lanzador.py ejemplo
+"""
+
+import base64
+import json
+import os
+import socket
+import sys
+
+VARIABLE_SOCKET = 'GENERAR_WORD_SOCKET'
+
+# Programa -> módulo con una función main(argv)
+PROGRAMAS = {
+    'transferencia': 'generate_word',
+    'ejemplo': 'generar_documento',
+}
+
+
+def ruta_socket():
+    """Devuelve la ruta del socket del servidor fork"""
+
+    return os.environ.get(VARIABLE_SOCKET) or f"/tmp/generar_word_{os.getuid()}.sock"
+
+
+def leer_mensaje(conexion):
+    """Lee un mensaje JSON completo (hasta el cierre de escritura del otro extremo)"""
+
+    partes = []
+    while True:
+        bloque = conexion.recv(65536)
+        if not bloque:
+            break
+        partes.append(bloque)
+    return json.loads(b''.join(partes) or b'null')
+
+
+def ejecutar_en_servidor(programa, argv):
+    """Envía el trabajo al servidor fork; devuelve None si no hay servidor"""
+
+    conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conexion.connect(ruta_socket())
+    except (FileNotFoundError, ConnectionRefusedError):
+        conexion.close()
+        return None
+
+    with conexion:
+        trabajo = {
+            'programa': programa,
+            'argv': argv,
+            'cwd': os.getcwd(),
+            # El entorno completo: SOURCE_DATE_EPOCH, TZ o GENERAR_WORD_* cambian el documento
+            'entorno': dict(os.environ),
+        }
+        conexion.sendall(json.dumps(trabajo).encode('utf-8'))
+        conexion.shutdown(socket.SHUT_WR)
+        return leer_mensaje(conexion)
+
+
+def ejecutar_local(programa, argv):
+    """Ejecuta el programa en este proceso (sin servidor)"""
+
+    import importlib
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    modulo = importlib.import_module(PROGRAMAS[programa])
+    return modulo.main(argv) or 0
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in PROGRAMAS:
+        print(f"Uso: lanzador.py {{{','.join(PROGRAMAS)}}} [argumentos...]", file=sys.stderr)
+        return 2
+
+    programa, argumentos = argv[0], argv[1:]
+    respuesta = ejecutar_en_servidor(programa, argumentos)
+    if respuesta is None:
+        return ejecutar_local(programa, argumentos)
+
+    # La salida estándar llega en base64: puede ser un .docx (-o -)
+    sys.stdout.flush()
+    sys.stdout.buffer.write(base64.b64decode(respuesta.get('stdout', '')))
+    sys.stdout.buffer.flush()
+    sys.stderr.write(respuesta.get('stderr', ''))
+    return respuesta.get('codigo', 1)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
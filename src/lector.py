@@ -0,0 +1,153 @@
+"""
+Lectura en flujo del cuerpo de un .docx.
+
+``word/document.xml`` se recorre con ``iterparse`` sin construir el modelo de
+python-docx: cada bloque del cuerpo (párrafo o tabla) se entrega en cuanto
+termina de leerse y sus elementos se liberan a continuación, así que la
+memoria no crece con el tamaño del documento. Lo comparten el validador y la
+comparación estructural de documentos.
+"""
+
+import hashlib
+import re
+import zipfile
+from collections import namedtuple
+
+from lxml import etree
+
+from docx.oxml.ns import qn
+
+PARTE_DOCUMENTO = 'word/document.xml'
+PARTE_ESTILOS = 'word/styles.xml'
+
+# Bloque del cuerpo. Párrafos: ``texto``, ``estilo`` (id) y ``nivel`` de
+# título (None si no lo es; 0 = Title). Tablas: ``filas`` (textos de las
+# celdas), ``anchos`` (columnas que ocupa cada fila) y ``columnas`` (rejilla)
+Bloque = namedtuple('Bloque', 'tipo texto estilo nivel filas anchos columnas',
+                    defaults=(None, None, None, None, None, None))
+
+_TITULO = re.compile(r'heading (\d)$', re.IGNORECASE)
+
+_CUERPO = qn('w:body')
+_P = qn('w:p')
+_TBL = qn('w:tbl')
+_SDT = qn('w:sdt')
+_CONTENIDO_SDT = qn('w:sdtContent')
+_TR = qn('w:tr')
+_TC = qn('w:tc')
+_T = qn('w:t')
+# Elementos sin texto que separan el de un párrafo
+_SEPARADORES = {qn('w:br'): '\n', qn('w:cr'): '\n', qn('w:tab'): '\t'}
+_VAL = qn('w:val')
+_ESTILO_PARRAFO = f"{qn('w:pPr')}/{qn('w:pStyle')}"
+_REJILLA = qn('w:tblGrid')
+_EXTENSION_CELDA = f"{qn('w:tcPr')}/{qn('w:gridSpan')}"
+
+# Niveles de título por hash de la parte de estilos: los documentos generados
+# desde la misma plantilla comparten los estilos y se analizan una sola vez
+_niveles = {}
+
+
+def niveles_titulo(zf):
+    """Devuelve ``{id de estilo: nivel}`` de los estilos de título de un paquete"""
+
+    try:
+        contenido = zf.read(PARTE_ESTILOS)
+    except KeyError:
+        return {}
+    clave = hashlib.sha1(contenido).digest()
+    if clave in _niveles:
+        return _niveles[clave]
+
+    niveles = _niveles[clave] = {}
+    for estilo in etree.fromstring(contenido).iterchildren(qn('w:style')):
+        nombre = estilo.find(qn('w:name'))
+        if estilo.get(qn('w:type')) != 'paragraph' or nombre is None:
+            continue
+        nombre = nombre.get(_VAL, '')
+        coincidencia = _TITULO.match(nombre)
+        if nombre.lower() == 'title':
+            niveles[estilo.get(qn('w:styleId'))] = 0
+        elif coincidencia:
+            niveles[estilo.get(qn('w:styleId'))] = int(coincidencia.group(1))
+    return niveles
+
+
+def texto_parrafo(p):
+    """Texto de un párrafo; los saltos de línea y tabulaciones se conservan"""
+
+    partes = []
+    for nodo in p.iter(_T, *_SEPARADORES):
+        texto = nodo.text
+        if texto is None:
+            # Solo se consulta la etiqueta de los nodos sin texto (separadores o w:t vacíos)
+            texto = _SEPARADORES.get(nodo.tag, '')
+        partes.append(texto)
+    return ''.join(partes)
+
+
+def estilo_parrafo(p):
+    """Id del estilo de un párrafo o None"""
+
+    estilo = p.find(_ESTILO_PARRAFO)
+    return estilo.get(_VAL) if estilo is not None else None
+
+
+def leer_fila(tr):
+    """Devuelve los textos de las celdas de una fila y las columnas que ocupa"""
+
+    celdas = []
+    ancho = 0
+    for tc in tr.iterchildren(_TC):
+        celdas.append('\n'.join(texto_parrafo(p) for p in tc.iter(_P)))
+        extension = tc.find(_EXTENSION_CELDA)
+        ancho += int(extension.get(_VAL)) if extension is not None else 1
+    return tuple(celdas), ancho
+
+
+def _es_bloque(elemento):
+    """Indica si un elemento es un párrafo o tabla del cuerpo (también dentro de un sdt)"""
+
+    padre = elemento.getparent()
+    if padre.tag == _CUERPO:
+        return elemento.tag != _SDT
+    return padre.tag == _CONTENIDO_SDT and padre.getparent().getparent().tag == _CUERPO
+
+
+def leer_bloques(origen):
+    """Produce en orden los ``Bloque`` del cuerpo de un .docx (ruta o archivo)"""
+
+    with zipfile.ZipFile(origen) as zf:
+        niveles = niveles_titulo(zf)
+        filas = []
+        anchos = []
+        with zf.open(PARTE_DOCUMENTO) as xml:
+            for _, elemento in etree.iterparse(xml, events=('end',), tag=(_P, _TR, _TBL, _SDT),
+                                                huge_tree=True):
+                padre = elemento.getparent()
+                if elemento.tag == _TR:
+                    # Las filas de una tabla del cuerpo se leen y liberan una a una
+                    if _es_bloque(padre):
+                        celdas, ancho = leer_fila(elemento)
+                        filas.append(celdas)
+                        anchos.append(ancho)
+                        elemento.clear()
+                        while elemento.getprevious() is not None and elemento.getprevious().tag == _TR:
+                            del padre[padre.index(elemento) - 1]
+                    continue
+                if _es_bloque(elemento):
+                    if elemento.tag == _TBL:
+                        rejilla = elemento.find(_REJILLA)
+                        yield Bloque('tabla', filas=filas, anchos=anchos,
+                                     columnas=len(rejilla) if rejilla is not None else None)
+                        filas = []
+                        anchos = []
+                    else:
+                        estilo = estilo_parrafo(elemento)
+                        yield Bloque('parrafo', texto_parrafo(elemento), estilo, niveles.get(estilo))
+                    elemento.clear()
+                # Lo ya leído del cuerpo se libera para no acumular el árbol
+                if padre.tag == _CUERPO:
+                    elemento.clear()
+                    while elemento.getprevious() is not None:
+                        del padre[0]
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Generación por lotes de documentos de transferencia tecnológica.
+
+Lee un manifiesto (JSON o CSV, un registro por sistema) y reparte la
+construcción de los documentos entre varios procesos.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from fragmentos import CacheFragmentos
+from generate_word import (DATOS_POR_DEFECTO, SECCIONES, completar_datos, construir_documento,
+                           resolver_fecha)
+from instrumentacion import obtener_perfilador
+from plantilla import precargar_plantilla
+from reproducible import activar_reproducible
+from resultados import CacheResultados, clave_resultado, generar_con_cache
+from salida import guardar_documento
+
+# Caché de fragmentos de cada proceso trabajador (se crea en el primer uso)
+_cache_fragmentos = None
+
+
+def obtener_cache_fragmentos(directorio=None):
+    """Devuelve la caché de fragmentos del proceso actual"""
+
+    global _cache_fragmentos
+    if _cache_fragmentos is None:
+        _cache_fragmentos = CacheFragmentos(directorio=directorio)
+    return _cache_fragmentos
+
+
+def leer_manifiesto(ruta):
+    """Lee un manifiesto JSON o CSV y devuelve la lista de registros"""
+
+    if ruta.lower().endswith('.csv'):
+        with open(ruta, newline='', encoding='utf-8') as archivo:
+            # Las celdas vacías se omiten para que apliquen los valores por defecto
+            return [
+                {clave: valor for clave, valor in fila.items() if valor}
+                for fila in csv.DictReader(archivo)
+            ]
+
+    with open(ruta, encoding='utf-8') as archivo:
+        contenido = json.load(archivo)
+
+    # Se acepta una lista de registros o un objeto {"sistemas": [...]}
+    if isinstance(contenido, dict):
+        contenido = contenido.get('sistemas', [])
+    if not isinstance(contenido, list):
+        raise ValueError(f"Manifiesto inválido: {ruta}")
+    return contenido
+
+
+def nombre_archivo_registro(datos, indice):
+    """Devuelve el nombre de archivo de un registro del lote"""
+
+    if datos.get('archivo'):
+        return datos['archivo']
+
+    sistema = re.sub(r'[^A-Za-z0-9]+', '_', datos['sistema']).strip('_')
+    fecha = datos['fecha'].strftime('%Y%m%d')
+    return f"Transferencia_Tecnologica_{sistema or indice}_{fecha}.docx"
+
+
+def generar_registro(indice, datos, ruta_salida, directorio_cache=None, compresion=None,
+                     directorio_resultados=None, reproducible=False):
+    """Genera el documento de un registro aislando cualquier error.
+
+    Con ``directorio_resultados``, si el registro no cambió desde la última
+    ejecución se copia el documento guardado en lugar de generarlo.
+    """
+
+    if reproducible:
+        activar_reproducible()
+    inicio = time.perf_counter()
+    perfil = obtener_perfilador()
+    registros_previos = len(perfil.registros) if perfil.activo else 0
+    resultado = {'indice': indice, 'archivo': ruta_salida, 'sistema': datos.get('sistema')}
+    try:
+        # El inventario se ingiere en el trabajador para no enviar filas entre procesos
+        datos = completar_datos(datos)
+
+        def generar(destino):
+            doc = construir_documento(datos, cache=obtener_cache_fragmentos(directorio_cache))
+            with perfil.guardado():
+                guardar_documento(doc, destino, compresion)
+
+        cache = clave = None
+        if directorio_resultados:
+            cache = CacheResultados(directorio_resultados)
+            clave = clave_resultado(datos, SECCIONES, compresion)
+        resultado['reutilizado'] = generar_con_cache(cache, clave, ruta_salida, generar)
+        resultado['estado'] = 'ok'
+    except Exception as error:
+        resultado['estado'] = 'error'
+        resultado['error'] = f"{type(error).__name__}: {error}"
+        resultado['traza'] = traceback.format_exc()
+    resultado['segundos'] = round(time.perf_counter() - inicio, 4)
+    if perfil.activo:
+        # Las mediciones viajan con el resultado para agregarlas en el proceso principal
+        resultado['perfil'] = perfil.registros[registros_previos:]
+    return resultado
+
+
+def generar_lote(registros, directorio='.', trabajadores=None, directorio_cache=None,
+                 compresion=None, directorio_resultados=None, reproducible=False):
+    """Genera un documento por registro en paralelo y devuelve el resumen"""
+
+    os.makedirs(directorio, exist_ok=True)
+    inicio = time.perf_counter()
+
+    # Los nombres se asignan en el proceso principal para evitar colisiones
+    trabajos = []
+    resultados = []
+    usados = set()
+    for indice, registro in enumerate(registros, 1):
+        try:
+            # Para el nombre basta con sistema y fecha: inventario y diagramas se procesan
+            # en el trabajador
+            nombre = nombre_archivo_registro({
+                'archivo': registro.get('archivo'),
+                'sistema': registro.get('sistema', DATOS_POR_DEFECTO['sistema']),
+                'fecha': resolver_fecha(registro.get('fecha')),
+            }, indice)
+        except Exception as error:
+            resultados.append({
+                'indice': indice,
+                'archivo': None,
+                'sistema': registro.get('sistema'),
+                'estado': 'error',
+                'error': f"{type(error).__name__}: {error}",
+                'segundos': None,
+            })
+            continue
+        if nombre in usados:
+            base, extension = os.path.splitext(nombre)
+            nombre = f"{base}_{indice}{extension}"
+        usados.add(nombre)
+        # El trabajador recibe el registro original, con su inventario
+        trabajos.append((indice, registro, os.path.join(directorio, nombre)))
+
+    # Con fork los trabajadores heredan la plantilla ya construida y analizada
+    precargar_plantilla()
+    with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+        futuros = {
+            ejecutor.submit(
+                generar_registro, *trabajo, directorio_cache, compresion,
+                directorio_resultados, reproducible,
+            ): trabajo
+            for trabajo in trabajos
+        }
+        for futuro in as_completed(futuros):
+            indice, datos, ruta_salida = futuros[futuro]
+            try:
+                resultados.append(futuro.result())
+            except Exception as error:
+                # Fallo del proceso trabajador (p. ej. terminado por el sistema)
+                resultados.append({
+                    'indice': indice,
+                    'archivo': ruta_salida,
+                    'sistema': datos.get('sistema'),
+                    'estado': 'error',
+                    'error': f"{type(error).__name__}: {error}",
+                    'segundos': None,
+                })
+
+    resultados.sort(key=lambda resultado: resultado['indice'])
+    perfil = obtener_perfilador()
+    if perfil.activo:
+        for resultado in resultados:
+            perfil.registros.extend(resultado.pop('perfil', []))
+    segundos = time.perf_counter() - inicio
+    correctos = sum(1 for resultado in resultados if resultado['estado'] == 'ok')
+    reutilizados = sum(1 for resultado in resultados if resultado.get('reutilizado'))
+
+    return {
+        'total': len(resultados),
+        'correctos': correctos,
+        'errores': len(resultados) - correctos,
+        'reutilizados': reutilizados,
+        'trabajadores': trabajadores or os.cpu_count(),
+        'segundos': round(segundos, 4),
+        'documentos_por_segundo': round(correctos / segundos, 2) if segundos else None,
+        'resultados': resultados,
+    }
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Genera documentos de transferencia por lotes")
+    parser.add_argument('manifiesto', help="Archivo JSON o CSV con un registro por sistema")
+    parser.add_argument('-o', '--salida', default='.', help="Directorio de salida")
+    parser.add_argument('-j', '--trabajadores', type=int, default=None,
+                        help="Número de procesos (por defecto, uno por núcleo)")
+    parser.add_argument('--cache-fragmentos', default=None,
+                        help="Directorio para persistir la caché de fragmentos de sección")
+    parser.add_argument('--compresion', type=int, choices=range(10), metavar='0-9',
+                        help="Nivel de compresión del zip (0 = sin comprimir, 9 = máximo)")
+    parser.add_argument('--cache-resultados', default=None, metavar='DIRECTORIO',
+                        help="Reutiliza los documentos cuyas entradas no cambiaron desde la última ejecución")
+    parser.add_argument('--reproducible', action='store_true',
+                        help="Salida idéntica byte a byte para las mismas entradas")
+    parser.add_argument('--resumen', default=None,
+                        help="Ruta del resumen JSON (por defecto, resumen_lote.json en la salida)")
+    args = parser.parse_args(argv)
+
+    registros = leer_manifiesto(args.manifiesto)
+    print(f"🚀 Generando {len(registros)} documentos...")
+    resumen = generar_lote(
+        registros, args.salida, args.trabajadores, args.cache_fragmentos, args.compresion,
+        args.cache_resultados, args.reproducible,
+    )
+
+    ruta_resumen = args.resumen or os.path.join(args.salida, 'resumen_lote.json')
+    with open(ruta_resumen, 'w', encoding='utf-8') as archivo:
+        json.dump(resumen, archivo, ensure_ascii=False, indent=2)
+
+    for resultado in resumen['resultados']:
+        if resultado['estado'] != 'ok':
+            print(f"❌ [{resultado['indice']}] {resultado['sistema']}: {resultado['error']}")
+    print(f"✅ {resumen['correctos']}/{resumen['total']} documentos en {resumen['segundos']} s "
+          f"({resumen['documentos_por_segundo']} docs/s)")
+    if args.cache_resultados:
+        print(f"♻️  {resumen['reutilizados']} reutilizados de la caché de resultados")
+    print(f"📁 Resumen: {os.path.abspath(ruta_resumen)}")
+
+    perfil = obtener_perfilador()
+    if perfil.activo:
+        print(f"⏱️  Perfil de generación: {os.path.abspath(perfil.escribir_informe())}")
+
+    return 0 if resumen['errores'] == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Relleno masivo de marcadores ``[corchetes]`` sobre un documento existente.
+
+El documento (generado o editado a mano) se recorre una sola vez: para cada
+marcador se guarda en qué rangos de bytes del XML está su texto, aunque Word
+lo haya repartido entre varias ejecuciones. El índice se memoriza por proceso
+y, con ``GENERAR_WORD_CACHE``, se conserva en disco indexado por el hash del
+documento.
+
+Cada copia se produce sustituyendo solo esos rangos en los bytes del XML; el
+resto de entradas del zip se copian ya comprimidas, sin volver a leer el
+documento con python-docx ni regenerarlo.
+
+    python src/marcadores.py Transferencia.docx --listar
+    python src/marcadores.py Transferencia.docx registros.json -o rellenos/
+"""
+
+import argparse
+import hashlib
+import html
+import io
+import json
+import os
+import re
+import time
+import zipfile
+
+from plantilla import VARIABLE_CACHE
+from reproducible import info_zip
+from salida import abrir_destino, abrir_zip, escribir_comprimido, leer_comprimido
+
+# Incrementar si cambia el formato del índice
+VERSION_INDICE = 1
+
+# Partes del paquete en las que se buscan marcadores
+PARTES_TEXTO = re.compile(r'word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$')
+
+# Marcador: texto entre corchetes con al menos un carácter visible ("[ ]" es una casilla)
+MARCADOR = re.compile(r'\[[^\[\]]*[^\[\]\s][^\[\]]*\]')
+
+# Texto de las ejecuciones y límites entre los que un marcador no puede continuar
+# (párrafos, saltos de línea y tabulaciones)
+_NODOS = re.compile(
+    rb'<w:t(?:\s[^>]*)?>([^<]*)</w:t>'
+    rb'|<w:p[\s>/]|</w:p>|<w:(?:br|cr|tab)\b'
+)
+# Un carácter del contenido de w:t: referencia de entidad o carácter UTF-8
+_CARACTER = re.compile(rb'&[^;]*;|[\x00-\x7f]|[\xc0-\xff][\x80-\xbf]*')
+
+_indices = {}
+
+
+def _marcadores_parrafo(nodos, ocurrencias):
+    """Busca marcadores en el texto de un párrafo (lista de ``(inicio, contenido)``)"""
+
+    caracteres = []
+    posiciones = []  # (nodo, inicio, fin) en bytes de cada carácter
+    for numero, (inicio, contenido) in enumerate(nodos):
+        for caracter in _CARACTER.finditer(contenido):
+            texto = caracter.group()
+            caracteres.append(html.unescape(texto.decode('utf-8')) if texto[:1] == b'&'
+                              else texto.decode('utf-8'))
+            posiciones.append((numero, inicio + caracter.start(), inicio + caracter.end()))
+
+    texto = ''.join(caracteres)
+    # Una entidad de varios caracteres no aparece en el XML de Word; se ignora el desfase
+    if len(texto) != len(posiciones):
+        return
+    for marcador in MARCADOR.finditer(texto):
+        segmentos = []
+        for numero, inicio, fin in posiciones[marcador.start():marcador.end()]:
+            if segmentos and segmentos[-1][0] == numero:
+                segmentos[-1][2] = fin
+            else:
+                segmentos.append([numero, inicio, fin])
+        ocurrencias.append([marcador.group(), [[inicio, fin] for _, inicio, fin in segmentos]])
+
+
+def indexar_xml(xml):
+    """Devuelve los marcadores de una parte XML como ``[texto, [[inicio, fin], ...]]``.
+
+    Los rangos son posiciones en bytes dentro de ``xml``; un marcador partido
+    entre ejecuciones tiene un rango por ejecución.
+    """
+
+    ocurrencias = []
+    nodos = []
+    con_corchete = False
+    for nodo in _NODOS.finditer(xml):
+        contenido = nodo.group(1)
+        if contenido is not None:
+            nodos.append((nodo.start(1), contenido))
+            con_corchete = con_corchete or b'[' in contenido
+            continue
+        if con_corchete:
+            _marcadores_parrafo(nodos, ocurrencias)
+        nodos = []
+        con_corchete = False
+    if con_corchete:
+        _marcadores_parrafo(nodos, ocurrencias)
+    return ocurrencias
+
+
+def indexar_documento(contenido):
+    """Recorre los bytes de un .docx y devuelve el índice de marcadores por parte"""
+
+    partes = {}
+    with zipfile.ZipFile(io.BytesIO(contenido)) as zf:
+        for nombre in zf.namelist():
+            if PARTES_TEXTO.match(nombre):
+                ocurrencias = indexar_xml(zf.read(nombre))
+                if ocurrencias:
+                    partes[nombre] = ocurrencias
+    return {
+        'version': VERSION_INDICE,
+        'hash': hashlib.sha256(contenido).hexdigest(),
+        'partes': partes,
+    }
+
+
+def obtener_indice(contenido, directorio_cache=None):
+    """Devuelve el índice de un documento, construyéndolo solo la primera vez.
+
+    Se memoriza por proceso y, con ``directorio_cache`` (o la variable
+    ``GENERAR_WORD_CACHE``), se conserva en disco para otros procesos.
+    """
+
+    clave = hashlib.sha256(contenido).hexdigest()
+    if clave in _indices:
+        return _indices[clave]
+
+    directorio_cache = directorio_cache or os.environ.get(VARIABLE_CACHE)
+    ruta_cache = os.path.join(directorio_cache, f"marcadores_{clave[:16]}.json") if directorio_cache else None
+    indice = None
+    if ruta_cache and os.path.exists(ruta_cache):
+        with open(ruta_cache, encoding='utf-8') as archivo:
+            indice = json.load(archivo)
+        if indice.get('version') != VERSION_INDICE or indice.get('hash') != clave:
+            indice = None
+    if indice is None:
+        indice = indexar_documento(contenido)
+        if ruta_cache:
+            os.makedirs(directorio_cache, exist_ok=True)
+            # Escritura atómica para procesos concurrentes
+            temporal = f"{ruta_cache}.{os.getpid()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as archivo:
+                json.dump(indice, archivo, ensure_ascii=False)
+            os.replace(temporal, ruta_cache)
+
+    _indices[clave] = indice
+    return indice
+
+
+def rellenar_xml(xml, ocurrencias, valores):
+    """Sustituye en ``xml`` los marcadores con valor; los demás se conservan"""
+
+    cambios = []
+    for texto, segmentos in ocurrencias:
+        valor = valores.get(texto)
+        if valor is None:
+            continue
+        # El valor ocupa el primer fragmento del marcador; el resto se vacía
+        cambios.append((segmentos[0][0], segmentos[0][1], html.escape(str(valor), quote=False).encode('utf-8')))
+        cambios.extend((inicio, fin, b'') for inicio, fin in segmentos[1:])
+    if not cambios:
+        return xml
+
+    cambios.sort()
+    partes = []
+    anterior = 0
+    for inicio, fin, reemplazo in cambios:
+        partes.append(xml[anterior:inicio])
+        partes.append(reemplazo)
+        anterior = fin
+    partes.append(xml[anterior:])
+    return b''.join(partes)
+
+
+def normalizar_valores(registro):
+    """Acepta claves con o sin corchetes (``"Tu Nombre Completo"`` o ``"[Tu Nombre Completo]"``)"""
+
+    valores = {}
+    for clave, valor in registro.items():
+        if valor is None:
+            continue
+        clave = str(clave)
+        if not (clave.startswith('[') and clave.endswith(']')):
+            clave = f"[{clave}]"
+        valores[clave] = valor
+    return valores
+
+
+class DocumentoConMarcadores:
+    """Documento base preparado para producir copias rellenas"""
+
+    def __init__(self, ruta, directorio_cache=None):
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+        self.ruta = ruta
+        self.indice = obtener_indice(contenido, directorio_cache)
+
+        # Las partes con marcadores se guardan descomprimidas; el resto, tal
+        # como están en el zip para copiarlas sin recomprimir
+        self.entradas = []
+        with zipfile.ZipFile(io.BytesIO(contenido)) as zf:
+            for info in zf.infolist():
+                if info.filename in self.indice['partes']:
+                    self.entradas.append((info.filename, None, zf.read(info)))
+                elif info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                    self.entradas.append((info.filename, info, leer_comprimido(zf, info)))
+                else:
+                    self.entradas.append((info.filename, None, zf.read(info)))
+
+    def marcadores(self):
+        """Devuelve cada marcador distinto con su número de apariciones"""
+
+        recuento = {}
+        for ocurrencias in self.indice['partes'].values():
+            for texto, _ in ocurrencias:
+                recuento[texto] = recuento.get(texto, 0) + 1
+        return recuento
+
+    def rellenar(self, valores, destino, compresion=None):
+        """Escribe en ``destino`` una copia con los marcadores sustituidos"""
+
+        valores = normalizar_valores(valores)
+        with abrir_destino(destino) as archivo:
+            with abrir_zip(archivo, compresion) as zf:
+                for nombre, info, contenido in self.entradas:
+                    if info is not None:
+                        escribir_comprimido(zf, nombre, contenido, info.CRC, info.file_size,
+                                            info.compress_type)
+                        continue
+                    if nombre in self.indice['partes']:
+                        contenido = rellenar_xml(contenido, self.indice['partes'][nombre], valores)
+                    zf.writestr(info_zip(nombre, zf), contenido)
+
+
+def rellenar_copias(ruta, registros, directorio='.', compresion=None, directorio_cache=None):
+    """Produce una copia rellena por registro y devuelve el resumen"""
+
+    inicio = time.perf_counter()
+    base = DocumentoConMarcadores(ruta, directorio_cache)
+    preparacion = time.perf_counter() - inicio
+
+    os.makedirs(directorio, exist_ok=True)
+    nombre_base = os.path.splitext(os.path.basename(ruta))[0]
+    archivos = []
+    for indice, registro in enumerate(registros, 1):
+        registro = dict(registro)
+        nombre = registro.pop('archivo', None) or f"{nombre_base}_{indice}.docx"
+        destino = os.path.join(directorio, nombre)
+        base.rellenar(registro, destino, compresion)
+        archivos.append(destino)
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'total': len(archivos),
+        'marcadores': len(base.marcadores()),
+        'preparacion_segundos': round(preparacion, 4),
+        'segundos': round(segundos, 4),
+        'copias_por_segundo': round(len(archivos) / segundos, 2) if segundos else None,
+        'archivos': archivos,
+    }
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    from lote import leer_manifiesto
+
+    parser = argparse.ArgumentParser(description="Rellena los marcadores [corchetes] de un documento")
+    parser.add_argument('documento', help="Documento .docx con marcadores")
+    parser.add_argument('registros', nargs='?',
+                        help="JSON o CSV con un registro por copia (claves = texto del marcador)")
+    parser.add_argument('-o', '--salida', default='.', help="Directorio de salida")
+    parser.add_argument('--listar', action='store_true', help="Solo muestra los marcadores encontrados")
+    parser.add_argument('--compresion', type=int, choices=range(10), metavar='0-9',
+                        help="Nivel de compresión de las partes modificadas")
+    args = parser.parse_args(argv)
+
+    if args.listar or not args.registros:
+        for texto, veces in sorted(DocumentoConMarcadores(args.documento).marcadores().items()):
+            print(f"{veces:4d}  {texto}")
+        return 0
+
+    resumen = rellenar_copias(args.documento, leer_manifiesto(args.registros), args.salida, args.compresion)
+    print(f"✅ {resumen['total']} copias en {resumen['segundos']} s "
+          f"({resumen['copias_por_segundo']} copias/s, {resumen['marcadores']} marcadores)")
+    print(f"📁 Salida: {os.path.abspath(args.salida)}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,196 @@
+"""
+Renderizado de las secciones de un documento en varios procesos.
+
+Las secciones solo dependen de sus entradas (``ENTRADAS_SECCIONES``) y de su
+posición en el cuerpo. Se reparten en un lote de secciones consecutivas por
+proceso trabajador, que las renderiza sobre un documento propio creado desde
+la misma plantilla. Cada sección que solo usa los estilos y la numeración de
+la plantilla y no tiene relaciones ni marcadores vuelve como un fragmento XML
+que se inserta tal cual; las demás (p. ej. diagramas) se
+vuelve a renderizar en el proceso principal en su posición, de modo que los
+ids de relación y las imágenes del paquete salen en el mismo orden que en la
+generación secuencial y el resultado es idéntico byte a byte. Las secciones
+se ensamblan en orden y el tiempo total pasa a depender de la sección más
+larga y no de la suma de todas.
+
+El pool de procesos se crea una sola vez por proceso y número de
+trabajadores y se reutiliza entre documentos (o lo aporta el llamador).
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree
+
+from docx.oxml.ns import qn
+
+from fragmentos import (
+    _usa_relaciones,
+    clave_seccion,
+    insertar_fragmento,
+    serializar_fragmento,
+    total_contenido,
+)
+from indice import registrar_insertados
+from instrumentacion import obtener_perfilador
+from plantilla import nuevo_documento, precargar_plantilla
+
+# Pools de procesos por número de trabajadores (solo válidos en el proceso que los creó)
+_ejecutores = {}
+_pid_ejecutores = None
+
+
+def _huella_definiciones(doc):
+    """Hash de las partes de estilos y numeración de un documento"""
+
+    h = hashlib.sha256(etree.tostring(doc.styles.element))
+    h.update(etree.tostring(doc.part.numbering_part.element))
+    return h.hexdigest()
+
+
+_huella_plantilla = None
+
+
+def _definiciones_intactas(doc):
+    """Indica si el documento conserva los estilos y la numeración de la plantilla"""
+
+    global _huella_plantilla
+    if _huella_plantilla is None:
+        _huella_plantilla = _huella_definiciones(nuevo_documento())
+    return _huella_definiciones(doc) == _huella_plantilla
+
+
+def _es_autonomo(elementos):
+    """Indica si los elementos se pueden insertar en otro documento de la plantilla sin ajustes"""
+
+    if _usa_relaciones(elementos):
+        return False
+    return not any(True for elemento in elementos for _ in elemento.iter(qn('w:bookmarkStart')))
+
+
+def renderizar_en_trabajador(trabajos):
+    """Renderiza en orden las secciones de ``trabajos`` (pares ``(seccion, datos)``).
+
+    Comparten un documento de la plantilla para no pagar su creación por
+    sección. Devuelve el fragmento XML de cada sección, o None si debe
+    renderizarse en el documento principal (usa relaciones, marcadores o
+    cambió los estilos o la numeración).
+    """
+
+    doc = nuevo_documento()
+    cuerpo = doc.element.body
+    partes = []
+    for seccion, datos in trabajos:
+        inicio = total_contenido(cuerpo)
+        seccion(doc, datos)
+        partes.append(cuerpo[inicio:total_contenido(cuerpo)])
+    if not _definiciones_intactas(doc):
+        return [None] * len(partes)
+    return [
+        serializar_fragmento(elementos, doc.element.nsmap) if _es_autonomo(elementos) else None
+        for elementos in partes
+    ]
+
+
+def obtener_ejecutor(procesos=None):
+    """Devuelve el pool de ``procesos`` trabajadores de este proceso, creándolo en el primer uso"""
+
+    global _pid_ejecutores
+    if _pid_ejecutores != os.getpid():
+        # Un proceso hijo creado con fork no puede usar los pools del padre
+        _ejecutores.clear()
+        _pid_ejecutores = os.getpid()
+    procesos = procesos or os.cpu_count()
+    ejecutor = _ejecutores.get(procesos)
+    if ejecutor is None:
+        # Con fork los trabajadores heredan la plantilla ya construida y analizada
+        precargar_plantilla()
+        ejecutor = _ejecutores[procesos] = ProcessPoolExecutor(max_workers=procesos)
+    return ejecutor
+
+
+def cerrar_ejecutores():
+    """Detiene los pools creados por ``obtener_ejecutor``.
+
+    Al terminar el intérprete se detienen solos, pero un proceso que es a su
+    vez trabajador de multiprocessing (o sale con ``os._exit``) debe llamarla
+    antes de terminar: si no, esperaría indefinidamente a los procesos del pool.
+    """
+
+    while _ejecutores:
+        _, ejecutor = _ejecutores.popitem()
+        ejecutor.shutdown()
+
+
+def _datos_seccion(datos, entradas):
+    # Solo viajan al trabajador los datos de los que depende la sección
+    if entradas is None:
+        return datos
+    return {clave: datos[clave] for clave in entradas if clave in datos}
+
+
+def agregar_secciones_en_paralelo(doc, secciones, entradas_secciones, datos, procesos=None,
+                                  despues_de_seccion=None, cache=None, ejecutor=None):
+    """Agrega las secciones en orden renderizándolas en ``procesos`` procesos.
+
+    Los aciertos de ``cache`` se insertan directamente y las secciones cuyas
+    entradas no se pueden serializar (p. ej. iteradores) o que no son
+    autónomas se renderizan en el proceso principal. ``ejecutor`` es un pool
+    propio del llamador; por defecto se reutiliza el de ``obtener_ejecutor``.
+    Devuelve las huellas de las secciones como ``agregar_secciones``.
+    """
+
+    perfil = obtener_perfilador()
+    cuerpo = doc.element.body
+    if ejecutor is None:
+        ejecutor = obtener_ejecutor(procesos)
+
+    claves = {}
+    fragmentos = {}
+    for seccion in secciones:
+        claves[seccion] = clave_seccion(seccion, datos, entradas_secciones.get(seccion))
+        if cache is not None and claves[seccion] is not None:
+            fragmentos[seccion] = cache.obtener(claves[seccion])
+
+    remotas = [
+        seccion for seccion in secciones
+        if fragmentos.get(seccion) is None
+        and (claves[seccion] is not None or entradas_secciones.get(seccion) is None)
+    ]
+    # Un lote de secciones consecutivas por trabajador
+    tamano = -(-len(remotas) // (procesos or os.cpu_count())) or 1
+    futuros = {}
+    for posicion in range(0, len(remotas), tamano):
+        lote = remotas[posicion:posicion + tamano]
+        futuro = ejecutor.submit(renderizar_en_trabajador, [
+            (seccion, _datos_seccion(datos, entradas_secciones.get(seccion))) for seccion in lote
+        ])
+        for orden, seccion in enumerate(lote):
+            futuros[seccion] = (futuro, orden)
+
+    huellas = []
+    for seccion in secciones:
+        clave = claves[seccion]
+        inicio = total_contenido(cuerpo)
+        with perfil.seccion(seccion.__name__, doc):
+            fragmento = fragmentos.get(seccion)
+            if fragmento is None and seccion in futuros:
+                futuro, orden = futuros.pop(seccion)
+                fragmento = futuro.result()[orden]
+            if fragmento is not None:
+                insertar_fragmento(doc, fragmento)
+                # Los títulos se agregaron en otro documento: se registran en el índice de este
+                registrar_insertados(doc, cuerpo[inicio:total_contenido(cuerpo)])
+            else:
+                seccion(doc, datos)
+        nuevos = cuerpo[inicio:total_contenido(cuerpo)]
+
+        # Como en renderizar_seccion: solo se guardan fragmentos sin relaciones
+        if (cache is not None and clave is not None and fragmentos.get(seccion) is None
+                and not _usa_relaciones(nuevos)):
+            cache.guardar(clave, serializar_fragmento(nuevos, doc.element.nsmap))
+        huellas.append({'seccion': seccion.__name__, 'hash': clave, 'elementos': len(nuevos)})
+        if despues_de_seccion is not None:
+            despues_de_seccion(seccion)
+    return huellas
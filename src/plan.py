@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Especificación declarativa del documento compilada a un plan de renderizado.
+
+La estructura del documento (secciones, títulos, tablas, bloques de código,
+listas) se describe en un archivo JSON o YAML; la incluida es la misma que
+interpretan las secciones de ``generate_word.py`` (``especificacion.py``). Se
+valida y compila una sola vez: los estilos quedan resueltos a sus ids, los
+anchos de tabla calculados y el XML de los bloques que no dependen de los
+datos ya construido. El plan resultante solo contiene tipos JSON, de modo que
+se conserva en disco (JSON, indexado por el hash de la especificación) y se
+comparte entre procesos; renderizarlo para cada registro se reduce a formatear los campos
+variables e insertar el XML.
+
+    python src/plan.py --datos sistema.json -o salida.docx
+    python src/plan.py --especificacion otra.yaml --datos sistema.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from docx.shared import Inches
+from docx.oxml.ns import nsdecls
+
+from codigo import ESTILO_CODIGO, codigo_xml
+from diagramas import diagrama_xml
+from especificacion import (
+    cargar_especificacion,
+    campos_texto,
+    referencias_bloque,
+    valores_campos,
+)
+from estilos import resolver_estilo
+from fragmentos import insertar_fragmento, total_contenido
+from generate_word import (
+    DATOS_POR_DEFECTO,
+    completar_datos,
+    crear_documento_base,
+    nombre_archivo_por_defecto,
+)
+from indice import HUECO_INDICE, emitir_indice, registrar_insertados
+from instrumentacion import obtener_perfilador
+from plantilla import VARIABLE_CACHE, hash_estilos, nuevo_documento
+from salida import guardar_documento
+from tablas import _texto_xml, tabla_xml
+
+# Incrementar si cambia el formato del plan compilado
+VERSION_PLAN = 5
+
+# Campos obligatorios y opcionales de cada tipo de bloque (``indice`` en los títulos
+# y ``niveles`` en el índice se aceptan por compatibilidad: el índice lo forman los
+# títulos emitidos, como en generate_word)
+BLOQUES = {
+    'titulo': ({'texto'}, {'nivel', 'alineacion', 'indice', 'si'}),
+    'parrafo': (set(), {'texto', 'partes', 'estilo', 'sangria', 'si', 'sin'}),
+    'salto_pagina': (set(), set()),
+    'codigo': ({'lineas'}, {'estilo', 'lenguaje', 'fuente', 'tamano'}),
+    'tabla': (set(), {'encabezados', 'filas', 'datos', 'estilo', 'anchos',
+                      'negrita_encabezado', 'negrita_primera_columna'}),
+    'comandos': ({'datos'}, {'estilo'}),
+    'verificacion': ({'elementos'}, {'marca'}),
+    'lista': ({'elementos'}, {'estilo', 'prefijo'}),
+    'indice': (set(), {'niveles'}),
+    'diagrama': ({'datos'}, {'ancho', 'nivel'}),
+}
+
+ALINEACIONES = {'izquierda': 'left', 'centro': 'center', 'derecha': 'right', 'justificado': 'both'}
+
+_SALTO_PAGINA = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+_PARRAFO_VACIO = '<w:p/>'
+
+_planes = {}
+
+
+def hash_especificacion(especificacion):
+    """Devuelve el hash de la especificación, los estilos y la versión del plan"""
+
+    contenido = json.dumps([VERSION_PLAN, especificacion, hash_estilos()], sort_keys=True)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def validar_especificacion(especificacion):
+    """Comprueba la estructura de la especificación; lanza ValueError con todos los errores"""
+
+    errores = []
+    if not isinstance(especificacion, dict) or not isinstance(especificacion.get('secciones'), list):
+        raise ValueError("La especificación debe ser un objeto con una lista 'secciones'")
+
+    nombres = set()
+    for i, seccion in enumerate(especificacion['secciones']):
+        ruta = f"secciones[{i}]"
+        if not isinstance(seccion, dict) or not seccion.get('nombre'):
+            errores.append(f"{ruta}: falta 'nombre'")
+            continue
+        if seccion['nombre'] in nombres:
+            errores.append(f"{ruta}: sección duplicada '{seccion['nombre']}'")
+        nombres.add(seccion['nombre'])
+
+        for j, bloque in enumerate(seccion.get('bloques', [])):
+            ruta_bloque = f"{ruta}.bloques[{j}]"
+            tipo = bloque.get('tipo') if isinstance(bloque, dict) else None
+            if tipo not in BLOQUES:
+                errores.append(f"{ruta_bloque}: tipo desconocido {tipo!r}")
+                continue
+            obligatorios, opcionales = BLOQUES[tipo]
+            claves = set(bloque) - {'tipo'}
+            for clave in sorted(obligatorios - claves):
+                errores.append(f"{ruta_bloque}: falta '{clave}'")
+            for clave in sorted(claves - obligatorios - opcionales):
+                errores.append(f"{ruta_bloque}: campo desconocido '{clave}'")
+
+            if tipo == 'tabla' and ('filas' in bloque) == ('datos' in bloque):
+                errores.append(f"{ruta_bloque}: la tabla necesita 'filas' o 'datos' (solo uno)")
+            if tipo == 'titulo' and not 0 <= bloque.get('nivel', 1) <= 9:
+                errores.append(f"{ruta_bloque}: nivel de título fuera de rango")
+            if bloque.get('alineacion', 'izquierda') not in ALINEACIONES:
+                errores.append(f"{ruta_bloque}: alineación desconocida {bloque['alineacion']!r}")
+
+            # Los campos referenciados deben existir en los datos de un sistema
+            referencias = referencias_bloque(bloque)
+            for campo in sorted(referencias - set(DATOS_POR_DEFECTO)):
+                errores.append(f"{ruta_bloque}: campo de datos desconocido '{campo}'")
+
+    if errores:
+        raise ValueError("Especificación inválida:\n  - " + "\n  - ".join(errores))
+
+
+def _parrafo_xml(contenido='', estilo_id=None, sangria=None, alineacion=None):
+    """Devuelve el XML de un párrafo (``contenido`` son las ejecuciones ya construidas)"""
+
+    propiedades = ''
+    if estilo_id:
+        propiedades += f'<w:pStyle w:val="{estilo_id}"/>'
+    if sangria is not None:
+        propiedades += f'<w:ind w:left="{sangria}"/>'
+    if alineacion:
+        propiedades += f'<w:jc w:val="{alineacion}"/>'
+    if propiedades:
+        propiedades = f'<w:pPr>{propiedades}</w:pPr>'
+    if not propiedades and not contenido:
+        return _PARRAFO_VACIO
+    return f'<w:p>{propiedades}{contenido}</w:p>'
+
+
+def _ejecucion_xml(texto, propiedades=''):
+    """Devuelve el XML de una ejecución (vacío si no hay texto)"""
+
+    contenido = _texto_xml(texto)
+    if not contenido:
+        return ''
+    return f'<w:r>{"<w:rPr>" + propiedades + "</w:rPr>" if propiedades else ""}{contenido}</w:r>'
+
+
+def _sangria_twips(pulgadas):
+    return Inches(pulgadas).twips
+
+
+class _Compilador:
+    """Traduce la especificación a pasos de renderizado"""
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def estilo_parrafo(self, nombre):
+        """Resuelve un estilo de párrafo a su id (KeyError si no existe)"""
+
+        return resolver_estilo(self.doc, nombre)
+
+    def estilo_titulo(self, nivel):
+        return self.estilo_parrafo('Title' if nivel == 0 else f'Heading {nivel}')
+
+    def compilar_bloque(self, bloque):
+        """Devuelve los pasos de un bloque: cadenas XML fijas o tuplas dinámicas"""
+
+        tipo = bloque['tipo']
+
+        if tipo == 'salto_pagina':
+            return [_SALTO_PAGINA]
+
+        if tipo == 'titulo':
+            paso = self._parrafo(
+                [{'texto': bloque['texto']}],
+                estilo_id=self.estilo_titulo(bloque.get('nivel', 1)),
+                alineacion=ALINEACIONES.get(bloque.get('alineacion')),
+            )
+            if 'si' in bloque:
+                return [('si', bloque['si'], [paso])]
+            return [paso]
+
+        if tipo == 'parrafo':
+            partes = bloque.get('partes')
+            if partes is None:
+                partes = [{'texto': bloque['texto']}] if bloque.get('texto') else []
+            sangria = bloque.get('sangria')
+            paso = self._parrafo(
+                partes,
+                estilo_id=self.estilo_parrafo(bloque['estilo']) if 'estilo' in bloque else None,
+                sangria=None if sangria is None else _sangria_twips(sangria),
+                alineacion=ALINEACIONES.get(bloque.get('alineacion')),
+            )
+            if 'si' in bloque:
+                return [('si', bloque['si'], [paso])]
+            if 'sin' in bloque:
+                return [('sin', bloque['sin'], [paso])]
+            return [paso]
+
+        if tipo == 'codigo':
+            # Un solo párrafo con el estilo de código; fuente y tamaño solo si se fuerzan
+            propiedades = ''
+            if 'fuente' in bloque:
+                propiedades += '<w:rFonts w:ascii="{0}" w:hAnsi="{0}"/>'.format(bloque['fuente'])
+            if 'tamano' in bloque:
+                propiedades += f'<w:sz w:val="{int(bloque["tamano"] * 2)}"/>'
+            return [codigo_xml(
+                bloque['lineas'], self.estilo_parrafo(bloque.get('estilo', ESTILO_CODIGO)),
+                bloque.get('lenguaje'), propiedades,
+            )]
+
+        if tipo == 'verificacion':
+            marca = bloque.get('marca', '✓')
+            return [''.join(
+                _parrafo_xml(_ejecucion_xml(
+                    f"{estado} {descripcion}", '<w:b/>' if estado == marca else '<w:b w:val="0"/>'
+                ))
+                for estado, descripcion in bloque['elementos']
+            )]
+
+        if tipo == 'lista':
+            estilo_id = self.estilo_parrafo(bloque.get('estilo', 'List Bullet'))
+            prefijo = bloque.get('prefijo', '')
+            return [''.join(
+                _parrafo_xml(_ejecucion_xml(f"{prefijo}{elemento}"), estilo_id=estilo_id)
+                for elemento in bloque['elementos']
+            )]
+
+        if tipo == 'indice':
+            # Solo el hueco: se rellena al final con los títulos insertados (indice.py)
+            return [HUECO_INDICE]
+
+        if tipo == 'comandos':
+            return [('comandos', bloque['datos'], self.estilo_parrafo(bloque.get('estilo', ESTILO_CODIGO)))]
+
+        if tipo == 'tabla':
+            return [self._tabla(bloque)]
+
+        if tipo == 'diagrama':
+            # Las imágenes se relacionan con cada documento al renderizar
+            ancho = Inches(bloque['ancho']) if 'ancho' in bloque else None
+            return [('diagrama', bloque['datos'], ancho, self.estilo_titulo(bloque.get('nivel', 3)))]
+
+        raise ValueError(f"tipo de bloque desconocido {tipo!r}")
+
+    def _parrafo(self, partes, estilo_id=None, sangria=None, alineacion=None):
+        """Párrafo fijo (XML) o, si tiene campos, plantilla a formatear al renderizar"""
+
+        partes = [(parte.get('texto', ''), '<w:b/>' if parte.get('negrita') else '') for parte in partes]
+        if any(campos_texto(texto) for texto, _ in partes):
+            return ('parrafo', partes, estilo_id, sangria, alineacion)
+        contenido = ''.join(_ejecucion_xml(texto, propiedades) for texto, propiedades in partes)
+        return _parrafo_xml(contenido, estilo_id, sangria, alineacion)
+
+    def _tabla(self, bloque):
+        """Tabla fija (XML) o paso dinámico con estilo y anchos ya resueltos"""
+
+        opciones = {
+            'encabezados': bloque.get('encabezados'),
+            'estilo_id': resolver_estilo(self.doc, bloque['estilo']) if bloque.get('estilo') else None,
+            'anchos': [Inches(ancho) for ancho in bloque['anchos']] if bloque.get('anchos') else None,
+            'ancho_total': self.doc._block_width,
+            'negrita_encabezado': bloque.get('negrita_encabezado', True),
+            'negrita_primera_columna': bloque.get('negrita_primera_columna', False),
+        }
+        if 'datos' in bloque:
+            return ('tabla', bloque['datos'], None, opciones)
+
+        filas = [[str(valor) for valor in fila] for fila in bloque['filas']]
+        if any(campos_texto(valor) for fila in filas for valor in fila):
+            return ('tabla', None, filas, opciones)
+        return tabla_xml(filas, **opciones)
+
+
+def compilar_plan(especificacion):
+    """Valida la especificación y la compila en un plan de renderizado"""
+
+    validar_especificacion(especificacion)
+    # Los estilos y el ancho de página se resuelven contra la plantilla base
+    compilador = _Compilador(nuevo_documento())
+
+    secciones = []
+    campos = set()
+    for seccion in especificacion['secciones']:
+        pasos = []
+        entradas = set()
+        for bloque in seccion.get('bloques', []):
+            entradas |= referencias_bloque(bloque)
+            for paso in compilador.compilar_bloque(bloque):
+                # Los fragmentos fijos consecutivos se concatenan en uno solo
+                if isinstance(paso, str) and pasos and isinstance(pasos[-1], str):
+                    pasos[-1] += paso
+                else:
+                    pasos.append(paso)
+        campos |= entradas
+        secciones.append({
+            'nombre': seccion['nombre'],
+            'entradas': tuple(sorted(entradas)),
+            'pasos': pasos,
+        })
+
+    plan = {
+        'version': VERSION_PLAN,
+        'hash': hash_especificacion(especificacion),
+        'titulo': especificacion.get('titulo'),
+        'campos': sorted(campos),
+        'secciones': secciones,
+    }
+    # Se usa tal como queda en disco (listas en lugar de tuplas, longitudes como enteros)
+    return json.loads(json.dumps(plan))
+
+
+def obtener_plan(ruta=None, directorio_cache=None):
+    """Devuelve el plan compilado de una especificación.
+
+    Se memoriza por proceso y, con ``directorio_cache`` (o la variable
+    ``GENERAR_WORD_CACHE``), se conserva en disco para otros procesos.
+    """
+
+    especificacion = cargar_especificacion(ruta)
+    clave = hash_especificacion(especificacion)
+    if clave in _planes:
+        return _planes[clave]
+
+    directorio_cache = directorio_cache or os.environ.get(VARIABLE_CACHE)
+    # JSON y no pickle: el directorio de caché puede ser compartido y cargar un
+    # pickle ajeno ejecutaría código
+    ruta_cache = os.path.join(directorio_cache, f"plan_{clave[:16]}.json") if directorio_cache else None
+    if ruta_cache and os.path.exists(ruta_cache):
+        with open(ruta_cache, encoding='utf-8') as archivo:
+            plan = json.load(archivo)
+    else:
+        plan = compilar_plan(especificacion)
+        if ruta_cache:
+            os.makedirs(directorio_cache, exist_ok=True)
+            # Escritura atómica para procesos concurrentes
+            temporal = f"{ruta_cache}.{os.getpid()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as archivo:
+                json.dump(plan, archivo, ensure_ascii=False)
+            os.replace(temporal, ruta_cache)
+
+    _planes[clave] = plan
+    return plan
+
+
+def _renderizar_paso(paso, doc, datos, valores, partes):
+    """Agrega a ``partes`` el XML de un paso del plan"""
+
+    if isinstance(paso, str):
+        partes.append(paso)
+        return
+
+    tipo = paso[0]
+    if tipo == 'parrafo':
+        _, plantilla, estilo_id, sangria, alineacion = paso
+        contenido = ''.join(
+            _ejecucion_xml(texto.format_map(valores), propiedades) for texto, propiedades in plantilla
+        )
+        partes.append(_parrafo_xml(contenido, estilo_id, sangria, alineacion))
+    elif tipo in ('si', 'sin'):
+        _, campo, pasos = paso
+        if bool(datos.get(campo)) == (tipo == 'si'):
+            for anidado in pasos:
+                _renderizar_paso(anidado, doc, datos, valores, partes)
+    elif tipo == 'tabla':
+        _, campo, filas, opciones = paso
+        if campo is not None:
+            filas = datos[campo]
+        else:
+            filas = [[valor.format_map(valores) for valor in fila] for fila in filas]
+        partes.append(tabla_xml(filas, **opciones))
+    elif tipo == 'comandos':
+        _, campo, estilo_id = paso
+        partes.append(codigo_xml(datos[campo], estilo_id, datos.get('resaltado_comandos')))
+    elif tipo == 'diagrama':
+        # Una ruta o, con un diccionario, un título (con el nombre) y un diagrama por entrada
+        _, campo, ancho, estilo_id = paso
+        diagramas = datos.get(campo) or {}
+        if isinstance(diagramas, str):
+            diagramas = {None: diagramas}
+        for nombre, ruta in diagramas.items():
+            if nombre is not None:
+                partes.append(_parrafo_xml(_ejecucion_xml(nombre), estilo_id))
+            partes.append(diagrama_xml(doc, ruta, ancho))
+
+
+def renderizar_plan(plan, doc, datos=None):
+    """Agrega al documento las secciones del plan para un registro de datos"""
+
+    datos = completar_datos(datos)
+    valores = valores_campos(datos, plan['campos'])
+    perfil = obtener_perfilador()
+    if perfil.activo:
+        perfil.documento = datos['sistema']
+
+    for seccion in plan['secciones']:
+        with perfil.seccion(seccion['nombre'], doc):
+            partes = [f'<w:body {nsdecls("w")}>']
+            for paso in seccion['pasos']:
+                _renderizar_paso(paso, doc, datos, valores, partes)
+            partes.append('</w:body>')
+            inicio = total_contenido(doc.element.body)
+            insertar_fragmento(doc, ''.join(partes))
+            # Los títulos y el hueco del índice se registran desde lo insertado
+            registrar_insertados(doc, doc.element.body[inicio:total_contenido(doc.element.body)])
+    emitir_indice(doc)
+    return doc
+
+
+def construir_documento_plan(datos=None, plan=None):
+    """Construye en memoria el documento de un sistema a partir de un plan"""
+
+    datos = completar_datos(datos)
+    return renderizar_plan(plan or obtener_plan(), crear_documento_base(datos['fecha']), datos)
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Genera un documento a partir de una especificación declarativa")
+    parser.add_argument('--especificacion', help="Especificación JSON o YAML (por defecto, la de transferencia)")
+    parser.add_argument('--datos', help="Archivo JSON con los datos del sistema")
+    parser.add_argument('-o', '--salida', help="Nombre del archivo de salida")
+    parser.add_argument('--validar', action='store_true', help="Solo valida y compila la especificación")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        plan = obtener_plan(args.especificacion)
+    except (ValueError, KeyError) as error:
+        print(f"❌ {error}")
+        return 1
+    print(f"🧩 Plan compilado: {len(plan['secciones'])} secciones "
+          f"({(time.perf_counter() - inicio) * 1000:.1f} ms)")
+    if args.validar:
+        return 0
+
+    datos = None
+    if args.datos:
+        with open(args.datos, encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+
+    nombre_archivo = args.salida or nombre_archivo_por_defecto(completar_datos(datos))
+    guardar_documento(construir_documento_plan(datos, plan), nombre_archivo)
+    print(f"✅ Documento generado: {nombre_archivo}")
+    print(f"📁 Ruta: {os.path.abspath(nombre_archivo)}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,196 @@
+"""
+Plantilla base con los estilos personalizados ya aplicados.
+
+El paquete estilizado se construye una sola vez por proceso y se conserva
+como bytes en memoria (y opcionalmente en disco, indexado por el hash de las
+definiciones de estilo). También se analiza una sola vez: cada documento
+nuevo copia los árboles XML de sus partes en lugar de descomprimir y volver a
+analizar el zip.
+"""
+
+import copy
+import hashlib
+import io
+import json
+import os
+
+import docx
+from docx import Document
+from docx.opc.part import XmlPart
+from docx.parts.image import ImagePart
+from docx.shared import Inches, Pt, RGBColor
+from docx.enum.style import WD_STYLE_TYPE
+
+# Definición declarativa de los estilos personalizados (tamaños y espacios en puntos)
+ESTILOS_PERSONALIZADOS = [
+    # Estilo para títulos principales
+    {
+        'nombre': 'TituloPrincipal',
+        'fuente': 'Calibri',
+        'tamano': 16,
+        'negrita': True,
+        'color': (46, 84, 149),  # Azul oscuro
+        'espacio_despues': 12,
+    },
+    # Estilo para subtítulos
+    {
+        'nombre': 'Subtitulo',
+        'fuente': 'Calibri',
+        'tamano': 14,
+        'negrita': True,
+        'color': (64, 64, 64),  # Gris oscuro
+        'espacio_antes': 18,
+        'espacio_despues': 6,
+    },
+    # Estilo para encabezados de sección
+    {
+        'nombre': 'Seccion',
+        'fuente': 'Calibri',
+        'tamano': 12,
+        'negrita': True,
+        'espacio_antes': 12,
+        'espacio_despues': 6,
+    },
+    # Estilo para código
+    {
+        'nombre': 'Codigo',
+        'fuente': 'Consolas',
+        'tamano': 10,
+        'sangria_izquierda': 0.5,  # Pulgadas
+        'espacio_antes': 6,
+        'espacio_despues': 6,
+    },
+]
+
+# Estilo normal modificado
+ESTILO_NORMAL = {'fuente': 'Calibri', 'tamano': 11}
+
+# Variable de entorno con el directorio de caché en disco de la plantilla
+VARIABLE_CACHE = 'GENERAR_WORD_CACHE'
+
+_plantilla_base = None
+# (bytes de la plantilla, paquete analizado a partir de ellos); no se modifica nunca
+_paquete_base = None
+
+
+def _aplicar_estilo(estilo, definicion):
+    """Aplica una definición declarativa sobre un estilo de python-docx"""
+
+    estilo.font.name = definicion['fuente']
+    estilo.font.size = Pt(definicion['tamano'])
+    if 'negrita' in definicion:
+        estilo.font.bold = definicion['negrita']
+    if 'color' in definicion:
+        estilo.font.color.rgb = RGBColor(*definicion['color'])
+    if 'sangria_izquierda' in definicion:
+        estilo.paragraph_format.left_indent = Inches(definicion['sangria_izquierda'])
+    if 'espacio_antes' in definicion:
+        estilo.paragraph_format.space_before = Pt(definicion['espacio_antes'])
+    if 'espacio_despues' in definicion:
+        estilo.paragraph_format.space_after = Pt(definicion['espacio_despues'])
+
+
+def configurar_estilos(doc):
+    """Configura los estilos personalizados del documento"""
+
+    for definicion in ESTILOS_PERSONALIZADOS:
+        estilo = doc.styles.add_style(definicion['nombre'], WD_STYLE_TYPE.PARAGRAPH)
+        _aplicar_estilo(estilo, definicion)
+
+    _aplicar_estilo(doc.styles['Normal'], ESTILO_NORMAL)
+
+
+def hash_estilos():
+    """Devuelve el hash de las definiciones de estilo y de la versión de python-docx"""
+
+    contenido = json.dumps(
+        [ESTILOS_PERSONALIZADOS, ESTILO_NORMAL, docx.__version__],
+        sort_keys=True,
+    )
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def construir_plantilla_base():
+    """Construye el paquete estilizado y lo devuelve como bytes"""
+
+    doc = Document()
+    configurar_estilos(doc)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def obtener_plantilla_base(directorio_cache=None):
+    """Devuelve los bytes de la plantilla base, construyéndola solo la primera vez"""
+
+    global _plantilla_base
+    if _plantilla_base is not None:
+        return _plantilla_base
+
+    directorio_cache = directorio_cache or os.environ.get(VARIABLE_CACHE)
+    ruta = None
+    if directorio_cache:
+        ruta = os.path.join(directorio_cache, f"plantilla_{hash_estilos()[:16]}.docx")
+        if os.path.exists(ruta):
+            with open(ruta, 'rb') as archivo:
+                _plantilla_base = archivo.read()
+            return _plantilla_base
+
+    _plantilla_base = construir_plantilla_base()
+
+    if ruta:
+        os.makedirs(directorio_cache, exist_ok=True)
+        # Escritura atómica para que procesos concurrentes no lean un archivo a medias
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'wb') as archivo:
+            archivo.write(_plantilla_base)
+        os.replace(temporal, ruta)
+
+    return _plantilla_base
+
+
+def _paquete_plantilla():
+    """Devuelve el paquete analizado de la plantilla base"""
+
+    global _paquete_base
+    plantilla = obtener_plantilla_base()
+    if _paquete_base is None or _paquete_base[0] is not plantilla:
+        _paquete_base = (plantilla, Document(io.BytesIO(plantilla)).part.package)
+    return _paquete_base[1]
+
+
+def precargar_plantilla():
+    """Construye y analiza la plantilla base (p. ej. antes de crear trabajadores con fork)"""
+
+    _paquete_plantilla()
+
+
+def _clonar_paquete(base):
+    """Copia un paquete ya analizado: árboles XML copiados y binarios compartidos"""
+
+    paquete = type(base)()
+    copias = {}
+    for parte in base.parts:
+        if isinstance(parte, XmlPart):
+            copias[parte] = type(parte)(
+                parte.partname, parte.content_type, copy.deepcopy(parte.element), paquete
+            )
+        else:
+            # Los bytes son inmutables: la copia los comparte
+            copias[parte] = type(parte).load(parte.partname, parte.content_type, parte.blob, paquete)
+
+    for origen, destino in [(base, paquete), *copias.items()]:
+        for relacion in origen.rels.values():
+            objetivo = relacion.target_ref if relacion.is_external else copias[relacion.target_part]
+            destino.load_rel(relacion.reltype, objetivo, relacion.rId, relacion.is_external)
+    # Lo mismo que Package.after_unmarshal, sin volver a recorrer las relaciones
+    for copia in copias.values():
+        if isinstance(copia, ImagePart):
+            paquete.image_parts.append(copia)
+    return paquete
+
+
+def nuevo_documento():
+    """Crea un documento nuevo clonado de la plantilla base"""
+
+    return _clonar_paquete(_paquete_plantilla()).main_document_part.document
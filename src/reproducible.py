@@ -0,0 +1,112 @@
+"""
+Reloj inyectable y modo de salida reproducible.
+
+La fecha por defecto de los documentos se obtiene de ``ahora()``, que puede
+sustituirse con ``fijar_reloj`` (pruebas, regeneraciones de fechas pasadas) o
+fijarse con la variable estándar ``SOURCE_DATE_EPOCH``.
+
+En modo reproducible (``activar_reproducible`` o ``GENERAR_WORD_REPRODUCIBLE=1``;
+también al definir ``SOURCE_DATE_EPOCH``) las entradas del zip llevan una marca
+de tiempo fija y se escriben en un orden estable, de modo que dos ejecuciones
+con las mismas entradas producen exactamente los mismos bytes.
+"""
+
+import os
+import time
+import zipfile
+from datetime import datetime, timezone
+
+VARIABLE_REPRODUCIBLE = 'GENERAR_WORD_REPRODUCIBLE'
+VARIABLE_EPOCA = 'SOURCE_DATE_EPOCH'
+
+# Fecha mínima representable en un zip (la que usan las herramientas de
+# compilación reproducible cuando no hay SOURCE_DATE_EPOCH)
+FECHA_ZIP_FIJA = (1980, 1, 1, 0, 0, 0)
+
+# Entradas que encabezan el paquete; el resto se ordena por nombre
+_ENTRADAS_INICIALES = ('[Content_Types].xml', '_rels/.rels')
+
+_reloj = None
+_reproducible = None
+
+
+def _epoca():
+    """Devuelve la fecha de SOURCE_DATE_EPOCH (UTC, sin zona) o None"""
+
+    valor = os.environ.get(VARIABLE_EPOCA, '').strip()
+    if not valor:
+        return None
+    return datetime.fromtimestamp(int(valor), timezone.utc).replace(tzinfo=None)
+
+
+def fijar_reloj(reloj):
+    """Sustituye el reloj del proceso por ``reloj`` (callable que devuelve un datetime).
+
+    Acepta también un ``datetime`` fijo; ``None`` restaura el reloj del sistema.
+    """
+
+    global _reloj
+    if isinstance(reloj, datetime):
+        fecha = reloj
+        reloj = lambda: fecha
+    _reloj = reloj
+
+
+def ahora():
+    """Devuelve la fecha actual según el reloj del proceso"""
+
+    if _reloj is not None:
+        return _reloj()
+    return _epoca() or datetime.now()
+
+
+def activar_reproducible(activo=True):
+    """Activa (o desactiva) el modo reproducible en el proceso actual"""
+
+    global _reproducible
+    _reproducible = activo
+
+
+def es_reproducible():
+    """Indica si la salida debe ser reproducible byte a byte"""
+
+    if _reproducible is not None:
+        return _reproducible
+    valor = os.environ.get(VARIABLE_REPRODUCIBLE, '')
+    return valor.lower() in ('1', 'true', 'si', 'sí', 'yes') or _epoca() is not None
+
+
+def marca_zip():
+    """Devuelve la marca de tiempo de las entradas del zip"""
+
+    if not es_reproducible():
+        return time.localtime()[:6]
+    epoca = _epoca()
+    if epoca is None:
+        return FECHA_ZIP_FIJA
+    return max(FECHA_ZIP_FIJA, epoca.timetuple()[:6])
+
+
+def info_zip(nombre, zf):
+    """Crea la cabecera de una entrada con la compresión de ``zf`` y la marca de tiempo del modo actual"""
+
+    info = zipfile.ZipInfo(nombre, marca_zip())
+    info.compress_type = zf.compression
+    info._compresslevel = zf.compresslevel
+    info.external_attr = 0o600 << 16
+    return info
+
+
+def ordenar_entradas(entradas):
+    """Ordena las entradas ``(nombre, blob)`` del paquete si el modo es reproducible"""
+
+    if not es_reproducible():
+        return entradas
+    return sorted(
+        entradas,
+        key=lambda entrada: (
+            _ENTRADAS_INICIALES.index(entrada[0]) if entrada[0] in _ENTRADAS_INICIALES
+            else len(_ENTRADAS_INICIALES),
+            entrada[0],
+        ),
+    )
@@ -0,0 +1,115 @@
+"""
+Caché de documentos generados direccionada por contenido.
+
+La clave de un documento es el hash de todo lo que determina sus bytes: los
+datos completos del sistema (con el inventario ya ingerido), el código de las
+secciones, los estilos de la plantilla, la versión de python-docx y el nivel
+de compresión. En un acierto se copia el .docx guardado en lugar de volver a
+generarlo, así que un lote nocturno solo regenera los documentos cuyas
+entradas cambiaron.
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+
+from fragmentos import _huella_funcion, _valor_canonico
+from plantilla import hash_estilos
+from reproducible import es_reproducible, marca_zip
+from salida import abrir_destino
+
+# Incrementar si cambian los auxiliares que usan las secciones (tablas, salida...)
+VERSION_RESULTADOS = 2
+
+# Claves de los datos que no afectan al contenido del documento
+_CLAVES_IGNORADAS = ('archivo',)
+
+
+def clave_resultado(datos, secciones, compresion=None, hilos=None):
+    """Devuelve la clave de un documento o None si sus datos no son serializables"""
+
+    try:
+        contenido = json.dumps(
+            [
+                VERSION_RESULTADOS,
+                hash_estilos(),
+                [(seccion.__qualname__, _huella_funcion(seccion)) for seccion in secciones],
+                {clave: valor for clave, valor in datos.items() if clave not in _CLAVES_IGNORADAS},
+                compresion,
+                # La compresión por bloques en paralelo produce otro flujo deflate
+                bool(hilos and hilos > 1),
+                marca_zip() if es_reproducible() else None,
+            ],
+            sort_keys=True,
+            default=_valor_canonico,
+        )
+    except TypeError:
+        return None
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+class CacheResultados:
+    """Documentos generados guardados en disco por su clave de contenido"""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.aciertos = 0
+        self.fallos = 0
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], f"{clave}.docx")
+
+    def obtener(self, clave):
+        """Devuelve la ruta del documento guardado con ``clave`` o None"""
+
+        ruta = self._ruta(clave)
+        if os.path.exists(ruta):
+            self.aciertos += 1
+            return ruta
+        self.fallos += 1
+        return None
+
+    def guardar(self, clave, contenido):
+        """Guarda los bytes de un documento; devuelve su ruta en la caché"""
+
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        # Escritura atómica para que procesos concurrentes no lean un archivo a medias
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'wb') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+        return ruta
+
+
+def copiar_resultado(ruta, destino):
+    """Copia un documento de la caché a una ruta, descriptor, '-' u objeto binario"""
+
+    with open(ruta, 'rb') as origen, abrir_destino(destino) as archivo:
+        shutil.copyfileobj(origen, archivo)
+
+
+def generar_con_cache(cache, clave, destino, generar):
+    """Entrega el documento de ``clave`` desde la caché o lo genera con ``generar(archivo)``.
+
+    Devuelve True si el documento se reutilizó. Sin caché o sin clave se genera
+    directamente sobre ``destino``.
+    """
+
+    if cache is None or clave is None:
+        generar(destino)
+        return False
+
+    ruta = cache.obtener(clave)
+    if ruta is not None:
+        copiar_resultado(ruta, destino)
+        return True
+
+    buffer = io.BytesIO()
+    generar(buffer)
+    cache.guardar(clave, buffer.getvalue())
+    with abrir_destino(destino) as archivo:
+        archivo.write(buffer.getbuffer())
+    return False
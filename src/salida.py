@@ -0,0 +1,268 @@
+"""
+Escritura del paquete OPC (.docx) directamente sobre un ZipFile.
+
+Equivale a ``Document.save`` de python-docx, pero permite copiar en crudo
+partes que el llamador ya comprimió en otro zip (p. ej. ``word/document.xml``
+en modo streaming), elegir el nivel de compresión del zip y escribir en una
+ruta, un objeto binario (``BytesIO``), un descriptor de archivo o la salida
+estándar (``'-'``). En modo reproducible (``reproducible.py``) las entradas
+llevan una marca de tiempo fija y se escriben ordenadas.
+
+Con ``hilos``, las partes grandes se comprimen por bloques en paralelo
+(zlib libera el GIL) y se escriben en el zip ya comprimidas.
+"""
+
+import contextlib
+import os
+import shutil
+import struct
+import sys
+import zlib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.pkgwriter import _ContentTypesItem
+
+from reproducible import info_zip, marca_zip, ordenar_entradas
+
+# Tamaño mínimo de una parte para comprimirla en paralelo y tamaño de cada bloque
+UMBRAL_PARALELO = 256 * 1024
+TAMANO_BLOQUE = 128 * 1024
+# Ventana de deflate: cada bloque usa como diccionario el final del anterior
+_VENTANA = 32 * 1024
+
+
+@contextlib.contextmanager
+def abrir_destino(destino):
+    """Devuelve un objeto binario escribible para una ruta, descriptor, '-' u objeto"""
+
+    if destino == '-':
+        sys.stdout.flush()
+        yield sys.stdout.buffer
+        sys.stdout.buffer.flush()
+    elif isinstance(destino, int):
+        # El descriptor pertenece al llamador: no se cierra
+        with os.fdopen(destino, 'wb', closefd=False) as archivo:
+            yield archivo
+    elif isinstance(destino, (str, os.PathLike)):
+        with open(destino, 'wb') as archivo:
+            yield archivo
+    else:
+        yield destino
+
+
+def abrir_zip(archivo, compresion=None):
+    """Abre un zip de escritura; ``compresion`` 0 = sin comprimir, 1-9 = nivel de deflate"""
+
+    if compresion == 0:
+        return zipfile.ZipFile(archivo, 'w', zipfile.ZIP_STORED)
+    return zipfile.ZipFile(archivo, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresion)
+
+
+def _comprimir_bloque(bloque, diccionario, nivel, final):
+    """Comprime un bloque como parte de un flujo deflate concatenable"""
+
+    if diccionario:
+        compresor = zlib.compressobj(nivel, zlib.DEFLATED, -15, zdict=diccionario)
+    else:
+        compresor = zlib.compressobj(nivel, zlib.DEFLATED, -15)
+    # El vaciado síncrono deja el bloque alineado a byte para concatenar el siguiente
+    return compresor.compress(bloque) + compresor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def enviar_compresion(datos, nivel, ejecutor):
+    """Reparte la compresión de ``datos`` en bloques; devuelve los futuros en orden"""
+
+    nivel = zlib.Z_DEFAULT_COMPRESSION if nivel is None else nivel
+    vista = memoryview(datos)
+    return [
+        ejecutor.submit(
+            _comprimir_bloque,
+            vista[inicio:inicio + TAMANO_BLOQUE],
+            vista[max(0, inicio - _VENTANA):inicio],
+            nivel,
+            inicio + TAMANO_BLOQUE >= len(datos),
+        )
+        for inicio in range(0, len(datos), TAMANO_BLOQUE)
+    ]
+
+
+# Copiar entradas ya comprimidas sin pasar por zlib requiere detalles internos
+# de zipfile: solo se usan en las versiones comprobadas y si siguen existiendo;
+# si no, se recurre a la API pública (más lento, mismo contenido)
+_VERSIONES_ZIP_CRUDO = ((3, 8), (3, 14))
+_INTERNOS_ESCRITURA = ('_lock', '_writing', '_seekable', '_writecheck', '_didModify', 'start_dir')
+_INTERNOS_LECTURA = ('structFileHeader', 'sizeFileHeader', '_FH_FILENAME_LENGTH', '_FH_EXTRA_FIELD_LENGTH')
+
+
+def _zip_crudo(objeto, internos):
+    """Indica si se puede acceder en crudo a las entradas del zip"""
+
+    minima, limite = _VERSIONES_ZIP_CRUDO
+    return minima <= sys.version_info[:2] < limite and all(hasattr(objeto, nombre) for nombre in internos)
+
+
+def _info_cruda(nombre, tipo, crc, tamano, tamano_comprimido):
+    info = zipfile.ZipInfo(nombre, marca_zip())
+    info.compress_type = tipo
+    info.external_attr = 0o600 << 16
+    info.file_size = tamano
+    info.compress_size = tamano_comprimido
+    info.CRC = crc
+    return info
+
+
+def _escribir_crudo(zf, info, volcar):
+    """Escribe la cabecera de ``info`` y deja que ``volcar(fp)`` escriba el contenido comprimido"""
+
+    # Mismo recorrido que ZipFile._open_to_write, sin volver a comprimir
+    with zf._lock:
+        if zf._writing:
+            raise ValueError("No se puede escribir en el zip con otra entrada abierta")
+        if zf._seekable:
+            zf.fp.seek(zf.start_dir)
+        info.header_offset = zf.fp.tell()
+        zf._writecheck(info)
+        zf._didModify = True
+        zf.fp.write(info.FileHeader(zipfile.ZIP64_LIMIT < max(info.file_size, info.compress_size)))
+        volcar(zf.fp)
+        zf.filelist.append(info)
+        zf.NameToInfo[info.filename] = info
+        zf.start_dir = zf.fp.tell()
+
+
+def _ir_a_datos(zf, info):
+    """Sitúa el archivo del zip al principio del contenido comprimido de una entrada"""
+
+    zf.fp.seek(info.header_offset)
+    cabecera = struct.unpack(zipfile.structFileHeader, zf.fp.read(zipfile.sizeFileHeader))
+    zf.fp.seek(
+        info.header_offset + zipfile.sizeFileHeader
+        + cabecera[zipfile._FH_FILENAME_LENGTH] + cabecera[zipfile._FH_EXTRA_FIELD_LENGTH]
+    )
+
+
+def escribir_comprimido(zf, nombre, comprimido, crc, tamano, tipo=zipfile.ZIP_DEFLATED):
+    """Agrega al zip una entrada cuyo contenido ya está comprimido (``tipo``) sin recomprimirlo"""
+
+    if not _zip_crudo(zf, _INTERNOS_ESCRITURA):
+        info = zipfile.ZipInfo(nombre, marca_zip())
+        info.compress_type = tipo
+        info.external_attr = 0o600 << 16
+        datos = zlib.decompress(comprimido, -15) if tipo == zipfile.ZIP_DEFLATED else comprimido
+        zf.writestr(info, datos)
+        return
+
+    info = _info_cruda(nombre, tipo, crc, tamano, len(comprimido))
+    _escribir_crudo(zf, info, lambda fp: fp.write(comprimido))
+
+
+def leer_comprimido(zf, info):
+    """Devuelve el contenido de una entrada comprimido con su método (``info.compress_type``).
+
+    Es la contraparte de ``escribir_comprimido`` y solo admite entradas sin
+    comprimir o con deflate.
+    """
+
+    if not _zip_crudo(zipfile, _INTERNOS_LECTURA):
+        datos = zf.read(info)
+        if info.compress_type != zipfile.ZIP_DEFLATED:
+            return datos
+        compresor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        return compresor.compress(datos) + compresor.flush()
+
+    _ir_a_datos(zf, info)
+    return zf.fp.read(info.compress_size)
+
+
+def copiar_entrada(zf, origen, info):
+    """Copia la entrada ``info`` del zip ``origen`` a ``zf`` por bloques, sin recomprimirla.
+
+    La memoria no depende del tamaño de la entrada. Si no se puede acceder en
+    crudo a los zips, la entrada se descomprime y se vuelve a comprimir en flujo.
+    """
+
+    crudo = (_zip_crudo(zf, _INTERNOS_ESCRITURA) and _zip_crudo(zipfile, _INTERNOS_LECTURA)
+             and info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED))
+    if not crudo:
+        with origen.open(info) as lectura, \
+                zf.open(info_zip(info.filename, zf), 'w',
+                        force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as escritura:
+            shutil.copyfileobj(lectura, escritura, TAMANO_BLOQUE)
+        return
+
+    def volcar(fp):
+        _ir_a_datos(origen, info)
+        restante = info.compress_size
+        while restante:
+            bloque = origen.fp.read(min(restante, TAMANO_BLOQUE))
+            if not bloque:
+                raise zipfile.BadZipFile(f"Entrada truncada: {info.filename}")
+            fp.write(bloque)
+            restante -= len(bloque)
+
+    copia = _info_cruda(info.filename, info.compress_type, info.CRC, info.file_size, info.compress_size)
+    _escribir_crudo(zf, copia, volcar)
+
+
+def escribir_paquete(zf, paquete, copiar=None, hilos=None):
+    """Escribe en ``zf`` todas las partes del paquete.
+
+    ``copiar`` (``{partname: (zip, info)}``) indica partes que ya están
+    comprimidas en otro zip (p. ej. ``word/document.xml`` en streaming): se
+    copian en crudo en su posición, sin serializarlas.
+    """
+
+    copiar = copiar or {}
+
+    partes = list(paquete.parts)
+    for parte in partes:
+        parte.before_marshal()
+
+    entradas = [
+        (CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(partes).blob),
+        (PACKAGE_URI.rels_uri.membername, paquete.rels.xml),
+    ]
+    for parte in partes:
+        # Las partes copiadas no tienen blob: se escriben desde su zip
+        blob = None if parte.partname in copiar else parte.blob
+        entradas.append((parte.partname.membername, blob))
+        if len(parte.rels):
+            entradas.append((parte.partname.rels_uri.membername, parte.rels.xml))
+    entradas = ordenar_entradas(entradas)
+
+    copias = {parte.membername: origen for parte, origen in copiar.items()}
+
+    paralelo = hilos and hilos > 1 and zf.compression == zipfile.ZIP_DEFLATED
+    if not paralelo:
+        for nombre, blob in entradas:
+            if nombre in copias:
+                copiar_entrada(zf, *copias[nombre])
+            else:
+                zf.writestr(info_zip(nombre, zf), blob)
+        return
+
+    with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+        # Los bloques de todas las partes grandes se comprimen a la vez;
+        # las entradas se escriben en el orden original
+        pendientes = {
+            nombre: enviar_compresion(blob, zf.compresslevel, ejecutor)
+            for nombre, blob in entradas if blob is not None and len(blob) >= UMBRAL_PARALELO
+        }
+        for nombre, blob in entradas:
+            if nombre in copias:
+                copiar_entrada(zf, *copias[nombre])
+            elif nombre in pendientes:
+                comprimido = b''.join(futuro.result() for futuro in pendientes[nombre])
+                escribir_comprimido(zf, nombre, comprimido, zlib.crc32(blob), len(blob))
+            else:
+                zf.writestr(info_zip(nombre, zf), blob)
+
+
+def guardar_documento(doc, destino, compresion=None, hilos=None):
+    """Guarda el documento en una ruta, descriptor, '-' (stdout) u objeto binario"""
+
+    with abrir_destino(destino) as archivo:
+        with abrir_zip(archivo, compresion) as zf:
+            escribir_paquete(zf, doc.part.package, hilos=hilos)
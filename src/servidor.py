@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Servicio HTTP local de generación de documentos de transferencia.
+
+Mantiene procesos trabajadores "calientes" (módulos importados y plantilla
+base construida) y expone un endpoint asyncio que recibe los datos de un
+sistema en JSON y devuelve el .docx generado:
+
+    POST /generar   cuerpo JSON con los datos del sistema -> .docx
+    GET  /metricas  contadores y latencias (JSON)
+    GET  /salud     comprobación de vida
+
+Limita las generaciones simultáneas y la cola de espera; cuando la cola está
+llena responde 503 con ``Retry-After`` para aplicar contrapresión. Los datos
+que no superan la validación de entrada se responden con 400; cualquier fallo
+durante la generación, con 500. Los campos
+con rutas de archivo (``inventario`` y diagramas) se rechazan salvo que el
+servicio se inicie con un directorio de datos, y entonces deben estar dentro
+de él.
+"""
+
+import argparse
+import asyncio
+import http.client
+import io
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from fragmentos import CacheFragmentos
+from generate_word import construir_documento, nombre_archivo_por_defecto, resolver_fecha
+from plantilla import obtener_plantilla_base
+from salida import guardar_documento
+
+TIPO_DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+TAMANO_MAXIMO_CUERPO = 10 * 1024 * 1024
+MUESTRAS_LATENCIA = 1000
+
+# Errores de la validación de entrada (400); lo que falle ya generando es del servicio (500)
+ERRORES_VALIDACION = (ValueError, TypeError)
+
+_RAZONES = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable',
+}
+
+_cache_trabajador = None
+
+
+def _inicializar_trabajador():
+    """Prepara un proceso trabajador: plantilla base y caché de fragmentos"""
+
+    global _cache_trabajador
+    obtener_plantilla_base()
+    _cache_trabajador = CacheFragmentos()
+    # Una generación de calentamiento llena la caché con las secciones estáticas
+    construir_documento(cache=_cache_trabajador).save(io.BytesIO())
+
+
+def generar_en_trabajador(datos, compresion=None):
+    """Genera el documento en un trabajador y devuelve (bytes, segundos)"""
+
+    inicio = time.perf_counter()
+    buffer = io.BytesIO()
+    guardar_documento(construir_documento(datos, cache=_cache_trabajador), buffer, compresion)
+    return buffer.getvalue(), time.perf_counter() - inicio
+
+
+def _ruta_permitida(ruta, directorio_datos, campo):
+    """Resuelve una ruta del cliente dentro de ``directorio_datos`` o lanza ValueError"""
+
+    if not isinstance(ruta, str) or not ruta:
+        raise ValueError(f"'{campo}' debe ser una ruta")
+    if directorio_datos is None:
+        raise ValueError(f"El servicio no lee archivos del servidor ('{campo}'); "
+                         "inícielo con --directorio-datos para permitirlo")
+    base = os.path.realpath(directorio_datos)
+    resuelta = os.path.realpath(os.path.join(base, ruta))
+    if os.path.commonpath([base, resuelta]) != base:
+        raise ValueError(f"Ruta fuera del directorio de datos en '{campo}': {ruta}")
+    return resuelta
+
+
+def validar_rutas(datos, directorio_datos=None):
+    """Devuelve los datos con las rutas de archivo resueltas dentro del directorio de datos.
+
+    Sin ``directorio_datos`` cualquier ruta (inventario o diagramas) se rechaza.
+    """
+
+    datos = dict(datos)
+    inventario = datos.get('inventario')
+    if inventario:
+        if isinstance(inventario, list):
+            datos['inventario'] = [_ruta_permitida(ruta, directorio_datos, 'inventario')
+                                   for ruta in inventario]
+        else:
+            datos['inventario'] = _ruta_permitida(inventario, directorio_datos, 'inventario')
+    if datos.get('diagrama_arquitectura'):
+        datos['diagrama_arquitectura'] = _ruta_permitida(
+            datos['diagrama_arquitectura'], directorio_datos, 'diagrama_arquitectura'
+        )
+    diagramas = datos.get('diagramas_servicios')
+    if diagramas:
+        if not isinstance(diagramas, dict):
+            raise ValueError("'diagramas_servicios' debe ser un objeto {servicio: ruta}")
+        datos['diagramas_servicios'] = {
+            servicio: _ruta_permitida(ruta, directorio_datos, 'diagramas_servicios')
+            for servicio, ruta in diagramas.items()
+        }
+    return datos
+
+
+def _percentil(valores, fraccion):
+    """Percentil por el método del rango más cercano"""
+
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(fraccion * len(ordenados)))]
+
+
+class ServidorGeneracion:
+    """Servidor HTTP asyncio con trabajadores calientes y contrapresión"""
+
+    def __init__(self, trabajadores=None, max_concurrentes=None, max_cola=64, compresion=None,
+                 directorio_datos=None):
+        self.trabajadores = trabajadores or os.cpu_count()
+        self.compresion = compresion
+        self.directorio_datos = directorio_datos
+        self.max_concurrentes = max_concurrentes or self.trabajadores
+        self.max_cola = max_cola
+        self._ejecutor = None
+        self._semaforo = None
+        self._en_espera = 0
+        self._en_curso = 0
+        self._latencias = deque(maxlen=MUESTRAS_LATENCIA)
+        self._generacion = deque(maxlen=MUESTRAS_LATENCIA)
+        self._contadores = {'ok': 0, 'errores': 0, 'rechazadas': 0}
+        self._inicio = time.time()
+
+    def iniciar_trabajadores(self):
+        """Arranca el pool y espera a que todos los trabajadores estén calientes"""
+
+        self._ejecutor = ProcessPoolExecutor(
+            max_workers=self.trabajadores, initializer=_inicializar_trabajador
+        )
+        # Fuerza el arranque de todos los procesos antes de aceptar peticiones
+        list(self._ejecutor.map(time.sleep, [0] * self.trabajadores))
+
+    def detener(self):
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown()
+
+    def metricas(self):
+        """Devuelve contadores, ocupación y percentiles de latencia (ms)"""
+
+        def resumen(valores):
+            return {
+                'p50_ms': _a_ms(_percentil(valores, 0.50)),
+                'p95_ms': _a_ms(_percentil(valores, 0.95)),
+                'p99_ms': _a_ms(_percentil(valores, 0.99)),
+                'max_ms': _a_ms(max(valores) if valores else None),
+            }
+
+        return {
+            'trabajadores': self.trabajadores,
+            'max_concurrentes': self.max_concurrentes,
+            'max_cola': self.max_cola,
+            'en_curso': self._en_curso,
+            'en_espera': self._en_espera,
+            'activo_segundos': round(time.time() - self._inicio, 1),
+            **self._contadores,
+            'latencia': resumen(list(self._latencias)),
+            'generacion': resumen(list(self._generacion)),
+        }
+
+    async def _generar(self, datos):
+        """Encola una generación respetando los límites de concurrencia"""
+
+        if self._en_espera >= self.max_cola:
+            self._contadores['rechazadas'] += 1
+            return 503, 'application/json', _json({'error': 'Cola llena, reintente más tarde'})
+
+        self._en_espera += 1
+        try:
+            await self._semaforo.acquire()
+        finally:
+            self._en_espera -= 1
+
+        self._en_curso += 1
+        try:
+            bucle = asyncio.get_running_loop()
+            contenido, segundos = await bucle.run_in_executor(
+                self._ejecutor, generar_en_trabajador, datos, self.compresion
+            )
+        except Exception as error:
+            self._contadores['errores'] += 1
+            return 500, 'application/json', _json({'error': f"{type(error).__name__}: {error}"})
+        finally:
+            self._en_curso -= 1
+            self._semaforo.release()
+
+        self._contadores['ok'] += 1
+        self._generacion.append(segundos)
+        return 200, TIPO_DOCX, contenido
+
+    async def _despachar(self, metodo, ruta, cuerpo):
+        """Resuelve una petición y devuelve (estado, tipo, contenido, cabeceras)"""
+
+        ruta = ruta.split('?', 1)[0]
+        if ruta == '/salud':
+            return 200, 'application/json', _json({'estado': 'ok'}), {}
+        if ruta == '/metricas':
+            return 200, 'application/json', _json(self.metricas()), {}
+        if ruta != '/generar':
+            return 404, 'application/json', _json({'error': 'Ruta no encontrada'}), {}
+        if metodo != 'POST':
+            return 405, 'application/json', _json({'error': 'Use POST'}), {'Allow': 'POST'}
+
+        try:
+            datos = json.loads(cuerpo or b'{}')
+            if not isinstance(datos, dict):
+                raise ValueError("Se esperaba un objeto JSON")
+            datos = validar_rutas(datos, self.directorio_datos)
+            # Solo la fecha: el inventario y los diagramas se procesan en el trabajador,
+            # fuera del bucle de eventos. Se fija aquí para que nombre y documento coincidan.
+            datos['fecha'] = resolver_fecha(datos.get('fecha'))
+            nombre = nombre_archivo_por_defecto(datos)
+        except ERRORES_VALIDACION as error:
+            return 400, 'application/json', _json({'error': str(error)}), {}
+
+        inicio = time.perf_counter()
+        estado, tipo, contenido = await self._generar(datos)
+        cabeceras = {}
+        if estado == 200:
+            self._latencias.append(time.perf_counter() - inicio)
+            cabeceras['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        elif estado == 503:
+            cabeceras['Retry-After'] = '1'
+        return estado, tipo, contenido, cabeceras
+
+    async def atender(self, lector, escritor):
+        """Atiende una conexión HTTP/1.1 (con keep-alive)"""
+
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, ruta, _ = linea.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    await _responder(escritor, 400, 'application/json',
+                                     _json({'error': 'Petición inválida'}), {}, cerrar=True)
+                    break
+
+                cabeceras = {}
+                while True:
+                    linea = await lector.readline()
+                    if linea in (b'\r\n', b'\n', b''):
+                        break
+                    clave, _, valor = linea.decode('latin-1').partition(':')
+                    cabeceras[clave.strip().lower()] = valor.strip()
+
+                try:
+                    longitud = int(cabeceras.get('content-length', '0') or 0)
+                    if longitud < 0:
+                        raise ValueError
+                except ValueError:
+                    await _responder(escritor, 400, 'application/json',
+                                     _json({'error': 'Content-Length inválido'}), {}, cerrar=True)
+                    break
+                cerrar = cabeceras.get('connection', '').lower() == 'close'
+                if longitud > TAMANO_MAXIMO_CUERPO:
+                    await _responder(escritor, 413, 'application/json',
+                                     _json({'error': 'Cuerpo demasiado grande'}), {}, cerrar=True)
+                    break
+                cuerpo = await lector.readexactly(longitud) if longitud else b''
+
+                try:
+                    estado, tipo, contenido, extra = await self._despachar(metodo.upper(), ruta, cuerpo)
+                except Exception as error:
+                    # Ningún fallo deja la conexión sin respuesta
+                    self._contadores['errores'] += 1
+                    estado, tipo, extra = 500, 'application/json', {}
+                    contenido = _json({'error': f"{type(error).__name__}: {error}"})
+                await _responder(escritor, estado, tipo, contenido, extra, cerrar)
+                if cerrar:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host='127.0.0.1', puerto=8765):
+        """Inicia el servidor y atiende peticiones indefinidamente"""
+
+        self._semaforo = asyncio.Semaphore(self.max_concurrentes)
+        servidor = await asyncio.start_server(self.atender, host, puerto)
+        print(f"🚀 Servicio de generación en http://{host}:{puerto} "
+              f"({self.trabajadores} trabajadores, cola máx. {self.max_cola})")
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def _a_ms(segundos):
+    return None if segundos is None else round(segundos * 1000, 2)
+
+
+def _json(valor):
+    return json.dumps(valor, ensure_ascii=False).encode('utf-8')
+
+
+async def _responder(escritor, estado, tipo, contenido, cabeceras, cerrar=False):
+    """Escribe una respuesta HTTP completa"""
+
+    lineas = [
+        f"HTTP/1.1 {estado} {_RAZONES.get(estado, '')}",
+        f"Content-Type: {tipo}",
+        f"Content-Length: {len(contenido)}",
+        f"Connection: {'close' if cerrar else 'keep-alive'}",
+    ]
+    lineas += [f"{clave}: {valor}" for clave, valor in cabeceras.items()]
+    escritor.write(('\r\n'.join(lineas) + '\r\n\r\n').encode('latin-1') + contenido)
+    await escritor.drain()
+
+
+def solicitar_documento(datos, host='127.0.0.1', puerto=8765, timeout=60):
+    """Cliente local: envía los datos al servicio y devuelve los bytes del .docx"""
+
+    conexion = http.client.HTTPConnection(host, puerto, timeout=timeout)
+    try:
+        conexion.request(
+            'POST', '/generar', body=_json(datos or {}),
+            headers={'Content-Type': 'application/json'},
+        )
+        respuesta = conexion.getresponse()
+        contenido = respuesta.read()
+        if respuesta.status != 200:
+            raise RuntimeError(f"HTTP {respuesta.status}: {contenido.decode('utf-8', 'replace')}")
+        return contenido
+    finally:
+        conexion.close()
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de generación de documentos")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8765)
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    servir = subparsers.add_parser('servir', help="Inicia el servicio")
+    servir.add_argument('-j', '--trabajadores', type=int, default=None)
+    servir.add_argument('--max-concurrentes', type=int, default=None)
+    servir.add_argument('--max-cola', type=int, default=64)
+    servir.add_argument('--compresion', type=int, choices=range(10), metavar='0-9',
+                        help="Nivel de compresión del zip (0 = más rápido, 9 = más pequeño)")
+    servir.add_argument('--directorio-datos', metavar='DIRECTORIO',
+                        help="Permite inventarios y diagramas, solo dentro de este directorio")
+
+    solicitar = subparsers.add_parser('solicitar', help="Cliente: genera un documento vía el servicio")
+    solicitar.add_argument('--datos', help="Archivo JSON con los datos del sistema")
+    solicitar.add_argument('-o', '--salida', required=True, help="Archivo .docx de salida")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == 'servir':
+        servidor = ServidorGeneracion(
+            args.trabajadores, args.max_concurrentes, args.max_cola, args.compresion,
+            args.directorio_datos,
+        )
+        servidor.iniciar_trabajadores()
+        try:
+            asyncio.run(servidor.servir(args.host, args.puerto))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.detener()
+        return 0
+
+    datos = None
+    if args.datos:
+        with open(args.datos, encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+    inicio = time.perf_counter()
+    contenido = solicitar_documento(datos, args.host, args.puerto)
+    with open(args.salida, 'wb') as archivo:
+        archivo.write(contenido)
+    print(f"✅ Documento generado: {args.salida} ({(time.perf_counter() - inicio) * 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
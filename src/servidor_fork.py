@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Servidor fork precalentado para los generadores de línea de comandos.
+
+El proceso residente importa python-docx/lxml y los generadores, y construye
+la plantilla base una sola vez. Cada trabajo recibido por el socket Unix se
+ejecuta en un hijo creado con ``fork``, que hereda todo ese estado ya
+inicializado; el arranque por invocación baja a milisegundos.
+
+    python src/servidor_fork.py            # deja el servidor en marcha
+    python src/lanzador.py transferencia   # usa el servidor si existe
+
+La salida estándar del hijo se captura como bytes (``-o -`` escribe el .docx
+en ``sys.stdout.buffer``) y viaja en base64 dentro de la respuesta JSON.
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import generar_documento
+import generate_word
+from instrumentacion import reiniciar_perfilador
+from lanzador import PROGRAMAS, leer_mensaje, ruta_socket
+from plantilla import obtener_plantilla_base
+
+MODULOS = {
+    'generate_word': generate_word,
+    'generar_documento': generar_documento,
+}
+
+
+def precalentar():
+    """Deja importado y construido todo lo que comparten los trabajos"""
+
+    obtener_plantilla_base()
+    # Una generación en memoria ejercita las rutas de código de todas las secciones
+    generate_word.construir_documento().save(io.BytesIO())
+
+
+def ejecutar_trabajo(trabajo):
+    """Ejecuta un trabajo en el proceso hijo y devuelve la respuesta"""
+
+    # Con buffer binario debajo, como la salida estándar real
+    binaria = io.BytesIO()
+    salida = io.TextIOWrapper(binaria, encoding='utf-8', write_through=True)
+    errores = io.StringIO()
+    codigo = 1
+    try:
+        os.chdir(trabajo['cwd'])
+        # El hijo toma el entorno del cliente en lugar del heredado del servidor,
+        # para que la salida no dependa de por dónde se generó
+        os.environ.clear()
+        os.environ.update(trabajo.get('entorno', {}))
+        time.tzset()
+        reiniciar_perfilador()
+        nombre_modulo = PROGRAMAS[trabajo['programa']]
+        modulo = MODULOS[nombre_modulo]
+        sys.argv = [f"{nombre_modulo}.py"] + list(trabajo.get('argv', []))
+        with contextlib.redirect_stdout(salida), contextlib.redirect_stderr(errores):
+            try:
+                codigo = modulo.main(trabajo.get('argv', [])) or 0
+            except SystemExit as salida_sistema:
+                # argparse termina con SystemExit (p. ej. --help o argumentos inválidos)
+                codigo = salida_sistema.code if isinstance(salida_sistema.code, int) else 1
+    except Exception:
+        errores.write(traceback.format_exc())
+        codigo = 1
+    salida.flush()
+    return {
+        'codigo': codigo,
+        'stdout': base64.b64encode(binaria.getvalue()).decode('ascii'),
+        'stderr': errores.getvalue(),
+    }
+
+
+def atender(conexion):
+    """Proceso hijo: lee el trabajo, lo ejecuta y responde"""
+
+    try:
+        trabajo = leer_mensaje(conexion)
+        respuesta = ejecutar_trabajo(trabajo)
+    except Exception:
+        respuesta = {'codigo': 1, 'stdout': '', 'stderr': traceback.format_exc()}
+    conexion.sendall(json.dumps(respuesta).encode('utf-8'))
+    conexion.close()
+
+
+def servir(ruta):
+    """Acepta conexiones y crea un hijo por trabajo"""
+
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(ruta)
+
+    servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    servidor.bind(ruta)
+    os.chmod(ruta, 0o600)
+    servidor.listen(128)
+
+    # Los hijos terminados se recogen automáticamente
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    print(f"🚀 Servidor fork escuchando en {ruta}")
+    sys.stdout.flush()
+
+    try:
+        while True:
+            conexion, _ = servidor.accept()
+            if os.fork() == 0:
+                servidor.close()
+                try:
+                    atender(conexion)
+                finally:
+                    # os._exit no ejecuta los finalizadores: se detienen aquí los pools de --procesos
+                    if 'paralelo' in sys.modules:
+                        sys.modules['paralelo'].cerrar_ejecutores()
+                    os._exit(0)
+            conexion.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(ruta)
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Servidor fork precalentado de los generadores")
+    parser.add_argument('--socket', default=ruta_socket(), help="Ruta del socket Unix")
+    args = parser.parse_args(argv)
+
+    precalentar()
+    servir(args.socket)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
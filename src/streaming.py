@@ -0,0 +1,107 @@
+"""
+Escritura en streaming de documentos muy grandes.
+
+``word/document.xml`` se escribe de forma incremental: cada vez que termina
+una sección, sus elementos se serializan y se eliminan del árbol, de modo que
+la memoria máxima no depende de la longitud del documento. Se comprime en un
+zip temporal en disco y, al cerrar, se copia en crudo al de salida en la misma
+posición que al guardar en memoria (el orden de las entradas es el mismo).
+"""
+
+import contextlib
+import tempfile
+import zipfile
+
+from lxml import etree
+
+from reproducible import info_zip
+from salida import abrir_destino, abrir_zip, escribir_paquete
+
+_MARCA = 'CONTENIDO-STREAMING'
+_CIERRE = b'</w:body></w:document>'
+
+
+class EscritorStreaming:
+    """Vuelca el cuerpo de un documento al zip de salida sección a sección"""
+
+    def __init__(self, doc, destino, compresion=None, hilos=None):
+        self.doc = doc
+        self.hilos = hilos
+        self._cerrado = False
+        self._documento = doc.element
+        self._cuerpo = doc.element.body
+        self._recursos = contextlib.ExitStack()
+        archivo = self._recursos.enter_context(abrir_destino(destino))
+        self._zip = self._recursos.enter_context(abrir_zip(archivo, compresion))
+        # Las partes que se ordenan antes que document.xml (tipos de contenido,
+        # relaciones) solo se conocen al final: el cuerpo se comprime aparte
+        self._temporal = self._recursos.enter_context(tempfile.TemporaryFile())
+        self._zip_cuerpo = abrir_zip(self._temporal, compresion)
+        self._flujo = self._zip_cuerpo.open(
+            info_zip(doc.part.partname.membername, self._zip_cuerpo), 'w'
+        )
+
+        # Cabecera del XML (declaración, w:document y apertura de w:body)
+        marca = etree.Comment(_MARCA)
+        self._cuerpo.insert(0, marca)
+        xml = self._serializar()
+        self._cuerpo.remove(marca)
+        self._prefijo = xml[:xml.index(b'<!--' + _MARCA.encode())]
+        self._flujo.write(self._prefijo)
+
+    def _serializar(self):
+        """Serializa el documento completo tal como lo hace python-docx"""
+
+        return etree.tostring(self._documento, encoding='UTF-8', standalone=True)
+
+    def _escribir_cuerpo(self):
+        """Escribe los elementos actuales del cuerpo y los elimina del árbol"""
+
+        # Se serializa el documento completo para no repetir las declaraciones
+        # de espacios de nombres en cada elemento
+        xml = self._serializar()
+        self._flujo.write(xml[len(self._prefijo):-len(_CIERRE)])
+        del self._cuerpo[:]
+
+    def volcar(self):
+        """Escribe el contenido acumulado del cuerpo (salvo w:sectPr)"""
+
+        sect_pr = self._cuerpo.sectPr
+        if sect_pr is not None:
+            self._cuerpo.remove(sect_pr)
+        if len(self._cuerpo):
+            self._escribir_cuerpo()
+        if sect_pr is not None:
+            self._cuerpo.append(sect_pr)
+
+    def cerrar(self):
+        """Completa document.xml y escribe el resto de partes del paquete"""
+
+        if self._cerrado:
+            return
+        self._cerrado = True
+        self.volcar()
+        if len(self._cuerpo):
+            self._escribir_cuerpo()
+        self._flujo.write(_CIERRE)
+        self._flujo.close()
+        self._zip_cuerpo.close()
+
+        with zipfile.ZipFile(self._temporal) as cuerpo:
+            parte = self.doc.part.partname
+            escribir_paquete(
+                self._zip, self.doc.part.package,
+                copiar={parte: (cuerpo, cuerpo.getinfo(parte.membername))}, hilos=self.hilos,
+            )
+        self._recursos.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        elif not self._cerrado:
+            self._flujo.close()
+            self._zip_cuerpo.close()
+            self._recursos.close()
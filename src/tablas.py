@@ -0,0 +1,138 @@
+"""
+Construcción de tablas en una sola pasada.
+
+En lugar de rellenar celda por celda con ``tabla.rows[i].cells[j]`` (que
+reconstruye la rejilla de celdas en cada acceso), se genera el XML completo
+de ``w:tbl`` a partir de los datos y se inserta en el cuerpo de una vez.
+"""
+
+from xml.sax.saxutils import escape
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Emu
+from docx.table import Table
+
+from contenido import DocumentoIR
+from estilos import resolver_estilo
+
+_TBL_LOOK = (
+    '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0"'
+    ' w:noHBand="0" w:noVBand="1" w:val="04A0"/>'
+)
+
+
+def resolver_estilo_tabla(doc, estilo):
+    """Devuelve el id de un estilo de tabla a partir de su nombre o id"""
+
+    return resolver_estilo(doc, estilo)
+
+
+def _texto_xml(texto):
+    """Convierte un texto en el contenido XML de una ejecución (saltos y tabuladores)"""
+
+    partes = []
+    for i, linea in enumerate(str(texto).split('\n')):
+        if i:
+            partes.append('<w:br/>')
+        for j, fragmento in enumerate(linea.split('\t')):
+            if j:
+                partes.append('<w:tab/>')
+            if fragmento:
+                if fragmento[0].isspace() or fragmento[-1].isspace():
+                    partes.append(f'<w:t xml:space="preserve">{escape(fragmento)}</w:t>')
+                else:
+                    partes.append(f'<w:t>{escape(fragmento)}</w:t>')
+    return ''.join(partes)
+
+
+def _celda_xml(texto, ancho, negrita):
+    """Devuelve el XML de una celda con un único párrafo"""
+
+    contenido = _texto_xml(texto)
+    if contenido:
+        propiedades = '<w:rPr><w:b/></w:rPr>' if negrita else ''
+        parrafo = f'<w:p><w:r>{propiedades}{contenido}</w:r></w:p>'
+    else:
+        parrafo = '<w:p/>'
+    return f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{ancho}"/></w:tcPr>{parrafo}</w:tc>'
+
+
+def _fila_xml(valores, anchos, negrita_fila, negrita_primera_columna):
+    """Devuelve el XML de una fila de la tabla"""
+
+    # Las filas incompletas se rellenan con celdas vacías
+    valores = list(valores)[:len(anchos)]
+    valores += [''] * (len(anchos) - len(valores))
+    celdas = ''.join(
+        _celda_xml(valor, ancho, negrita_fila or (negrita_primera_columna and j == 0))
+        for j, (valor, ancho) in enumerate(zip(valores, anchos))
+    )
+    return f'<w:tr>{celdas}</w:tr>'
+
+
+def tabla_xml(filas, encabezados=None, estilo_id=None, anchos=None, ancho_total=None,
+              negrita_encabezado=True, negrita_primera_columna=False):
+    """Genera el XML de ``w:tbl`` recorriendo las filas una sola vez"""
+
+    filas = iter(filas)
+    if encabezados is not None:
+        primera = list(encabezados)
+    else:
+        primera = next(filas, None)
+        if primera is None:
+            raise ValueError("La tabla necesita encabezados o al menos una fila")
+        primera = list(primera)
+    columnas = len(primera)
+
+    # Anchos de columna en twips (dxa); por defecto se reparte el ancho total
+    if anchos is None:
+        anchos = [Emu(ancho_total // columnas).twips] * columnas
+    else:
+        anchos = [Emu(ancho).twips for ancho in anchos]
+
+    partes = [
+        _fila_xml(primera, anchos, encabezados is not None and negrita_encabezado,
+                  negrita_primera_columna)
+    ]
+    for fila in filas:
+        partes.append(_fila_xml(fila, anchos, False, negrita_primera_columna))
+
+    estilo = f'<w:tblStyle w:val="{escape(estilo_id)}"/>' if estilo_id else ''
+    rejilla = ''.join(f'<w:gridCol w:w="{ancho}"/>' for ancho in anchos)
+    return (
+        f'<w:tbl {nsdecls("w")}>'
+        f'<w:tblPr>{estilo}<w:tblW w:type="auto" w:w="0"/>{_TBL_LOOK}</w:tblPr>'
+        f'<w:tblGrid>{rejilla}</w:tblGrid>'
+        f'{"".join(partes)}'
+        f'</w:tbl>'
+    )
+
+
+def agregar_tabla(doc, filas, encabezados=None, estilo=None, anchos=None,
+                  negrita_encabezado=True, negrita_primera_columna=False):
+    """Agrega al final del documento una tabla construida en una sola pasada.
+
+    ``filas`` puede ser cualquier iterable (incluido un generador) de
+    secuencias de valores; ``anchos`` es una lista opcional de longitudes
+    (``Inches``, ``Cm``...) por columna.
+    """
+
+    if isinstance(doc, DocumentoIR):
+        return doc.agregar_tabla(
+            filas, encabezados=encabezados, estilo=estilo, anchos=anchos,
+            negrita_encabezado=negrita_encabezado, negrita_primera_columna=negrita_primera_columna,
+        )
+
+    estilo_id = resolver_estilo_tabla(doc, estilo) if estilo else None
+    tbl = parse_xml(tabla_xml(
+        filas,
+        encabezados=encabezados,
+        estilo_id=estilo_id,
+        anchos=anchos,
+        ancho_total=doc._block_width,
+        negrita_encabezado=negrita_encabezado,
+        negrita_primera_columna=negrita_primera_columna,
+    ))
+    doc.element.body._insert_tbl(tbl)
+    return Table(tbl, doc._body)
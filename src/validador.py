@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Validación estructural de documentos generados.
+
+Cada .docx se lee en flujo con ``lector.leer_bloques`` (sin python-docx) y
+se comprueba que:
+
+- estén todas las secciones del índice (``SECCIONES_INDICE``) como títulos;
+- las tablas tengan en todas sus filas las columnas de su rejilla y, en las
+  secciones conocidas, las columnas esperadas;
+- exista la tabla de firmas;
+- con ``--rellenado``, no queden marcadores ``[corchetes]`` sin sustituir
+  fuera de los bloques de código.
+
+Los documentos se validan en paralelo y el informe JSON incluye los errores
+de cada uno y los documentos validados por segundo.
+
+    python src/validador.py salida/ --informe validacion.json
+    python src/validador.py rellenos/*.docx --rellenado -j 8
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree
+
+from codigo import ESTILO_CODIGO
+from generate_word import ENCABEZADOS_FIRMAS, SECCIONES_INDICE
+from lector import leer_bloques
+from marcadores import MARCADOR
+
+# Columnas de las tablas de cada sección (None = antes de la primera sección: portada)
+COLUMNAS_TABLAS = {
+    None: 2,
+    "1. RESUMEN EJECUTIVO": 2,
+    "2.2 Listado de microservicios": 5,
+    "5. CONFIGURACIÓN Y VARIABLES DE ENTORNO": 3,
+    "7. BACKUP Y RECUPERACIÓN": 4,
+    "9. PROCEDIMIENTOS DE INCIDENTES": 4,
+    "10. MEJORAS PLANEADAS / DEUDA TÉCNICA": 4,
+    "FIRMAS DE CONFORMIDAD": 4,
+}
+
+# Marcadores distintos que se listan como máximo en el informe de un documento
+MAXIMO_MARCADORES = 20
+
+
+def _marcadores(texto, encontrados):
+    for marcador in MARCADOR.finditer(texto):
+        encontrados[marcador.group()] = encontrados.get(marcador.group(), 0) + 1
+
+
+def validar_documento(ruta, rellenado=False):
+    """Valida un documento y devuelve su resultado (``estado`` 'ok' o 'error')"""
+
+    inicio = time.perf_counter()
+    errores = []
+    titulos = set()
+    marcadores = {}
+    seccion = None
+    tablas = 0
+    firmas = False
+
+    try:
+        for bloque in leer_bloques(ruta):
+            if bloque.tipo == 'parrafo':
+                # Los bloques de código (diagramas ASCII, comandos) usan corchetes literales
+                if bloque.estilo != ESTILO_CODIGO:
+                    _marcadores(bloque.texto, marcadores)
+                if bloque.nivel == 0:
+                    # Título de portada: empieza otro documento (p. ej. en un compendio)
+                    seccion = None
+                elif bloque.nivel:
+                    titulos.add(bloque.texto.strip())
+                    if bloque.texto.strip() in SECCIONES_INDICE:
+                        seccion = bloque.texto.strip()
+                continue
+
+            tablas += 1
+            for fila in bloque.filas:
+                for celda in fila:
+                    _marcadores(celda, marcadores)
+            es_firmas = bool(bloque.filas) and bloque.filas[0] == ENCABEZADOS_FIRMAS
+            if es_firmas:
+                # La tabla de firmas se reconoce por su encabezado, esté donde esté
+                seccion = "FIRMAS DE CONFORMIDAD"
+            esperadas = COLUMNAS_TABLAS.get(seccion) or bloque.columnas
+            for numero, ancho in enumerate(bloque.anchos, 1):
+                if esperadas is not None and ancho != esperadas:
+                    errores.append(f"Tabla {tablas} ({seccion or 'portada'}): la fila {numero} "
+                                   f"tiene {ancho} columnas, se esperaban {esperadas}")
+                    break
+            firmas = firmas or es_firmas
+    except (zipfile.BadZipFile, KeyError, etree.XMLSyntaxError, OSError) as error:
+        errores.append(f"No se pudo leer el documento: {type(error).__name__}: {error}")
+    else:
+        faltantes = [titulo for titulo in SECCIONES_INDICE if titulo not in titulos]
+        if faltantes:
+            errores.append(f"Faltan secciones: {', '.join(faltantes)}")
+        if not firmas:
+            errores.append("Falta la tabla de firmas")
+        if rellenado and marcadores:
+            listados = ', '.join(sorted(marcadores)[:MAXIMO_MARCADORES])
+            errores.append(f"Quedan {sum(marcadores.values())} marcadores sin rellenar: {listados}")
+
+    return {
+        'archivo': ruta,
+        'estado': 'error' if errores else 'ok',
+        'errores': errores,
+        'tablas': tablas,
+        'marcadores': sum(marcadores.values()),
+        'segundos': round(time.perf_counter() - inicio, 4),
+    }
+
+
+def _validar(argumentos):
+    return validar_documento(*argumentos)
+
+
+def rutas_documentos(entradas):
+    """Expande directorios (sus .docx) y patrones en una lista de rutas"""
+
+    rutas = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            rutas.extend(sorted(glob.glob(os.path.join(entrada, '*.docx'))))
+        else:
+            rutas.extend(sorted(glob.glob(entrada)) or [entrada])
+    # Los temporales de Word (~$...) no son documentos
+    return [ruta for ruta in rutas if not os.path.basename(ruta).startswith('~$')]
+
+
+def validar_documentos(rutas, trabajadores=None, rellenado=False):
+    """Valida los documentos en paralelo y devuelve el informe"""
+
+    inicio = time.perf_counter()
+    trabajos = [(ruta, rellenado) for ruta in rutas]
+    trabajadores = trabajadores or os.cpu_count()
+    if trabajadores == 1 or len(trabajos) < 2:
+        resultados = [_validar(trabajo) for trabajo in trabajos]
+    else:
+        # Documentos pequeños: se reparten en tandas para no pagar un envío por archivo
+        tanda = max(1, len(trabajos) // (trabajadores * 4))
+        with ProcessPoolExecutor(max_workers=trabajadores) as ejecutor:
+            resultados = list(ejecutor.map(_validar, trabajos, chunksize=tanda))
+
+    segundos = time.perf_counter() - inicio
+    correctos = sum(1 for resultado in resultados if resultado['estado'] == 'ok')
+    return {
+        'total': len(resultados),
+        'correctos': correctos,
+        'errores': len(resultados) - correctos,
+        'rellenado': rellenado,
+        'trabajadores': trabajadores,
+        'segundos': round(segundos, 4),
+        'documentos_por_segundo': round(len(resultados) / segundos, 2) if segundos else None,
+        'resultados': resultados,
+    }
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Valida la estructura de documentos generados")
+    parser.add_argument('documentos', nargs='+', help="Archivos .docx, patrones o directorios")
+    parser.add_argument('-j', '--trabajadores', type=int, default=None,
+                        help="Número de procesos (por defecto, uno por núcleo)")
+    parser.add_argument('--rellenado', action='store_true',
+                        help="Falla si quedan marcadores [corchetes] sin rellenar")
+    parser.add_argument('--informe', default='validacion.json',
+                        help="Ruta del informe JSON ('-' = salida estándar)")
+    args = parser.parse_args(argv)
+
+    rutas = rutas_documentos(args.documentos)
+    # Con el informe en la salida estándar, los mensajes van a la de errores
+    mensajes = sys.stderr if args.informe == '-' else sys.stdout
+    print(f"🔎 Validando {len(rutas)} documentos...", file=mensajes)
+    informe = validar_documentos(rutas, args.trabajadores, args.rellenado)
+
+    if args.informe == '-':
+        json.dump(informe, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.informe, 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, ensure_ascii=False, indent=2)
+
+    for resultado in informe['resultados']:
+        for error in resultado['errores']:
+            print(f"❌ {resultado['archivo']}: {error}", file=mensajes)
+    icono = '❌' if informe['errores'] else '✅'
+    print(f"{icono} {informe['correctos']}/{informe['total']} documentos válidos en {informe['segundos']} s "
+          f"({informe['documentos_por_segundo']} docs/s)", file=mensajes)
+    if args.informe != '-':
+        print(f"📁 Informe: {os.path.abspath(args.informe)}", file=mensajes)
+    return 0 if informe['errores'] == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
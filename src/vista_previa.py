@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Vista previa del documento de transferencia en Markdown o HTML.
+
+Las funciones ``agregar_*`` se ejecutan sobre un ``DocumentoIR``
+(``contenido.py``), que registra títulos, párrafos, tablas, bloques de código,
+diagramas y listas sin construir el modelo de objetos de python-docx ni el
+zip. La IR se convierte después en texto, lo que basta para revisar un
+documento en el navegador, en la terminal o en una comprobación de CI.
+
+    python src/vista_previa.py --datos sistema.json -o vista.html
+    python src/vista_previa.py --datos sistema.json --formato md | less
+"""
+
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import time
+
+from generate_word import construir_ir
+from indice import NIVELES_INDICE
+
+FUENTE_CODIGO = 'Consolas'
+ESTILO_CODIGO = 'Codigo'
+ESTILO_LISTA = 'List Bullet'
+ESTILO_CITA = 'Intense Quote'
+
+_ESPECIALES_MD = re.compile(r'([\\`*_<>|])')
+# Inicios de línea que Markdown interpretaría como título, lista o cita
+_INICIO_BLOQUE_MD = re.compile(r'^(\d+(?=\.\s)|(?=#|[-+>]\s))')
+
+_CSS = """\
+body { font-family: Calibri, Arial, sans-serif; max-width: 60em; margin: 2em auto; color: #222; }
+h1.titulo { text-align: center; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #999; padding: 0.25em 0.5em; vertical-align: top; }
+th { background: #dbe5f1; }
+pre { background: #f4f4f4; padding: 0.75em; font-family: Consolas, monospace; font-size: 10pt; }
+blockquote { border-left: 4px solid #4f81bd; margin: 1em 0; padding-left: 1em; font-style: italic; }
+figure { text-align: center; margin: 1em 0; }
+figure img { max-width: 100%; }
+hr.salto { border: 0; border-top: 1px dashed #bbb; margin: 2em 0; }
+"""
+
+
+def _es_codigo(parrafo):
+    """Indica si un párrafo se muestra como bloque de código"""
+
+    if parrafo.estilo == ESTILO_CODIGO:
+        return True
+    return bool(parrafo.runs) and all(run.font.name == FUENTE_CODIGO for run in parrafo.runs)
+
+
+def agrupar_bloques(ir):
+    """Convierte los bloques de la IR en elementos de vista previa.
+
+    Los párrafos de código consecutivos forman un único bloque y las viñetas
+    consecutivas una única lista; los párrafos vacíos (espaciado) se omiten.
+    """
+
+    elementos = []
+    for bloque in ir.bloques:
+        if bloque.tipo == 'salto_pagina':
+            elementos.append(('salto', None))
+        elif bloque.tipo == 'indice':
+            elementos.append(('indice', bloque.entradas(NIVELES_INDICE)))
+        elif bloque.tipo == 'tabla':
+            elementos.append(('tabla', bloque))
+        elif bloque.tipo == 'codigo':
+            elementos.append(('codigo', list(bloque.lineas)))
+        elif bloque.tipo == 'diagrama':
+            elementos.append(('diagrama', bloque.ruta))
+        elif bloque.es_titulo:
+            elementos.append(('titulo', bloque))
+        elif not bloque.text:
+            continue
+        elif _es_codigo(bloque):
+            if elementos and elementos[-1][0] == 'codigo' and bloque.estilo == ESTILO_CODIGO:
+                elementos[-1][1].append(bloque.text)
+            else:
+                elementos.append(('codigo', [bloque.text]))
+        elif bloque.estilo == ESTILO_LISTA:
+            if elementos and elementos[-1][0] == 'lista':
+                elementos[-1][1].append(bloque)
+            else:
+                elementos.append(('lista', [bloque]))
+        elif bloque.estilo == ESTILO_CITA:
+            elementos.append(('cita', bloque))
+        else:
+            elementos.append(('parrafo', bloque))
+    return elementos
+
+
+# --- Markdown ---------------------------------------------------------------
+
+def _md_texto(texto):
+    return _ESPECIALES_MD.sub(r'\\\1', str(texto)).replace('\n', '<br>')
+
+
+def _md_negrita(texto):
+    # Los espacios de los extremos quedan fuera de los asteriscos
+    contenido = texto.strip()
+    if not contenido:
+        return texto
+    inicio = texto[:len(texto) - len(texto.lstrip())]
+    final = texto[len(texto.rstrip()):]
+    return f"{inicio}**{_md_texto(contenido)}**{final}"
+
+
+def _md_ejecuciones(parrafo):
+    return ''.join(
+        _md_negrita(run.text) if run.bold else _md_texto(run.text)
+        for run in parrafo.runs
+    )
+
+
+def _md_tabla(tabla):
+    filas = [[_md_texto(celda) for celda in fila] for fila in tabla.filas]
+    columnas = max([len(fila) for fila in filas] + [len(tabla.encabezados or [])])
+    if tabla.negrita_primera_columna:
+        for fila in filas:
+            if fila and fila[0]:
+                fila[0] = f"**{fila[0]}**"
+    encabezados = [_md_texto(celda) for celda in tabla.encabezados or []]
+    encabezados += [''] * (columnas - len(encabezados))
+
+    lineas = [
+        '| ' + ' | '.join(encabezados) + ' |',
+        '|' + '|'.join(['---'] * columnas) + '|',
+    ]
+    for fila in filas:
+        fila = fila + [''] * (columnas - len(fila))
+        lineas.append('| ' + ' | '.join(fila) + ' |')
+    return '\n'.join(lineas)
+
+
+def renderizar_markdown(ir):
+    """Devuelve la vista previa de la IR en Markdown (GFM)"""
+
+    partes = []
+    for tipo, valor in agrupar_bloques(ir):
+        if tipo == 'titulo':
+            partes.append('#' * (valor.nivel + 1) + ' ' + _md_texto(valor.text))
+        elif tipo == 'parrafo':
+            partes.append(_INICIO_BLOQUE_MD.sub(r'\1\\', _md_ejecuciones(valor), count=1))
+        elif tipo == 'cita':
+            partes.append('> ' + _md_ejecuciones(valor))
+        elif tipo == 'lista':
+            # Los elementos "[ ] ..." del checklist se muestran como tareas (GFM)
+            partes.append('\n'.join('- ' + _md_ejecuciones(parrafo) for parrafo in valor))
+        elif tipo == 'codigo':
+            partes.append('```\n' + '\n'.join(valor) + '\n```')
+        elif tipo == 'indice':
+            partes.append('\n'.join(
+                '  ' * (titulo.nivel - 1) + '- ' + _md_texto(titulo.text) for titulo in valor
+            ))
+        elif tipo == 'tabla':
+            partes.append(_md_tabla(valor))
+        elif tipo == 'diagrama':
+            nombre = _md_texto(os.path.basename(valor))
+            partes.append(f"![{nombre}](<{valor}>)")
+        else:
+            partes.append('---')
+    return '\n\n'.join(partes) + '\n'
+
+
+# --- HTML -------------------------------------------------------------------
+
+def _html_ejecuciones(parrafo):
+    return ''.join(
+        f"<strong>{html.escape(run.text)}</strong>" if run.bold else html.escape(run.text)
+        for run in parrafo.runs
+    )
+
+
+def _html_tabla(tabla):
+    lineas = ['<table>']
+    if tabla.encabezados:
+        celdas = ''.join(f"<th>{html.escape(str(celda))}</th>" for celda in tabla.encabezados)
+        lineas.append(f"<thead><tr>{celdas}</tr></thead>")
+    lineas.append('<tbody>')
+    for fila in tabla.filas:
+        celdas = []
+        for indice, celda in enumerate(fila):
+            texto = html.escape(str(celda)).replace('\n', '<br>')
+            if indice == 0 and tabla.negrita_primera_columna:
+                texto = f"<strong>{texto}</strong>"
+            celdas.append(f"<td>{texto}</td>")
+        lineas.append(f"<tr>{''.join(celdas)}</tr>")
+    lineas.append('</tbody></table>')
+    return '\n'.join(lineas)
+
+
+def renderizar_html(ir, titulo=None):
+    """Devuelve la vista previa de la IR como página HTML autocontenida"""
+
+    if titulo is None:
+        titulos = [bloque.text for bloque in ir.bloques
+                   if bloque.tipo == 'parrafo' and bloque.nivel == 0]
+        titulo = titulos[0] if titulos else 'Vista previa'
+
+    elementos = agrupar_bloques(ir)
+    # Los títulos del índice reciben un ancla a la que enlazan sus entradas
+    anclas = {}
+    for tipo, valor in elementos:
+        if tipo == 'indice':
+            for entrada in valor:
+                anclas[id(entrada)] = f"titulo-{len(anclas) + 1}"
+
+    cuerpo = []
+    for tipo, valor in elementos:
+        if tipo == 'titulo':
+            nivel = min(valor.nivel + 1, 6)
+            clase = ' class="titulo"' if valor.nivel == 0 else ''
+            ancla = f' id="{anclas[id(valor)]}"' if id(valor) in anclas else ''
+            cuerpo.append(f"<h{nivel}{ancla}{clase}>{html.escape(valor.text)}</h{nivel}>")
+        elif tipo == 'indice':
+            cuerpo.append('<nav class="indice">' + ''.join(
+                f'<p style="margin-left: {(entrada.nivel - 1) * 36}pt">'
+                f'<a href="#{anclas[id(entrada)]}">{html.escape(entrada.text)}</a></p>'
+                for entrada in valor
+            ) + '</nav>')
+        elif tipo == 'parrafo':
+            sangria = valor.paragraph_format.left_indent
+            estilo = f' style="margin-left: {sangria.pt:g}pt"' if sangria else ''
+            cuerpo.append(f"<p{estilo}>{_html_ejecuciones(valor)}</p>")
+        elif tipo == 'cita':
+            cuerpo.append(f"<blockquote>{_html_ejecuciones(valor)}</blockquote>")
+        elif tipo == 'lista':
+            items = ''.join(f"<li>{_html_ejecuciones(parrafo)}</li>" for parrafo in valor)
+            cuerpo.append(f"<ul>{items}</ul>")
+        elif tipo == 'codigo':
+            cuerpo.append(f"<pre>{html.escape(chr(10).join(valor))}</pre>")
+        elif tipo == 'tabla':
+            cuerpo.append(_html_tabla(valor))
+        elif tipo == 'diagrama':
+            cuerpo.append(f'<figure><img src="{html.escape(valor)}" '
+                          f'alt="{html.escape(os.path.basename(valor))}"></figure>')
+        else:
+            cuerpo.append('<hr class="salto">')
+
+    return (
+        '<!DOCTYPE html>\n<html lang="es">\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{html.escape(titulo)}</title>\n<style>\n{_CSS}</style>\n</head>\n<body>\n"
+        + '\n'.join(cuerpo)
+        + '\n</body>\n</html>\n'
+    )
+
+
+RENDERIZADORES = {
+    'md': renderizar_markdown,
+    'html': renderizar_html,
+}
+
+
+def generar_vista_previa(datos=None, formato='md'):
+    """Devuelve la vista previa del documento de transferencia de un sistema"""
+
+    if formato not in RENDERIZADORES:
+        raise ValueError(f"Formato de vista previa desconocido: {formato} ({', '.join(RENDERIZADORES)})")
+    return RENDERIZADORES[formato](construir_ir(datos))
+
+
+def _formato_por_extension(ruta):
+    extension = os.path.splitext(ruta or '')[1].lower()
+    return 'html' if extension in ('.html', '.htm') else 'md'
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos"""
+
+    parser = argparse.ArgumentParser(description="Vista previa del documento en Markdown o HTML")
+    parser.add_argument('--datos', help="Archivo JSON con los datos del sistema")
+    parser.add_argument('--inventario', nargs='+', metavar='VOLCADO',
+                        help="Volcados de podman (JSON) o CSV con los microservicios reales")
+    parser.add_argument('-f', '--formato', choices=sorted(RENDERIZADORES),
+                        help="Formato de salida (por defecto, según la extensión; si no, md)")
+    parser.add_argument('-o', '--salida', default='-', help="Archivo de salida ('-' = salida estándar)")
+    args = parser.parse_args(argv)
+
+    datos = None
+    if args.datos:
+        with open(args.datos, encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+    if args.inventario:
+        datos = dict(datos or {}, inventario=args.inventario)
+
+    formato = args.formato or _formato_por_extension(args.salida)
+    inicio = time.perf_counter()
+    texto = generar_vista_previa(datos, formato)
+    segundos = time.perf_counter() - inicio
+
+    if args.salida == '-':
+        sys.stdout.write(texto)
+        return 0
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        archivo.write(texto)
+    print(f"✅ Vista previa generada: {args.salida} ({segundos * 1000:.1f} ms)")
+    print(f"📁 Ruta: {os.path.abspath(args.salida)}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
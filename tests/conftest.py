@@ -0,0 +1,93 @@
+import io
+import os
+import struct
+import sys
+import tracemalloc
+import zipfile
+import zlib
+
+import pytest
+
+# Los módulos de src/ se importan por su nombre, como en los scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import instrumentacion as _instrumentacion  # noqa: E402
+import paralelo as _paralelo  # noqa: E402
+import reproducible as _reproducible  # noqa: E402
+
+# Datos mínimos de un sistema: la fecha fija hace comparables dos generaciones
+DATOS = {'sistema': 'Sistema de Pruebas', 'fecha': '2024-05-01'}
+
+
+@pytest.fixture(autouse=True)
+def entorno_limpio(monkeypatch):
+    """Sin cachés en disco, perfil ni modo reproducible heredados del entorno"""
+
+    for variable in ('GENERAR_WORD_CACHE', 'GENERAR_WORD_PERFIL', 'GENERAR_WORD_REPRODUCIBLE',
+                     'SOURCE_DATE_EPOCH', 'GENERAR_WORD_SOCKET'):
+        monkeypatch.delenv(variable, raising=False)
+    monkeypatch.setattr(_reproducible, '_reproducible', None)
+
+
+@pytest.fixture
+def datos():
+    return dict(DATOS)
+
+
+@pytest.fixture
+def reproducible(monkeypatch):
+    """Activa el modo reproducible solo durante la prueba"""
+
+    monkeypatch.setattr(_reproducible, '_reproducible', True)
+
+
+@pytest.fixture
+def perfilador_aislado(monkeypatch):
+    """Restaura el perfilador del proceso y detiene tracemalloc al terminar"""
+
+    monkeypatch.setattr(_instrumentacion, '_perfilador', None)
+    trazando = tracemalloc.is_tracing()
+    yield
+    if not trazando:
+        tracemalloc.stop()
+
+
+@pytest.fixture
+def ejecutores():
+    """Cierra los pools del proceso al terminar para no dejar trabajadores vivos"""
+
+    yield
+    _paralelo.cerrar_ejecutores()
+
+
+def _png(ancho, alto, color):
+    def fragmento(tipo, contenido):
+        return (struct.pack('>I', len(contenido)) + tipo + contenido
+                + struct.pack('>I', zlib.crc32(tipo + contenido)))
+
+    filas = b''.join(b'\x00' + bytes(color) * ancho for _ in range(alto))
+    return (b'\x89PNG\r\n\x1a\n'
+            + fragmento(b'IHDR', struct.pack('>IIBBBBB', ancho, alto, 8, 2, 0, 0, 0))
+            + fragmento(b'IDAT', zlib.compress(filas))
+            + fragmento(b'IEND', b''))
+
+
+@pytest.fixture
+def diagrama(tmp_path):
+    """Crea un PNG pequeño (sin Pillow) y devuelve su ruta"""
+
+    def crear(nombre='diagrama.png', color=(30, 90, 160)):
+        ruta = tmp_path / nombre
+        ruta.write_bytes(_png(8, 6, color))
+        return str(ruta)
+
+    return crear
+
+
+def leer_parte(origen, nombre='word/document.xml'):
+    """Devuelve una parte de un .docx (ruta, bytes o ``BytesIO``)"""
+
+    if isinstance(origen, bytes):
+        origen = io.BytesIO(origen)
+    with zipfile.ZipFile(origen) as zf:
+        return zf.read(nombre)
@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+import bench_generadores  # noqa: E402
+import generate_word  # noqa: E402
+
+
+def test_medir_transferencia_desglosa_todas_las_secciones(perfilador_aislado):
+    # La medición activa el perfilador del proceso: se restaura al terminar
+    datos = bench_generadores.datos_sinteticos(microservicios=5, comandos=5)
+
+    resultado = bench_generadores.medir_transferencia(datos, 1)
+
+    assert set(resultado['secciones']) == {seccion.__name__ for seccion in generate_word.SECCIONES}
+    assert all(segundos > 0 for segundos in resultado['secciones'].values())
+    assert resultado['guardado'] > 0
+    assert resultado['segundos_por_documento'] > 0
+
+
+def test_comparar_detecta_regresiones(capsys):
+    base = {'escenarios': [
+        {'nombre': 'ejemplo', 'segundos_por_documento': 0.010},
+        {'nombre': 'lote_10', 'segundos_por_documento': 0.100},
+    ]}
+    actual = {'escenarios': [
+        {'nombre': 'ejemplo', 'segundos_por_documento': 0.020},
+        {'nombre': 'lote_10', 'segundos_por_documento': 0.101},
+        {'nombre': 'nuevo', 'segundos_por_documento': 1.0},
+    ]}
+
+    assert bench_generadores.comparar(base, actual, umbral=0.10) == ['ejemplo']
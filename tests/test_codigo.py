@@ -0,0 +1,38 @@
+import pytest
+
+from codigo import agregar_codigo, tokenizar
+from plantilla import nuevo_documento
+
+
+def test_bloque_de_codigo_en_un_solo_parrafo():
+    doc = nuevo_documento()
+    lineas = ["podman ps -a", "", "\tcd /opt/app && ./desplegar.sh"]
+
+    parrafo = agregar_codigo(doc, lineas)
+
+    assert len(doc.paragraphs) == 1
+    assert parrafo.text == '\n'.join(lineas)
+    assert parrafo.style.name == 'Codigo'
+    assert len(parrafo.runs) == 1
+
+
+def test_resaltado_conserva_el_texto():
+    doc = nuevo_documento()
+    lineas = ['# reiniciar', 'podman restart "api" --time 10 && echo $HOME']
+
+    parrafo = agregar_codigo(doc, lineas, lenguaje='sh')
+
+    assert parrafo.text == '\n'.join(lineas)
+    assert len(doc.paragraphs) == 1
+
+
+def test_tokenizar_bash():
+    assert tokenizar('podman ps --all | grep api', 'bash') == (
+        ('comando', 'podman'), (None, ' ps '), ('opcion', '--all'), (None, ' '),
+        ('operador', '|'), (None, ' '), ('comando', 'grep'), (None, ' api'),
+    )
+
+
+def test_lenguaje_desconocido():
+    with pytest.raises(ValueError):
+        agregar_codigo(nuevo_documento(), ['x'], lenguaje='cobol')
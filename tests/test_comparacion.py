@@ -0,0 +1,41 @@
+import io
+
+from comparacion import comparar_documentos, imprimir_resultado
+from generate_word import completar_datos, crear_documento_transferencia
+
+
+def _documento(tmp_path, nombre, datos):
+    ruta = str(tmp_path / nombre)
+    crear_documento_transferencia(dict(datos), ruta)
+    return ruta
+
+
+def test_documentos_identicos(tmp_path, datos):
+    # Dos generaciones solo difieren en los metadatos, no en el cuerpo
+    antes = _documento(tmp_path, 'v1.docx', datos)
+    despues = _documento(tmp_path, 'v2.docx', datos)
+
+    resultado = comparar_documentos(antes, despues)
+
+    assert resultado['identicos']
+    assert resultado['modificadas'] == []
+
+
+def test_solo_las_secciones_cambiadas(tmp_path, datos):
+    microservicios = [list(fila) for fila in completar_datos(dict(datos))['microservicios']]
+    microservicios[2][3] = 'Función cambiada'
+    antes = _documento(tmp_path, 'v1.docx', datos)
+    despues = _documento(tmp_path, 'v2.docx', dict(datos, microservicios=microservicios))
+
+    resultado = comparar_documentos(antes, despues)
+
+    assert not resultado['identicos']
+    assert resultado['agregadas'] == resultado['eliminadas'] == []
+    assert [seccion['seccion'] for seccion in resultado['modificadas']] == ['2.2 Listado de microservicios']
+    fila = resultado['modificadas'][0]['cambios'][0]
+    assert (fila['tipo'], fila['accion']) == ('fila', 'modificado')
+    assert fila['antes'][3] != fila['despues'][3] == 'Función cambiada'
+
+    salida = io.StringIO()
+    imprimir_resultado(resultado, salida)
+    assert 'Función cambiada' in salida.getvalue()
@@ -0,0 +1,39 @@
+import re
+import zipfile
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+from conftest import leer_parte
+from compendio import crear_compendio
+from generate_word import construir_documento
+
+
+def test_compendio_sin_identificadores_repetidos(tmp_path, datos, diagrama):
+    rutas = []
+    for numero, color in enumerate([(200, 40, 40), (40, 200, 40)], 1):
+        doc = construir_documento(dict(datos, sistema=f"Sistema {numero}"))
+        doc.add_picture(diagrama(f"diagrama_{numero}.png", color))
+        # Todos los documentos usan el mismo marcador con el mismo id
+        doc.paragraphs[-1]._p.insert(0, parse_xml(
+            f'<w:bookmarkStart {nsdecls("w")} w:id="0" w:name="arquitectura"/>'))
+        doc.paragraphs[-1]._p.append(parse_xml(f'<w:bookmarkEnd {nsdecls("w")} w:id="0"/>'))
+        ruta = str(tmp_path / f"sistema_{numero}.docx")
+        doc.save(ruta)
+        rutas.append(ruta)
+    destino = str(tmp_path / 'compendio.docx')
+
+    resumen = crear_compendio(rutas, destino)
+
+    assert resumen['documentos'] == 2
+    assert zipfile.ZipFile(destino).testzip() is None
+    xml = leer_parte(destino).decode('utf-8')
+    assert 'Sistema 1' in xml and 'Sistema 2' in xml
+    for patron in (r'<w:bookmarkStart w:id="(\d+)"', r'<w:bookmarkStart [^>]*w:name="([^"]+)"',
+                   r'<wp:docPr id="(\d+)"'):
+        valores = re.findall(patron, xml)
+        assert len(valores) == len(set(valores)) >= 2, patron
+    # Cada documento aporta su imagen, distinta de la del otro
+    assert len(set(re.findall(r'r:embed="(rId\d+)"', xml))) == 2
+    # Los documentos de la misma plantilla no añaden estilos
+    assert resumen['estilos_importados'] == 0
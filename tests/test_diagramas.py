@@ -0,0 +1,81 @@
+import io
+import os
+import re
+import zipfile
+
+from conftest import leer_parte
+import diagramas
+from diagramas import agregar_diagrama, huellas_diagramas, preparar_diagrama
+from generate_word import crear_documento_transferencia
+from plantilla import nuevo_documento
+
+
+def test_misma_imagen_una_sola_parte(tmp_path, diagrama):
+    ruta = diagrama()
+    doc = nuevo_documento()
+
+    agregar_diagrama(doc, ruta)
+    agregar_diagrama(doc, ruta)
+    agregar_diagrama(doc, diagrama('otro.png', (10, 10, 10)))
+    destino = io.BytesIO()
+    doc.save(destino)
+
+    medios = [nombre for nombre in zipfile.ZipFile(destino).namelist() if nombre.startswith('word/media/')]
+    assert len(medios) == 2
+    xml = leer_parte(destino.getvalue()).decode('utf-8')
+    identificadores = re.findall(r'<wp:docPr id="(\d+)"', xml)
+    assert len(identificadores) == len(set(identificadores)) == 3
+
+
+def test_preparar_diagrama_respeta_el_ancho(diagrama):
+    ruta = diagrama()
+
+    imagen, svg, cx, cy = preparar_diagrama(ruta, ancho_maximo=10 ** 7)
+
+    assert svg is None
+    assert (imagen.px_width, imagen.px_height) == (8, 6)
+    assert cx * 6 == cy * 8
+    # Una segunda preparación reutiliza la del proceso
+    assert preparar_diagrama(ruta, ancho_maximo=10 ** 7)[0] is imagen
+    _, _, cx_fijo, _ = preparar_diagrama(ruta, ancho_maximo=10 ** 7, ancho=914400)
+    assert cx_fijo == 914400
+
+
+def test_las_caches_de_diagramas_estan_acotadas(monkeypatch, diagrama):
+    monkeypatch.setattr(diagramas, 'MAXIMO_HUELLAS', 2)
+    monkeypatch.setattr(diagramas, 'MAXIMO_PREPARADAS', 2)
+    rutas = [diagrama(f'd{i}.png', (i * 40, 0, 0)) for i in range(4)]
+
+    preparadas = [preparar_diagrama(ruta, ancho_maximo=10 ** 7) for ruta in rutas]
+
+    assert len(diagramas._huellas) <= 2
+    assert len(diagramas._preparadas) <= 2
+    # Se descartan las menos usadas: la última sigue en memoria y la primera no
+    assert preparar_diagrama(rutas[-1], ancho_maximo=10 ** 7) is preparadas[-1]
+    assert preparar_diagrama(rutas[0], ancho_maximo=10 ** 7) is not preparadas[0]
+
+
+def test_diagramas_de_servicios_en_el_documento(datos, diagrama):
+    datos = dict(datos, diagrama_arquitectura=diagrama(),
+                 diagramas_servicios={'Servicio de Autenticación': diagrama()})
+    destino = io.BytesIO()
+
+    crear_documento_transferencia(dict(datos), destino)
+
+    # El mismo archivo en dos secciones se incrusta una vez
+    medios = [nombre for nombre in zipfile.ZipFile(destino).namelist() if nombre.startswith('word/media/')]
+    assert len(medios) == 1
+    assert leer_parte(destino.getvalue()).count(b'<w:drawing>') == 2
+
+
+def test_la_huella_cambia_con_el_contenido(datos, diagrama):
+    ruta = diagrama()
+    datos = dict(datos, diagrama_arquitectura=ruta)
+    antes = huellas_diagramas(datos)
+
+    estado = os.stat(ruta)
+    diagrama(color=(250, 250, 0))
+    os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 10 ** 9))
+
+    assert huellas_diagramas(datos)[ruta] != antes[ruta]
+    assert huellas_diagramas({'sistema': 'Sin diagramas'}) is None
@@ -0,0 +1,44 @@
+import pytest
+
+from estilos import agregar_parrafo, agregar_titulo, registro_estilos
+from plantilla import nuevo_documento
+
+
+@pytest.mark.parametrize('estilo', [None, 'Normal', 'List Bullet', 'Intense Quote', 'Codigo',
+                                    'heading 2'])
+def test_mismo_estilo_que_add_paragraph(estilo):
+    esperado = nuevo_documento().add_paragraph('texto', style=estilo)
+
+    obtenido = agregar_parrafo(nuevo_documento(), 'texto', estilo)
+
+    assert obtenido._p.style == esperado._p.style
+    assert obtenido.style.name == esperado.style.name
+    assert obtenido.text == 'texto'
+
+
+def test_titulo_como_add_heading():
+    for nivel in (0, 1, 2):
+        esperado = nuevo_documento().add_heading('Título', nivel)
+        assert agregar_titulo(nuevo_documento(), 'Título', nivel)._p.xml == esperado._p.xml
+
+
+def test_estilo_desconocido_no_deja_parrafos():
+    doc = nuevo_documento()
+
+    for _ in range(2):
+        with pytest.raises(KeyError):
+            agregar_parrafo(doc, 'texto', 'No Existe')
+    assert doc.paragraphs == []
+
+
+def test_estilo_de_otro_tipo():
+    with pytest.raises(ValueError):
+        agregar_parrafo(nuevo_documento(), 'texto', 'Light Grid Accent 1')
+
+
+def test_estilo_agregado_despues_de_indexar():
+    doc = nuevo_documento()
+    registro_estilos(doc)
+    doc.styles.add_style('Nuevo', 1)
+
+    assert agregar_parrafo(doc, 'texto', 'Nuevo').style.name == 'Nuevo'
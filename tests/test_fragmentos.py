@@ -0,0 +1,53 @@
+import io
+
+from conftest import leer_parte
+from fragmentos import CacheFragmentos, clave_seccion
+from generate_word import (
+    ENTRADAS_SECCIONES,
+    agregar_configuracion,
+    completar_datos,
+    crear_documento_transferencia,
+)
+
+
+def _generar(datos, cache):
+    destino = io.BytesIO()
+    crear_documento_transferencia(dict(datos), destino, cache=cache)
+    return destino.getvalue()
+
+
+def test_acierto_de_cache_produce_el_mismo_documento(datos, reproducible):
+    cache = CacheFragmentos()
+
+    sin_cache = _generar(datos, None)
+    primera = _generar(datos, cache)
+    segunda = _generar(datos, cache)
+
+    assert cache.aciertos > 0
+    assert leer_parte(primera) == leer_parte(sin_cache)
+    assert segunda == primera
+
+
+def test_la_clave_depende_solo_de_las_entradas_de_la_seccion(datos):
+    entradas = ENTRADAS_SECCIONES[agregar_configuracion]
+    base = completar_datos(dict(datos))
+
+    clave = clave_seccion(agregar_configuracion, base, entradas)
+
+    assert clave == clave_seccion(agregar_configuracion, dict(base, responsable='Otra'), entradas)
+    assert clave != clave_seccion(agregar_configuracion, dict(base, variables=[('A', 'B', 'C')]),
+                                  entradas)
+    # Entradas no serializables: la sección no se cachea
+    assert clave_seccion(agregar_configuracion, dict(base, variables=iter([])), entradas) is None
+    assert clave_seccion(agregar_configuracion, base, None) is None
+
+
+def test_cache_en_disco_compartida(datos, tmp_path, reproducible):
+    primera = _generar(datos, CacheFragmentos(directorio=str(tmp_path)))
+
+    # Otra caché (otro proceso) sobre el mismo directorio
+    cache = CacheFragmentos(directorio=str(tmp_path))
+    segunda = _generar(datos, cache)
+
+    assert cache.aciertos > 0
+    assert segunda == primera
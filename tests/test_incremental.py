@@ -0,0 +1,39 @@
+import io
+
+from generate_word import SECCIONES, crear_documento_transferencia
+from incremental import regenerar_documento
+from plantilla import nuevo_documento
+
+
+def test_regeneracion_incremental_igual_a_la_completa(datos, tmp_path, reproducible):
+    original = tmp_path / 'original.docx'
+    crear_documento_transferencia(dict(datos), str(original))
+    cambiados = dict(datos, responsable='Otra Persona', variables=[('API_URL', '.env', 'Manual')])
+
+    resultado = regenerar_documento(str(original), dict(cambiados), str(tmp_path / 'incremental.docx'))
+
+    completo = io.BytesIO()
+    crear_documento_transferencia(dict(cambiados), completo)
+    assert not resultado['completo']
+    assert 'agregar_configuracion' in resultado['regeneradas']
+    assert len(resultado['regeneradas']) < len(SECCIONES)
+    assert (tmp_path / 'incremental.docx').read_bytes() == completo.getvalue()
+
+
+def test_sin_cambios_no_regenera_nada(datos, tmp_path):
+    ruta = tmp_path / 'documento.docx'
+    crear_documento_transferencia(dict(datos), str(ruta))
+
+    resultado = regenerar_documento(str(ruta), dict(datos))
+
+    assert not resultado['completo']
+    assert resultado['regeneradas'] == []
+
+
+def test_documento_sin_huellas_se_regenera_completo(datos, tmp_path):
+    ruta = tmp_path / 'ajeno.docx'
+    nuevo_documento().save(str(ruta))
+
+    resultado = regenerar_documento(str(ruta), dict(datos))
+
+    assert resultado['completo']
@@ -0,0 +1,57 @@
+import io
+
+from docx import Document
+from docx.oxml.ns import qn
+from fragmentos import CacheFragmentos
+from generate_word import SECCIONES_INDICE, crear_documento_transferencia
+from indice import PREFIJO_MARCADOR
+
+
+def _generar(datos, **opciones):
+    destino = io.BytesIO()
+    crear_documento_transferencia(dict(datos), destino, **opciones)
+    return destino.getvalue()
+
+
+def _indice_y_titulos(contenido):
+    """Entradas del índice (anclas y texto) y títulos con su marcador"""
+
+    cuerpo = Document(io.BytesIO(contenido)).element.body
+    entradas = [
+        (enlace.get(qn('w:anchor')), ''.join(t.text or '' for t in enlace.iter(qn('w:t'))))
+        for enlace in cuerpo.iter(qn('w:hyperlink'))
+    ]
+    titulos = []
+    for parrafo in cuerpo.iter(qn('w:p')):
+        for marcador in parrafo.iter(qn('w:bookmarkStart')):
+            if marcador.get(qn('w:name')).startswith(PREFIJO_MARCADOR):
+                texto = ''.join(t.text or '' for t in parrafo.iter(qn('w:t')))
+                titulos.append((marcador.get(qn('w:name')), texto))
+    return entradas, titulos
+
+
+def test_las_entradas_enlazan_con_los_titulos(datos):
+    entradas, titulos = _indice_y_titulos(_generar(datos))
+
+    assert entradas == titulos
+    assert [texto for _, texto in entradas if texto in SECCIONES_INDICE] == list(SECCIONES_INDICE)
+    assert len({ancla for ancla, _ in entradas}) == len(entradas)
+
+
+def test_indice_igual_con_cache_y_en_paralelo(datos, reproducible, ejecutores):
+    cache = CacheFragmentos()
+    normal = _generar(datos)
+
+    assert _generar(datos, cache=cache) == normal
+    assert _generar(datos, cache=cache) == normal
+    assert _generar(datos, procesos=2) == normal
+
+
+def test_indice_en_streaming_igual_que_en_memoria(datos, reproducible, ejecutores):
+    streaming = _generar(datos, streaming=True)
+
+    entradas, titulos = _indice_y_titulos(streaming)
+    assert entradas == titulos
+    assert [texto for _, texto in entradas if texto in SECCIONES_INDICE] == list(SECCIONES_INDICE)
+    assert streaming == _generar(datos)
+    assert _generar(datos, streaming=True, procesos=2) == streaming
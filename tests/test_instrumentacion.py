@@ -0,0 +1,50 @@
+import csv
+import json
+
+import pytest
+
+import instrumentacion
+from generate_word import SECCIONES, construir_documento
+
+
+@pytest.fixture
+def perfil(perfilador_aislado, tmp_path):
+    return instrumentacion.activar_perfilador(str(tmp_path / 'perfil.json'))
+
+
+def test_perfilador_inactivo_por_defecto(perfilador_aislado):
+    assert not instrumentacion.obtener_perfilador().activo
+
+
+def test_un_registro_por_seccion_con_recuentos(datos, perfil, tmp_path):
+    doc = construir_documento(dict(datos))
+    with perfil.guardado():
+        doc.save(str(tmp_path / 'documento.docx'))
+
+    secciones = [registro['seccion'] for registro in perfil.registros]
+    assert secciones == [seccion.__name__ for seccion in SECCIONES] + ['guardado']
+    resumen = {total['seccion']: total for total in perfil.resumen()}
+    assert resumen['agregar_firmas']['celdas'] == 5 * 4
+    assert sum(total['parrafos'] for total in resumen.values()) >= len(doc.paragraphs)
+    assert all(registro['documento'] == datos['sistema'] for registro in perfil.registros[:-1])
+
+
+def test_informes_json_y_csv(datos, perfil, tmp_path):
+    construir_documento(dict(datos))
+
+    with open(perfil.escribir_informe(), encoding='utf-8') as archivo:
+        informe = json.load(archivo)
+    assert len(informe['registros']) == len(SECCIONES)
+    assert round(sum(total['porcentaje'] for total in informe['resumen'])) == 100
+
+    with open(perfil.escribir_informe(str(tmp_path / 'perfil.csv')), encoding='utf-8') as archivo:
+        filas = list(csv.DictReader(archivo))
+    assert [fila['seccion'] for fila in filas] == [seccion.__name__ for seccion in SECCIONES]
+
+
+def test_variable_de_entorno(perfilador_aislado, monkeypatch, tmp_path):
+    monkeypatch.setenv(instrumentacion.VARIABLE_PERFIL, str(tmp_path / 'perfil.csv'))
+
+    perfil = instrumentacion.obtener_perfilador()
+
+    assert perfil.activo and perfil.ruta_informe.endswith('perfil.csv')
@@ -0,0 +1,58 @@
+import io
+import json
+
+from conftest import leer_parte
+from generate_word import construir_documento
+from inventario import aplicar_inventario, cargar_inventario, objetos_json
+from vista_previa import generar_vista_previa
+
+PS = [
+    {'Names': ['servicio-10'], 'Ports': [{'host_port': 5010}], 'Image': 'registro/s10:1.0',
+     'Labels': {'funcion': 'Pagos', 'dependencias': 'PostgreSQL'}},
+    {'Names': ['servicio-9'], 'Ports': '0.0.0.0:5009->5009/tcp', 'Image': 'registro/s9:1.0'},
+]
+INSPECT = [
+    {'Name': '/servicio-10', 'Config': {'Image': 'registro/s10:1.0', 'Labels': {}},
+     'NetworkSettings': {'Ports': {'6010/tcp': [{'HostPort': '6010'}], '7000/tcp': None}}},
+]
+
+
+def test_objetos_json_con_bloques_pequenos():
+    texto = json.dumps(PS) + '\n' + '\n'.join(json.dumps(objeto) for objeto in INSPECT)
+
+    # Bloques de 7 caracteres: los objetos quedan partidos entre lecturas
+    assert list(objetos_json(io.StringIO(texto), tamano_bloque=7)) == PS + INSPECT
+
+
+def test_cargar_inventario_fusiona_replicas_y_ordena(tmp_path):
+    ps = tmp_path / 'ps.json'
+    ps.write_text(json.dumps(PS), encoding='utf-8')
+    inspect = tmp_path / 'inspect.json'
+    inspect.write_text(json.dumps(INSPECT), encoding='utf-8')
+    csv = tmp_path / 'servicios.csv'
+    csv.write_text('name,ports,description\nservicio-2,"80; 443",Portal\n', encoding='utf-8')
+
+    filas = cargar_inventario([str(ps), str(inspect), str(csv)])
+
+    assert filas == [
+        ('1', 'servicio-2', '80, 443', 'Portal', ''),
+        ('2', 'servicio-9', '5009', 'registro/s9:1.0', ''),
+        ('3', 'servicio-10', '5010, 6010', 'Pagos', 'PostgreSQL'),
+    ]
+
+
+def test_aplicar_inventario_llega_al_documento(tmp_path, datos):
+    ruta = tmp_path / 'ps.json'
+    ruta.write_text(json.dumps(PS), encoding='utf-8')
+
+    completos = aplicar_inventario(dict(datos, inventario=str(ruta)))
+
+    assert 'inventario' not in completos
+    assert [fila[1] for fila in completos['microservicios']] == ['servicio-9', 'servicio-10']
+    # Los datos originales no se modifican y sin inventario se devuelven tal cual
+    assert aplicar_inventario(datos) is datos
+    destino = io.BytesIO()
+    construir_documento(completos).save(destino)
+    assert b'servicio-10' in leer_parte(destino.getvalue())
+    # Las demás entradas aceptan la ruta del inventario en los datos
+    assert '| servicio-10 |' in generar_vista_previa(dict(datos, inventario=str(ruta)))
@@ -0,0 +1,70 @@
+import json
+import zipfile
+
+from conftest import leer_parte
+from generate_word import completar_datos
+from lote import generar_lote, leer_manifiesto, nombre_archivo_registro
+
+
+def test_un_registro_con_error_no_detiene_el_lote(tmp_path):
+    registros = [
+        {'sistema': 'Alfa', 'fecha': '2024-05-01'},
+        {'sistema': 'Fecha rota', 'fecha': 'no-es-una-fecha'},
+        # Falla dentro del trabajador: la tabla de microservicios no es iterable
+        {'sistema': 'Tabla rota', 'fecha': '2024-05-01', 'microservicios': 5},
+        {'sistema': 'Beta', 'fecha': '2024-05-01'},
+    ]
+
+    resumen = generar_lote(registros, str(tmp_path), trabajadores=2)
+
+    assert (resumen['total'], resumen['correctos'], resumen['errores']) == (4, 2, 2)
+    estados = [resultado['estado'] for resultado in resumen['resultados']]
+    assert estados == ['ok', 'error', 'error', 'ok']
+    for resultado in resumen['resultados']:
+        if resultado['estado'] == 'ok':
+            assert zipfile.ZipFile(resultado['archivo']).testzip() is None
+        else:
+            assert resultado['error']
+
+
+def test_nombres_repetidos_no_se_sobrescriben(tmp_path):
+    registros = [{'sistema': 'Mismo', 'fecha': '2024-05-01'}] * 2
+
+    resumen = generar_lote(registros, str(tmp_path), trabajadores=1)
+
+    archivos = [resultado['archivo'] for resultado in resumen['resultados']]
+    assert len(set(archivos)) == 2
+    assert all(resultado['estado'] == 'ok' for resultado in resumen['resultados'])
+
+
+def test_el_inventario_del_registro_llega_al_documento(tmp_path):
+    inventario = tmp_path / 'inventario.csv'
+    inventario.write_text('nombre,puerto\nservicio-real,7001\n', encoding='utf-8')
+    registros = [{'sistema': 'Alfa', 'fecha': '2024-05-01', 'inventario': str(inventario)}]
+
+    resumen = generar_lote(registros, str(tmp_path / 'salida'), trabajadores=1)
+
+    resultado = resumen['resultados'][0]
+    assert resultado['estado'] == 'ok', resultado.get('error')
+    assert resultado['archivo'].endswith('Transferencia_Tecnologica_Alfa_20240501.docx')
+    xml = leer_parte(resultado['archivo'])
+    assert b'servicio-real' in xml
+    assert b'servicio-autenticacion' not in xml
+
+
+def test_manifiesto_csv_omite_celdas_vacias(tmp_path):
+    ruta = tmp_path / 'sistemas.csv'
+    ruta.write_text('sistema,fecha,version\nAlfa,2024-05-01,\n', encoding='utf-8')
+
+    registros = leer_manifiesto(str(ruta))
+
+    assert registros == [{'sistema': 'Alfa', 'fecha': '2024-05-01'}]
+    datos = completar_datos(registros[0])
+    assert nombre_archivo_registro(datos, 1) == 'Transferencia_Tecnologica_Alfa_20240501.docx'
+
+
+def test_manifiesto_json_con_objeto_sistemas(tmp_path):
+    ruta = tmp_path / 'sistemas.json'
+    ruta.write_text(json.dumps({'sistemas': [{'sistema': 'Alfa'}]}), encoding='utf-8')
+
+    assert leer_manifiesto(str(ruta)) == [{'sistema': 'Alfa'}]
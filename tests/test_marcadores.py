@@ -0,0 +1,73 @@
+import io
+import zipfile
+
+import pytest
+
+import salida
+from conftest import leer_parte
+from generate_word import crear_documento_transferencia
+from marcadores import DocumentoConMarcadores, indexar_xml, normalizar_valores, rellenar_xml
+
+# Un marcador partido en tres ejecuciones, como lo deja Word al editar
+XML_PARTIDO = (
+    '<w:p><w:r><w:t>Responsable: [Tu </w:t></w:r><w:r><w:rPr><w:b/></w:rPr>'
+    '<w:t>Nombre</w:t></w:r><w:r><w:t xml:space="preserve"> Completo] y [vX.X.X]</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>[sin cerrar</w:t></w:r></w:p><w:p><w:r><w:t>aquí]</w:t></w:r></w:p>'
+).encode('utf-8')
+
+
+def test_rellenar_xml_en_ejecuciones_partidas():
+    ocurrencias = indexar_xml(XML_PARTIDO)
+
+    assert [texto for texto, _ in ocurrencias] == ['[Tu Nombre Completo]', '[vX.X.X]']
+    assert len(ocurrencias[0][1]) == 3
+
+    relleno = rellenar_xml(XML_PARTIDO, ocurrencias, {'[Tu Nombre Completo]': 'Ana & Co'})
+
+    assert relleno == XML_PARTIDO.replace(b'[Tu </w:t>', b'Ana &amp; Co</w:t>').replace(
+        b'<w:t>Nombre</w:t>', b'<w:t></w:t>').replace(b'> Completo] y', b'> y')
+    # Los marcadores sin valor y los que cruzan párrafos se conservan
+    assert b'[vX.X.X]' in relleno and b'[sin cerrar' in relleno
+
+
+def test_normalizar_valores():
+    assert normalizar_valores({'Tu Nombre Completo': 'Ana', '[vX.X.X]': 'v2.0', 'Vacío': None}) == {
+        '[Tu Nombre Completo]': 'Ana', '[vX.X.X]': 'v2.0'}
+
+
+def test_copia_rellena(tmp_path, datos):
+    base = tmp_path / 'base.docx'
+    crear_documento_transferencia(dict(datos), str(base))
+    documento = DocumentoConMarcadores(str(base), directorio_cache=str(tmp_path / 'cache'))
+
+    assert documento.marcadores()['[Tu Nombre Completo]'] >= 1
+    assert list((tmp_path / 'cache').glob('marcadores_*.json'))
+
+    destino = io.BytesIO()
+    documento.rellenar({'Tu Nombre Completo': 'Ana Pérez'}, destino)
+
+    xml = leer_parte(destino.getvalue()).decode('utf-8')
+    assert '[Tu Nombre Completo]' not in xml
+    assert 'Ana Pérez' in xml
+    assert '[vX.X.X]' in xml
+    # Las partes sin marcadores se copian tal cual
+    assert leer_parte(destino.getvalue(), 'word/styles.xml') == leer_parte(str(base), 'word/styles.xml')
+
+
+@pytest.mark.parametrize('crudo', [True, False])
+def test_copia_igual_con_y_sin_acceso_crudo(tmp_path, datos, monkeypatch, crudo):
+    base = tmp_path / 'base.docx'
+    crear_documento_transferencia(dict(datos), str(base))
+    if not crudo:
+        # Versión fuera del rango comprobado: las partes se leen y recomprimen
+        monkeypatch.setattr(salida, '_VERSIONES_ZIP_CRUDO', ((0, 0), (0, 0)))
+
+    destino = io.BytesIO()
+    DocumentoConMarcadores(str(base)).rellenar({'Tu Nombre Completo': 'Ana'}, destino)
+
+    with zipfile.ZipFile(str(base)) as original, zipfile.ZipFile(destino) as copia:
+        assert copia.testzip() is None
+        assert copia.namelist() == original.namelist()
+        for nombre in original.namelist():
+            if nombre != 'word/document.xml':
+                assert copia.read(nombre) == original.read(nombre)
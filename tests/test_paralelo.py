@@ -0,0 +1,41 @@
+import io
+
+import paralelo
+from fragmentos import CacheFragmentos
+from generate_word import crear_documento_transferencia
+
+
+def _generar(datos, **opciones):
+    destino = io.BytesIO()
+    crear_documento_transferencia(dict(datos), destino, **opciones)
+    return destino.getvalue()
+
+
+def test_paralelo_identico_al_secuencial(datos, diagrama, reproducible, ejecutores):
+    datos = dict(datos, diagrama_arquitectura=diagrama(),
+                 diagramas_servicios={'Servicio de Autenticación': diagrama('auth.png', (200, 40, 40))})
+
+    secuencial = _generar(datos)
+
+    assert _generar(datos, procesos=2) == secuencial
+    # El pool se reutiliza entre documentos
+    ejecutor = paralelo.obtener_ejecutor(2)
+    assert _generar(datos, procesos=2) == secuencial
+    assert paralelo.obtener_ejecutor(2) is ejecutor
+
+
+def test_paralelo_con_cache_de_fragmentos(datos, reproducible, ejecutores):
+    cache = CacheFragmentos()
+    secuencial = _generar(datos)
+
+    assert _generar(datos, procesos=2, cache=cache) == secuencial
+    assert _generar(datos, procesos=2, cache=cache) == secuencial
+    assert cache.aciertos > 0
+
+
+def test_cerrar_ejecutores(ejecutores):
+    ejecutor = paralelo.obtener_ejecutor(2)
+
+    paralelo.cerrar_ejecutores()
+
+    assert paralelo.obtener_ejecutor(2) is not ejecutor
@@ -0,0 +1,66 @@
+import io
+import json
+
+import pytest
+
+import generate_word
+import plan
+from conftest import leer_parte
+from contenido import DocumentoIR
+from generate_word import construir_documento
+
+
+def _documento(doc):
+    destino = io.BytesIO()
+    doc.save(destino)
+    return leer_parte(destino.getvalue())
+
+
+def test_plan_equivale_al_generador(datos, diagrama):
+    datos = dict(datos, diagrama_arquitectura=diagrama(),
+                 diagramas_servicios={'Servicio de Autenticación': diagrama('auth.png', (200, 40, 40))})
+
+    desde_plan = _documento(plan.construir_documento_plan(dict(datos)))
+
+    assert desde_plan == _documento(construir_documento(dict(datos)))
+
+
+def test_las_secciones_salen_de_la_especificacion(monkeypatch):
+    seccion = {'nombre': 'mejoras', 'bloques': [
+        {'tipo': 'titulo', 'texto': '10. OTRO TÍTULO', 'nivel': 1},
+        {'tipo': 'parrafo', 'texto': 'Sistema {sistema}'},
+    ]}
+    monkeypatch.setattr(generate_word, 'seccion_por_defecto', lambda nombre: seccion)
+    ir = DocumentoIR()
+
+    generate_word.agregar_mejoras(ir, {'sistema': 'Pagos'})
+
+    assert [bloque.text for bloque in ir.bloques] == ['10. OTRO TÍTULO', 'Sistema Pagos']
+
+
+def test_plan_en_cache_de_disco(tmp_path, monkeypatch):
+    monkeypatch.setattr(plan, '_planes', {})
+    primero = plan.obtener_plan(directorio_cache=str(tmp_path))
+    archivos = list(tmp_path.glob('plan_*.json'))
+    assert len(archivos) == 1
+    assert json.loads(archivos[0].read_text(encoding='utf-8')) == primero
+
+    # Otro proceso lo carga del disco sin compilar
+    monkeypatch.setattr(plan, '_planes', {})
+    monkeypatch.setattr(plan, 'compilar_plan', None)
+    assert plan.obtener_plan(directorio_cache=str(tmp_path)) == primero
+
+
+@pytest.mark.parametrize('especificacion', [
+    [],
+    {'secciones': [{'bloques': []}]},
+    {'secciones': [{'nombre': 'a', 'bloques': [{'tipo': 'no-existe'}]}]},
+    {'secciones': [{'nombre': 'a'}, {'nombre': 'a'}]},
+])
+def test_especificacion_invalida(especificacion):
+    with pytest.raises(ValueError):
+        plan.validar_especificacion(especificacion)
+
+
+def test_la_especificacion_incluida_es_valida():
+    plan.validar_especificacion(plan.cargar_especificacion())
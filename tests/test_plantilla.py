@@ -0,0 +1,62 @@
+from docx import Document
+
+import plantilla
+
+
+def test_documentos_nuevos_traen_los_estilos_personalizados():
+    doc = plantilla.nuevo_documento()
+
+    nombres = {estilo.name for estilo in doc.styles}
+    for definicion in plantilla.ESTILOS_PERSONALIZADOS:
+        assert definicion['nombre'] in nombres
+    assert doc.styles['Normal'].font.name == plantilla.ESTILO_NORMAL['fuente']
+
+
+def test_cada_documento_es_una_copia_independiente():
+    primero = plantilla.nuevo_documento()
+    primero.add_paragraph('solo en el primero')
+
+    segundo = plantilla.nuevo_documento()
+
+    assert [p.text for p in segundo.paragraphs] == []
+
+
+def test_los_clones_no_comparten_partes(monkeypatch):
+    plantilla.precargar_plantilla()
+    # El paquete ya está analizado: los documentos nuevos no vuelven a leer el zip
+    monkeypatch.setattr(plantilla, 'Document', None)
+
+    primero = plantilla.nuevo_documento()
+    primero.styles['Codigo'].font.size = None
+    primero.core_properties.title = 'solo en el primero'
+    segundo = plantilla.nuevo_documento()
+
+    assert segundo.styles['Codigo'].font.size is not None
+    assert segundo.core_properties.title != 'solo en el primero'
+    assert segundo.part.package is not primero.part.package
+
+
+def test_la_plantilla_equivale_a_configurar_los_estilos():
+    doc = Document()
+    plantilla.configurar_estilos(doc)
+
+    base = plantilla.nuevo_documento()
+    for definicion in plantilla.ESTILOS_PERSONALIZADOS:
+        esperado = doc.styles[definicion['nombre']]
+        obtenido = base.styles[definicion['nombre']]
+        assert obtenido.font.size == esperado.font.size
+        assert obtenido.font.bold == esperado.font.bold
+
+
+def test_cache_en_disco_de_la_plantilla(tmp_path, monkeypatch):
+    monkeypatch.setattr(plantilla, '_plantilla_base', None)
+    contenido = plantilla.obtener_plantilla_base(str(tmp_path))
+
+    archivos = list(tmp_path.glob('plantilla_*.docx'))
+    assert len(archivos) == 1
+    assert archivos[0].read_bytes() == contenido
+
+    # Un proceso nuevo la lee del disco en lugar de construirla
+    monkeypatch.setattr(plantilla, '_plantilla_base', None)
+    monkeypatch.setattr(plantilla, 'construir_plantilla_base', None)
+    assert plantilla.obtener_plantilla_base(str(tmp_path)) == contenido
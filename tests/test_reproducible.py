@@ -0,0 +1,55 @@
+import io
+import zipfile
+
+from generate_word import SECCIONES, completar_datos, crear_documento_transferencia
+from reproducible import FECHA_ZIP_FIJA
+from resultados import CacheResultados, clave_resultado
+
+
+def _generar(datos, **opciones):
+    destino = io.BytesIO()
+    crear_documento_transferencia(dict(datos), destino, **opciones)
+    return destino.getvalue()
+
+
+def test_modo_reproducible_da_los_mismos_bytes(datos, reproducible):
+    primero = _generar(datos)
+    segundo = _generar(datos)
+
+    assert primero == segundo
+    nombres = zipfile.ZipFile(io.BytesIO(primero)).namelist()
+    assert nombres[:2] == ['[Content_Types].xml', '_rels/.rels']
+    assert nombres[2:] == sorted(nombres[2:])
+    for info in zipfile.ZipFile(io.BytesIO(primero)).infolist():
+        assert info.date_time == FECHA_ZIP_FIJA
+
+
+def test_source_date_epoch(datos, monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1714521600')  # 2024-05-01 00:00 UTC
+
+    assert _generar(datos) == _generar(datos)
+    info = zipfile.ZipFile(io.BytesIO(_generar(datos))).infolist()[0]
+    assert info.date_time == (2024, 5, 1, 0, 0, 0)
+
+
+def test_cache_de_resultados_reutiliza_el_documento(datos, tmp_path, reproducible):
+    cache = CacheResultados(str(tmp_path / 'resultados'))
+    primero, segundo = tmp_path / 'a.docx', tmp_path / 'b.docx'
+
+    crear_documento_transferencia(dict(datos), str(primero), cache_resultados=cache)
+    crear_documento_transferencia(dict(datos), str(segundo), cache_resultados=cache)
+
+    assert segundo.read_bytes() == primero.read_bytes()
+    assert len(list((tmp_path / 'resultados').iterdir())) == 1
+
+
+def test_clave_de_resultado(datos):
+    base = completar_datos(dict(datos))
+
+    clave = clave_resultado(base, SECCIONES)
+
+    # El nombre del archivo no cambia el contenido; la compresión y los datos sí
+    assert clave == clave_resultado(dict(base, archivo='otro.docx'), SECCIONES)
+    assert clave != clave_resultado(base, SECCIONES, compresion=0)
+    assert clave != clave_resultado(dict(base, responsable='Otra'), SECCIONES)
+    assert clave_resultado(dict(base, variables=iter([])), SECCIONES) is None
@@ -0,0 +1,103 @@
+import io
+import zipfile
+import zlib
+
+import pytest
+
+import salida
+from generate_word import construir_documento
+
+CONTENIDO = {
+    'word/document.xml': b'<w:document>' + b'<w:p>texto repetido</w:p>' * 2000 + b'</w:document>',
+    'word/media/image1.png': bytes(range(256)) * 8,
+}
+
+
+def _zip_origen(compresion):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compresion) as zf:
+        for nombre, datos in CONTENIDO.items():
+            zf.writestr(nombre, datos)
+    return buffer
+
+
+@pytest.fixture(params=['crudo', 'api publica'])
+def modo_zip(request, monkeypatch):
+    if request.param == 'api publica':
+        # Versión fuera del rango comprobado: se usa writestr/read
+        monkeypatch.setattr(salida, '_VERSIONES_ZIP_CRUDO', ((0, 0), (0, 0)))
+    return request.param
+
+
+@pytest.mark.parametrize('compresion', [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+def test_copia_comprimida_ida_y_vuelta(modo_zip, compresion):
+    destino = io.BytesIO()
+    with zipfile.ZipFile(_zip_origen(compresion)) as origen, salida.abrir_zip(destino) as zf:
+        for info in origen.infolist():
+            comprimido = salida.leer_comprimido(origen, info)
+            salida.escribir_comprimido(zf, info.filename, comprimido, info.CRC, info.file_size,
+                                       info.compress_type)
+        zf.writestr('despues.txt', b'entrada normal tras las copiadas')
+
+    with zipfile.ZipFile(destino) as zf:
+        assert zf.testzip() is None
+        for nombre, datos in CONTENIDO.items():
+            assert zf.read(nombre) == datos
+            assert zf.getinfo(nombre).compress_type == compresion
+        assert zf.read('despues.txt') == b'entrada normal tras las copiadas'
+
+
+@pytest.mark.parametrize('compresion', [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+def test_copiar_entrada_por_bloques(modo_zip, compresion, monkeypatch):
+    # Bloques pequeños para que la copia necesite varias lecturas
+    monkeypatch.setattr(salida, 'TAMANO_BLOQUE', 256)
+    destino = io.BytesIO()
+    with zipfile.ZipFile(_zip_origen(compresion)) as origen, salida.abrir_zip(destino) as zf:
+        zf.writestr('antes.txt', b'entrada normal')
+        for info in origen.infolist():
+            salida.copiar_entrada(zf, origen, info)
+
+    with zipfile.ZipFile(destino) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ['antes.txt', *CONTENIDO]
+        for nombre, datos in CONTENIDO.items():
+            assert zf.read(nombre) == datos
+
+
+def test_lectura_cruda_devuelve_el_flujo_del_zip():
+    with zipfile.ZipFile(_zip_origen(zipfile.ZIP_DEFLATED)) as zf:
+        info = zf.getinfo('word/document.xml')
+        comprimido = salida.leer_comprimido(zf, info)
+    assert len(comprimido) == info.compress_size
+    assert zlib.decompress(comprimido, -15) == CONTENIDO['word/document.xml']
+
+
+
+def test_niveles_de_compresion_e_hilos(datos, monkeypatch):
+    # Umbral bajo para que las partes del documento de ejemplo se compriman en hilos
+    monkeypatch.setattr(salida, 'UMBRAL_PARALELO', 4096)
+    monkeypatch.setattr(salida, 'TAMANO_BLOQUE', 4096)
+    doc = construir_documento(dict(datos))
+    tamanos = {}
+    contenidos = {}
+    for compresion, hilos in ((0, None), (1, None), (9, None), (9, 4)):
+        buffer = io.BytesIO()
+        salida.guardar_documento(doc, buffer, compresion=compresion, hilos=hilos)
+        with zipfile.ZipFile(buffer) as zf:
+            assert zf.testzip() is None
+            contenidos[compresion, hilos] = {nombre: zf.read(nombre) for nombre in zf.namelist()}
+            tamanos[compresion, hilos] = sum(info.compress_size for info in zf.infolist())
+
+    assert tamanos[0, None] > tamanos[1, None] >= tamanos[9, None]
+    # La compresión por bloques en hilos produce las mismas partes
+    assert all(contenido == contenidos[0, None] for contenido in contenidos.values())
+
+
+def test_descriptor_no_se_cierra(tmp_path):
+    ruta = tmp_path / 'salida.bin'
+    with open(ruta, 'wb') as archivo:
+        with salida.abrir_destino(archivo.fileno()) as destino:
+            destino.write(b'datos')
+        archivo.write(b' y mas')
+
+    assert ruta.read_bytes() == b'datos y mas'
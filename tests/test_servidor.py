@@ -0,0 +1,121 @@
+import asyncio
+import http.client
+import io
+import json
+import os
+import socket
+import threading
+import zipfile
+
+import pytest
+
+from servidor import ServidorGeneracion, validar_rutas
+
+
+@pytest.fixture(scope='module')
+def servicio(tmp_path_factory):
+    """Servicio con un trabajador caliente en un puerto libre; devuelve (puerto, directorio)"""
+
+    directorio = tmp_path_factory.mktemp('datos')
+    servidor = ServidorGeneracion(trabajadores=1, directorio_datos=str(directorio))
+    servidor.iniciar_trabajadores()
+    bucle = asyncio.new_event_loop()
+    listo = threading.Event()
+    estado = {}
+
+    async def arrancar():
+        servidor._semaforo = asyncio.Semaphore(servidor.max_concurrentes)
+        estado['servidor'] = await asyncio.start_server(servidor.atender, '127.0.0.1', 0)
+        estado['puerto'] = estado['servidor'].sockets[0].getsockname()[1]
+        listo.set()
+
+    hilo = threading.Thread(target=lambda: (bucle.run_until_complete(arrancar()), bucle.run_forever()),
+                            daemon=True)
+    hilo.start()
+    listo.wait(30)
+    yield estado['puerto'], directorio, servidor
+    bucle.call_soon_threadsafe(bucle.stop)
+    hilo.join(5)
+    servidor.detener()
+
+
+def _post(puerto, cuerpo, ruta='/generar'):
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=60)
+    try:
+        conexion.request('POST', ruta, body=cuerpo, headers={'Content-Type': 'application/json'})
+        respuesta = conexion.getresponse()
+        return respuesta.status, dict(respuesta.getheaders()), respuesta.read()
+    finally:
+        conexion.close()
+
+
+def test_genera_el_documento(servicio, datos):
+    puerto, _, _ = servicio
+
+    estado, cabeceras, contenido = _post(puerto, json.dumps(datos))
+
+    assert estado == 200
+    assert 'Transferencia_Tecnologica_20240501.docx' in cabeceras['Content-Disposition']
+    assert zipfile.ZipFile(io.BytesIO(contenido)).testzip() is None
+
+
+@pytest.mark.parametrize('cuerpo', [
+    b'{no es json',
+    b'[1, 2]',
+    json.dumps({'fecha': 'no-es-una-fecha'}).encode(),
+    json.dumps({'fecha': 5}).encode(),
+    json.dumps({'inventario': '/etc/passwd'}).encode(),
+    json.dumps({'diagrama_arquitectura': '../../etc/passwd'}).encode(),
+    json.dumps({'diagramas_servicios': ['a.png']}).encode(),
+])
+def test_errores_del_cliente_responden_400(servicio, cuerpo):
+    puerto, _, _ = servicio
+
+    estado, _, contenido = _post(puerto, cuerpo)
+
+    assert estado == 400
+    assert 'error' in json.loads(contenido)
+
+
+def test_fallos_de_generacion_responden_500(servicio):
+    puerto, _, servidor = servicio
+    errores = servidor.metricas()['errores']
+
+    estado, _, contenido = _post(puerto, json.dumps({'microservicios': 5}))
+
+    assert estado == 500
+    assert 'TypeError' in json.loads(contenido)['error']
+    assert servidor.metricas()['errores'] == errores + 1
+
+
+def test_content_length_invalido(servicio):
+    puerto, _, _ = servicio
+
+    with socket.create_connection(('127.0.0.1', puerto), timeout=10) as conexion:
+        conexion.sendall(b'POST /generar HTTP/1.1\r\nContent-Length: abc\r\n\r\n')
+        respuesta = conexion.recv(4096)
+
+    assert respuesta.startswith(b'HTTP/1.1 400')
+
+
+def test_rutas_y_metricas(servicio):
+    puerto, _, servidor = servicio
+
+    assert _post(puerto, b'', ruta='/otra')[0] == 404
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=10)
+    conexion.request('GET', '/generar')
+    assert conexion.getresponse().status == 405
+    conexion.close()
+    assert servidor.metricas()['trabajadores'] == 1
+
+
+def test_validar_rutas(tmp_path):
+    (tmp_path / 'inventario.csv').write_text('nombre\n', encoding='utf-8')
+
+    datos = validar_rutas({'inventario': 'inventario.csv'}, str(tmp_path))
+
+    assert datos['inventario'] == os.path.realpath(tmp_path / 'inventario.csv')
+    with pytest.raises(ValueError):
+        validar_rutas({'inventario': 'inventario.csv'})
+    with pytest.raises(ValueError):
+        validar_rutas({'inventario': '../fuera.csv'}, str(tmp_path))
@@ -0,0 +1,92 @@
+import base64
+import io
+import multiprocessing
+import os
+import sys
+import time
+import zipfile
+
+import pytest
+
+import lanzador
+import servidor_fork
+from conftest import leer_parte
+
+
+@pytest.fixture
+def trabajo(tmp_path, monkeypatch, perfilador_aislado):
+    """Trabajo en tmp_path; cwd, sys.argv y el entorno se restauran al terminar"""
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, 'argv', list(sys.argv))
+    entorno = dict(os.environ)
+    yield {'programa': 'transferencia', 'cwd': str(tmp_path), 'entorno': dict(entorno)}
+    os.environ.clear()
+    os.environ.update(entorno)
+    time.tzset()
+
+
+def test_genera_en_el_directorio_del_cliente(trabajo, tmp_path):
+    respuesta = servidor_fork.ejecutar_trabajo(dict(trabajo, argv=['-o', 'trabajo.docx']))
+
+    assert respuesta['codigo'] == 0, respuesta['stderr']
+    assert 'trabajo.docx' in base64.b64decode(respuesta['stdout']).decode('utf-8')
+    assert zipfile.ZipFile(tmp_path / 'trabajo.docx').testzip() is None
+
+
+def test_salida_estandar_binaria(trabajo):
+    respuesta = servidor_fork.ejecutar_trabajo(dict(trabajo, argv=['-o', '-']))
+
+    assert respuesta['codigo'] == 0, respuesta['stderr']
+    contenido = base64.b64decode(respuesta['stdout'])
+    assert zipfile.ZipFile(io.BytesIO(contenido)).testzip() is None
+
+
+def test_el_hijo_usa_el_entorno_del_cliente(trabajo, monkeypatch):
+    # Variable del servidor que el cliente no tiene: no debe llegar al trabajo
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '86400')
+
+    respuesta = servidor_fork.ejecutar_trabajo(dict(trabajo, argv=['-o', '-']))
+
+    assert respuesta['codigo'] == 0, respuesta['stderr']
+    core = leer_parte(base64.b64decode(respuesta['stdout']), 'docProps/core.xml')
+    assert b'1970-01-02' not in core
+
+
+def test_argumentos_invalidos_no_tumban_el_trabajo(trabajo):
+    respuesta = servidor_fork.ejecutar_trabajo(dict(trabajo, argv=['--no-existe']))
+
+    assert respuesta['codigo'] == 2
+    assert 'usage' in respuesta['stderr']
+
+
+def test_lanzador_usa_el_servidor(tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'servidor.sock')
+    monkeypatch.setenv(lanzador.VARIABLE_SOCKET, ruta)
+    monkeypatch.chdir(tmp_path)
+    proceso = multiprocessing.get_context('fork').Process(target=servidor_fork.servir, args=(ruta,))
+    proceso.start()
+    try:
+        for _ in range(100):
+            if os.path.exists(ruta):
+                break
+            time.sleep(0.05)
+
+        # SOURCE_DATE_EPOCH solo en el cliente: el documento es el mismo que sin servidor
+        monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+        respuesta = lanzador.ejecutar_en_servidor('transferencia', ['-o', 'fork.docx'])
+    finally:
+        proceso.terminate()
+        proceso.join(5)
+    lanzador.ejecutar_local('transferencia', ['-o', 'local.docx'])
+
+    assert respuesta['codigo'] == 0, respuesta['stderr']
+    assert zipfile.ZipFile(tmp_path / 'fork.docx').testzip() is None
+    assert b'2023-11-14' in leer_parte(str(tmp_path / 'fork.docx'), 'docProps/core.xml')
+    assert (tmp_path / 'fork.docx').read_bytes() == (tmp_path / 'local.docx').read_bytes()
+
+
+def test_sin_servidor_devuelve_none(tmp_path, monkeypatch):
+    monkeypatch.setenv(lanzador.VARIABLE_SOCKET, str(tmp_path / 'no-existe.sock'))
+
+    assert lanzador.ejecutar_en_servidor('transferencia', []) is None
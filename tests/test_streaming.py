@@ -0,0 +1,22 @@
+import zipfile
+
+from docx import Document
+
+from generate_word import crear_documento_transferencia
+
+
+def _estructura(ruta):
+    doc = Document(ruta)
+    return ([(parrafo.style.name, parrafo.text) for parrafo in doc.paragraphs],
+            [[[celda.text for celda in fila.cells] for fila in tabla.rows] for tabla in doc.tables])
+
+
+def test_streaming_produce_el_mismo_contenido(tmp_path, datos):
+    normal, streaming = str(tmp_path / 'normal.docx'), str(tmp_path / 'streaming.docx')
+
+    crear_documento_transferencia(dict(datos), normal)
+    crear_documento_transferencia(dict(datos), streaming, streaming=True)
+
+    assert zipfile.ZipFile(streaming).testzip() is None
+    assert _estructura(streaming) == _estructura(normal)
+    assert zipfile.ZipFile(streaming).namelist() == zipfile.ZipFile(normal).namelist()
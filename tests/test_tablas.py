@@ -0,0 +1,36 @@
+import pytest
+from docx.shared import Inches
+
+from plantilla import nuevo_documento
+from tablas import agregar_tabla
+
+
+def _valores(tabla):
+    return [[celda.text for celda in fila.cells] for fila in tabla.rows]
+
+
+def test_tabla_equivalente_a_python_docx():
+    doc = nuevo_documento()
+    filas = [("1", "servicio-a & <b>", "5001"), ("2", "servicio-b\tcon tab", "5002")]
+
+    tabla = agregar_tabla(doc, filas, encabezados=["#", "Servicio", "Puerto"],
+                          estilo='Light Grid Accent 1')
+
+    assert doc.tables[-1]._tbl is tabla._tbl
+    assert _valores(tabla) == [["#", "Servicio", "Puerto"], *[list(fila) for fila in filas]]
+    assert tabla.style.name == 'Light Grid Accent 1'
+    assert tabla.rows[0].cells[0].paragraphs[0].runs[0].bold
+
+
+def test_filas_desde_un_generador_y_filas_incompletas():
+    doc = nuevo_documento()
+    filas = ((str(i), f"fila {i}") for i in range(3))
+
+    tabla = agregar_tabla(doc, filas, encabezados=["A", "B", "C"], anchos=[Inches(1)] * 3)
+
+    assert _valores(tabla)[1:] == [[str(i), f"fila {i}", ""] for i in range(3)]
+
+
+def test_tabla_sin_filas_ni_encabezados():
+    with pytest.raises(ValueError):
+        agregar_tabla(nuevo_documento(), [])
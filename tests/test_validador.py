@@ -0,0 +1,82 @@
+import io
+import json
+
+from compendio import crear_compendio
+from docx import Document
+from generate_word import crear_documento_transferencia
+from marcadores import DocumentoConMarcadores, rellenar_copias
+from validador import main, validar_documento, validar_documentos
+
+
+def _documento(tmp_path, datos, nombre='sistema.docx'):
+    ruta = str(tmp_path / nombre)
+    crear_documento_transferencia(dict(datos), ruta)
+    return ruta
+
+
+def test_documento_generado_es_valido(tmp_path, datos):
+    resultado = validar_documento(_documento(tmp_path, datos))
+
+    assert resultado['estado'] == 'ok', resultado['errores']
+    assert resultado['tablas'] > 0
+    assert resultado['marcadores'] > 0
+
+
+def test_detecta_secciones_faltantes_y_columnas(tmp_path, datos):
+    ruta = _documento(tmp_path, datos)
+    doc = Document(ruta)
+    for parrafo in doc.paragraphs:
+        if parrafo.text == '8. SEGURIDAD':
+            parrafo.text = 'Otra cosa'
+    doc.tables[-1].rows[1].cells[0]._tc.getparent().remove(doc.tables[-1].rows[1].cells[0]._tc)
+    doc.save(ruta)
+
+    errores = validar_documento(ruta)['errores']
+
+    assert any('8. SEGURIDAD' in error for error in errores)
+    assert any('FIRMAS DE CONFORMIDAD' in error and 'columnas' in error for error in errores)
+
+
+def test_rellenado_marcadores_pendientes(tmp_path, datos):
+    ruta = _documento(tmp_path, datos)
+
+    resultado = validar_documento(ruta, rellenado=True)
+
+    assert resultado['estado'] == 'error'
+    assert '[Tu Nombre Completo]' in resultado['errores'][-1]
+    # Las etiquetas del diagrama ASCII no son marcadores
+    assert '[API Gateway]' not in resultado['errores'][-1]
+
+
+def test_rellenado_sin_marcadores(tmp_path, datos):
+    ruta = _documento(tmp_path, datos)
+    valores = {marcador: 'valor' for marcador in DocumentoConMarcadores(ruta).marcadores()}
+    rellenar_copias(ruta, [dict(valores, archivo='relleno.docx')], str(tmp_path / 'rellenos'))
+
+    resultado = validar_documento(str(tmp_path / 'rellenos' / 'relleno.docx'), rellenado=True)
+
+    assert resultado['estado'] == 'ok', resultado['errores']
+
+
+def test_compendio_valido(tmp_path, datos):
+    rutas = [_documento(tmp_path, dict(datos, sistema=nombre), f"{nombre}.docx") for nombre in 'AB']
+    destino = str(tmp_path / 'compendio.docx')
+    crear_compendio(rutas, destino)
+
+    assert validar_documento(destino)['errores'] == []
+
+
+def test_documento_ilegible_y_resumen_con_error(tmp_path, datos, capsys):
+    roto = tmp_path / 'roto.docx'
+    roto.write_bytes(b'no es un zip')
+    valido = _documento(tmp_path, datos)
+
+    informe = validar_documentos([valido, str(roto)], trabajadores=1)
+    assert (informe['correctos'], informe['errores']) == (1, 1)
+    assert 'No se pudo leer' in informe['resultados'][1]['errores'][0]
+
+    capsys.readouterr()
+    assert main([str(tmp_path), '--informe', '-', '-j', '1']) == 1
+    salida = capsys.readouterr()
+    assert json.load(io.StringIO(salida.out))['total'] == 2
+    assert '❌ 1/2 documentos válidos' in salida.err
@@ -0,0 +1,33 @@
+import pytest
+
+from vista_previa import generar_vista_previa, main
+
+
+def test_markdown_contiene_secciones_y_tablas(datos):
+    texto = generar_vista_previa(dict(datos, sistema='Sistema *con* |barras|'))
+
+    for titulo in ("1. RESUMEN EJECUTIVO", "2.2 Listado de microservicios", "FIRMAS DE CONFORMIDAD"):
+        assert f"# {titulo}\n" in texto
+    # Los caracteres especiales de Markdown se escapan dentro de las celdas
+    assert '| **Sistema:** | Sistema \\*con\\* \\|barras\\| |' in texto
+
+
+def test_html_escapa_el_texto(datos):
+    texto = generar_vista_previa(dict(datos, sistema='<script>'), 'html')
+
+    assert texto.startswith('<!DOCTYPE html>')
+    assert '<script>' not in texto
+    assert '&lt;script&gt;' in texto
+    assert texto.count('<table') == texto.count('</table>') > 0
+
+
+def test_formato_desconocido(datos):
+    with pytest.raises(ValueError):
+        generar_vista_previa(datos, 'pdf')
+
+
+def test_formato_segun_la_extension(tmp_path):
+    destino = tmp_path / 'vista.html'
+
+    assert main(['-o', str(destino)]) == 0
+    assert destino.read_text(encoding='utf-8').startswith('<!DOCTYPE html>')